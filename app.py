@@ -1,36 +1,221 @@
 import os
-from flask import Flask, request
-from telegram import Update, Bot
-from telegram.error import TelegramError
-from bot_handlers import handle_text_command, init_bot_objects
+import asyncio
+from utils import startup
+
+startup.track_imports()
+
+from aiohttp import web
+from bot_handlers import handle_text_command, init_bot_objects, outbox, router
+from utils.update_queue import UpdateQueue
+from utils.update_dedup import UpdateDeduplicator, chat_id_of
+from utils.subscription_db import SubscriptionRepository
+from utils.state_backend import open_backend
+from utils.send_queue import TokenBucket
+from utils import prefork, metrics
+from utils.profiler import profiler, install_signal_toggle
+from utils.http_client import client
 from dotenv import load_dotenv
 
+# python-telegram-bot (and httpx under it) is the slowest import by far; the
+# server starts accepting updates first and init_bot loads it in a thread
+telegram = startup.lazy_import("telegram")
+telegram_request = startup.lazy_import("telegram.request")
+
 load_dotenv()
 
 TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 if not TOKEN:
     raise ValueError("❌ BOT_TOKEN not set in environment!")
 
-bot = Bot(token=TOKEN)
-init_bot_objects(bot)
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "8"))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", "1000"))
+DB_PATH = os.getenv("DATABASE_PATH", "subscriptions.db")
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
+WEB_PROCESSES = int(os.getenv("WEB_PROCESSES", "1"))
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", "5"))
+# /debug/profile is off unless a token is set
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_MAX_SECONDS = 300
+
+WEBHOOK_UPDATES = metrics.counter("webhook_updates_total", "Webhook POSTs by outcome", ("result",))
+
+# one Bot (and its connection pool) for the life of the process, created on
+# first use; workers wait on bot_ready before handling anything
+bot = None
+bot_ready = asyncio.Event()
+
+
+def get_bot():
+    global bot
+    if bot is None:
+        bot = telegram.Bot(token=TOKEN, base_url=TELEGRAM_BASE_URL,
+                           request=telegram_request.HTTPXRequest(connection_pool_size=32))
+        init_bot_objects(bot)
+    return bot
+
+
+async def init_bot():
+    delay = 1
+    # importing on the loop would hold up every webhook POST until it finished
+    await telegram_request.load_in_thread()
+    await telegram.load_in_thread()
+    while True:
+        try:
+            b = get_bot()
+            await b.initialize()
+            break
+        except Exception as e:
+            print(f"❌ Bot init failed, retrying in {delay}s:", e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+    router.bot_username = router.bot_username or b.username
+    outbox.start(b)
+    bot_ready.set()
+    startup.report("Webhook bot")
+
 
-app = Flask(__name__)
+# with several worker processes a redelivered update can reach any of them,
+# so update ids are also claimed in the shared state backend
+shared_state = open_backend() if WEB_PROCESSES > 1 else None
+dedup = UpdateDeduplicator(SubscriptionRepository(DB_PATH), shared=shared_state)
 
-@app.route("/webhook", methods=["POST"])
-async def webhook():
+
+async def process_update(data):
+    await bot_ready.wait()
     try:
-        update = Update.de_json(request.get_json(force=True), bot)
+        update = telegram.Update.de_json(data, bot)
         await handle_text_command(bot, update)
-    except TelegramError as e:
+    except telegram.error.TelegramError as e:
+        metrics.ERRORS.inc(where="telegram")
         print("❌ Telegram API error:", e)
     except Exception as e:
+        metrics.ERRORS.inc(where="process_update")
         print("❌ General error:", e)
-    return "ok", 200
 
-@app.route("/", methods=["GET"])
-def home():
-    return "🤖 ICEGODS Bot Running!", 200
+
+# one chat's updates run in order on one worker; different chats in parallel
+updates = UpdateQueue(process_update, workers=WEBHOOK_WORKERS, maxsize=WEBHOOK_QUEUE_SIZE, key=chat_id_of)
+
+metrics.gauge("webhook_queue_depth", "Updates waiting for a webhook worker").set_function(updates.queue.qsize)
+metrics.gauge("outbox_queue_depth", "Messages waiting for the send rate limits").set_function(
+    lambda: outbox.queue.qsize() if outbox.queue else 0)
+metrics.gauge("webhook_active_chats", "Chats with an update in progress").set_function(updates.active_keys)
+
+
+async def webhook(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        WEBHOOK_UPDATES.inc(result="bad_request")
+        return web.Response(status=400, text="bad request")
+    if dedup.is_duplicate(data.get("update_id")):
+        # already queued or handled: ack so Telegram stops retrying
+        WEBHOOK_UPDATES.inc(result="duplicate")
+        return web.Response(text="ok")
+    if not updates.put_nowait(data):
+        # queue full: a non-2xx makes Telegram back off and redeliver later
+        dedup.forget(data.get("update_id"))
+        WEBHOOK_UPDATES.inc(result="busy")
+        return web.Response(status=503, text="busy")
+    dedup.queued(data.get("update_id"))
+    WEBHOOK_UPDATES.inc(result="accepted")
+    return web.Response(text="ok")
+
+
+async def home(request):
+    return web.Response(text="🤖 ICEGODS Bot Running!")
+
+
+async def stats(request):
+    return web.json_response({"worker": prefork.WORKER_ID, "pid": os.getpid(), **updates.stats(),
+                              "dedup": dedup.stats(), "active_chats": updates.active_keys(), "outbox": outbox.stats(),
+                              "commands": router.stats(), "upstreams": client.stats()})
+
+
+def metrics_key(worker):
+    return f"metrics:{worker}"
+
+
+async def publish_metrics():
+    # a scrape lands on one worker; the others' numbers come from the shared backend
+    while True:
+        shared_state.set(metrics_key(prefork.WORKER_ID), metrics.snapshot(), ttl=METRICS_PUBLISH_INTERVAL * 3)
+        await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
+
+
+async def metrics_route(request):
+    if shared_state is None or prefork.WORKER_ID is None:
+        text = metrics.render()
+    else:
+        snapshots = {str(i): shared_state.get(metrics_key(i)) for i in range(WEB_PROCESSES)}
+        snapshots[str(prefork.WORKER_ID)] = metrics.snapshot()
+        text = metrics.render({w: s for w, s in snapshots.items() if s})
+    return web.Response(body=text.encode(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+async def profile(request):
+    """Sample this worker's event loop for ?seconds=N and return folded stacks."""
+    token = request.headers.get("X-Profile-Token") or request.query.get("token")
+    if not PROFILE_TOKEN or token != PROFILE_TOKEN:
+        return web.Response(status=403, text="forbidden")
+    try:
+        seconds = min(float(request.query.get("seconds", "10")), PROFILE_MAX_SECONDS)
+    except ValueError:
+        return web.Response(status=400, text="bad seconds")
+    if profiler.running:
+        return web.Response(status=409, text="profiler already running")
+    profiler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        folded = profiler.stop()
+    return web.Response(text=folded, headers={"X-Profile-Samples": str(profiler.samples),
+                                              "X-Profile-Worker": str(prefork.WORKER_ID)})
+
+
+async def on_startup(app):
+    # don't block listening on Telegram's getMe: updates queue up meanwhile
+    app["bot_init"] = asyncio.ensure_future(init_bot())
+    updates.start()
+    if shared_state is not None and prefork.WORKER_ID is not None:
+        app["publish_metrics"] = asyncio.ensure_future(publish_metrics())
+    print(f"⏱ Webhook accepting updates after {startup.elapsed_ms():.0f} ms")
+
+
+async def on_cleanup(app):
+    app["bot_init"].cancel()
+    if "publish_metrics" in app:
+        app["publish_metrics"].cancel()
+    await updates.stop()
+    await outbox.stop()
+    dedup.persist()
+    if bot_ready.is_set():
+        await bot.shutdown()
+    await client.close()
+
+
+def configure_worker(index):
+    # kill -USR2 <worker pid> toggles the sampling profiler
+    install_signal_toggle()
+    # Telegram's ~30 msg/s limit is per bot, not per process
+    if WEB_PROCESSES > 1:
+        outbox.global_bucket = TokenBucket(outbox.global_bucket.rate / WEB_PROCESSES, burst=outbox.global_bucket.burst)
+
+
+def create_app():
+    app = web.Application()
+    app.router.add_post("/webhook", webhook)
+    app.router.add_get("/", home)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/metrics", metrics_route)
+    app.router.add_get("/debug/profile", profile)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    prefork.serve(app, "0.0.0.0", port, WEB_PROCESSES, on_worker=configure_worker)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+bench_cold_start.py
+Time-to-first-update for each entry point: start the process cold against
+the Bot API stub (stubs.py), feed it one /start update (a webhook POST for
+app.py and start_icegods.py, a getUpdates result for main.py) and time how
+long until the reply's sendMessage reaches the stub. For the webhook entry
+points the time until the first POST is accepted is reported too.
+
+Usage:
+    python3 benchmarks/bench_cold_start.py --runs 5
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, ClientError
+
+import stubs
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CHAT_ID = 4242
+
+
+async def run_once(entry):
+    bot_api = await stubs.BotApiStub().start()
+    update = stubs.command_update(1, CHAT_ID, "/start")
+    if entry == "main.py":
+        bot_api.push([update])
+
+    port = stubs.free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TELEGRAM_BOT_TOKEN=stubs.TOKEN, BOT_TOKEN=stubs.TOKEN, PORT=str(port),
+                   TELEGRAM_BASE_URL=bot_api.url + "/bot", WEBHOOK_URL="https://example.invalid/webhook",
+                   DATABASE_PATH=os.path.join(tmp, "bench.db"), PYTHONUNBUFFERED="1")
+        start = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, entry, cwd=ROOT, env=env,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        accepted = None
+        try:
+            if entry != "main.py":
+                async with ClientSession() as http:
+                    while accepted is None:
+                        try:
+                            async with http.post(f"http://127.0.0.1:{port}/webhook", json=update) as r:
+                                if r.status == 200:
+                                    accepted = time.perf_counter()
+                        except ClientError:
+                            await asyncio.sleep(0.005)
+            while CHAT_ID not in bot_api.replies:
+                if proc.returncode is not None:
+                    raise RuntimeError(f"{entry} exited early")
+                await asyncio.sleep(0.005)
+        finally:
+            proc.terminate()
+            out, _ = await proc.communicate()
+            await bot_api.stop()
+    report = [line for line in out.decode(errors="replace").splitlines() if line.startswith("⏱")]
+    return (accepted - start if accepted else None), bot_api.replies[CHAT_ID] - start, report
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--entries", nargs="+", default=["app.py", "start_icegods.py", "main.py"])
+    args = ap.parse_args()
+
+    print(f"{'entry point':>18} | {'accepting (median)':>18} | {'first reply (median)':>20} | runs")
+    for entry in args.entries:
+        accepted, replied, report = [], [], []
+        for _ in range(args.runs):
+            a, r, report = asyncio.run(run_once(entry))
+            if a is not None:
+                accepted.append(a)
+            replied.append(r)
+        acc = f"{statistics.median(accepted) * 1000:.0f} ms" if accepted else "n/a"
+        print(f"{entry:>18} | {acc:>18} | {statistics.median(replied) * 1000:17.0f} ms | {args.runs}")
+        for line in report:
+            print(f"{'':>18}   {line}")
+
+
+if __name__ == "__main__":
+    main()
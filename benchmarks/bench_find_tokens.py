@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+bench_find_tokens.py
+Compare the old six-pass find_tokens (one finditer per pattern, then dedup)
+against the prefiltered scanner in utils/token_scanner.py, on synthetic OCR
+dumps with a sprinkling of tokens. Also checks that both scanners, and the
+chunked one, return exactly the same tokens.
+
+Usage:
+    python3 benchmarks/bench_find_tokens.py --sizes 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.token_scanner import find_tokens, find_tokens_chunked
+
+# the patterns as they were before token_scanner, in their original order
+LEGACY_PATTERNS = {
+    "JWT": re.compile(r'\b[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\b'),
+    "Telegram Bot Token": re.compile(r'\b\d{6,18}:[A-Za-z0-9_\-]{35,}\b'),
+    "Ethereum (0x) Address": re.compile(r'\b0x[a-fA-F0-9]{40}\b'),
+    "Hex Key (40-128 hex chars)": re.compile(r'\b[a-fA-F0-9]{40,128}\b'),
+    "Base64-like": re.compile(r'\b[A-Za-z0-9+/]{20,}={0,2}\b'),
+    "URL": re.compile(r'https?://[^\s,]+')
+}
+
+
+def legacy_find_tokens(text):
+    found = []
+    for name, pat in LEGACY_PATTERNS.items():
+        for m in pat.finditer(text):
+            value = m.group(0).strip()
+            if len(value) < 8:
+                continue
+            found.append((name, value))
+    seen = set()
+    dedup = []
+    for typ, val in found:
+        if val not in seen:
+            dedup.append((typ, val))
+            seen.add(val)
+    return dedup
+
+
+def make_dump(size, seed=1):
+    rnd = random.Random(seed)
+    words = ["wallet", "balance", "Send", "to", "address", "confirm", "the", "token", "USD", "ETH",
+             "12:45", "PM", "Settings", "bot", "@icegods", "—", "Copy", "Share", "0.05", "Fee"]
+    hexchars = "0123456789abcdef"
+    b64 = string.ascii_letters + string.digits + "+/"
+    tokens = [
+        lambda: "0x" + "".join(rnd.choice(hexchars) for _ in range(40)),
+        lambda: "".join(rnd.choice(hexchars) for _ in range(64)),
+        lambda: f"{rnd.randint(10**8, 10**10)}:AA" + "".join(rnd.choice(b64[:62]) for _ in range(33)),
+        lambda: "eyJhbGciOi." + "".join(rnd.choice(b64[:62]) for _ in range(30)) + ".sig" + str(rnd.randint(0, 999)),
+        lambda: "https://etherscan.io/tx/0x" + "".join(rnd.choice(hexchars) for _ in range(64)),
+        lambda: "https://etherscan.io/address/0x" + "".join(rnd.choice(hexchars) for _ in range(40)),
+        lambda: "(https://api.example.com/v1?key=" + "".join(rnd.choice(b64[:62]) for _ in range(32)) + "),",
+        lambda: "".join(rnd.choice(b64) for _ in range(44)) + "=",
+    ]
+    out, n = [], 0
+    while n < size:
+        piece = rnd.choice(tokens)() if rnd.random() < 0.02 else rnd.choice(words)
+        out.append(piece)
+        out.append("\n" if rnd.random() < 0.1 else " ")
+        n += len(piece) + 1
+    return "".join(out)[:size]
+
+
+def best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best, res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--chunk", type=int, default=64 * 1024)
+    args = ap.parse_args()
+
+    print(f"{'chars':>10} | {'six-pass':>10} | {'scanner':>10} | {'chunked':>10} | speedup | tokens")
+    for size in args.sizes:
+        text = make_dump(size)
+        old, old_res = best_of(legacy_find_tokens, text, args.repeat)
+        new, new_res = best_of(find_tokens, text, args.repeat)
+        chunks = lambda t: find_tokens_chunked(t[i:i + args.chunk] for i in range(0, len(t), args.chunk))
+        chunked, chunk_res = best_of(chunks, text, args.repeat)
+        assert new_res == old_res, "scanner disagrees with the six-pass scan"
+        assert chunk_res == new_res, "chunked scan disagrees with one-shot scan"
+        print(f"{size:>10} | {old * 1000:8.1f}ms | {new * 1000:8.1f}ms | {chunked * 1000:8.1f}ms | "
+              f"{old / new:6.2f}x | {len(new_res)}")
+
+
+if __name__ == "__main__":
+    main()
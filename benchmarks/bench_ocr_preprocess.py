@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+bench_ocr_preprocess.py
+OCR a folder of images under several preprocessing settings and report, per
+setting: wall time, ms/image, peak RSS, and how many of the tokens found on
+the untouched originals are still found (recall) plus any extra ones.
+
+Each setting runs in a fresh process so peak RSS is its own.
+
+Usage:
+    python3 benchmarks/bench_ocr_preprocess.py --input ./images --limit 200
+"""
+
+import argparse
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pytesseract
+from PIL import Image
+
+from utils import ocr_preprocess
+from utils.token_scanner import find_tokens
+
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff", ".webp")
+D = ocr_preprocess.DEFAULTS
+SETTINGS = {
+    "original": None,
+    "gray": D._replace(max_width=0, binarize=False, tile_height=0),
+    "gray+cap": D._replace(binarize=False, tile_height=0),
+    "gray+cap+binarize": D._replace(tile_height=0),
+    "all (tiled)": D._replace(tile_workers=os.cpu_count() or 1),
+    "cap 1200": D._replace(max_width=1200, tile_workers=os.cpu_count() or 1),
+}
+
+
+def ocr(path, opts):
+    if opts is None:
+        with Image.open(path) as img:
+            return pytesseract.image_to_string(img)
+    with ocr_preprocess.open_image(path, opts) as img:
+        return "\n".join(ocr_preprocess.ocr_frame(ocr_preprocess.prepare(f, opts), pytesseract.image_to_string, opts)
+                         for f in ocr_preprocess.iter_frames(img, opts.max_frames))
+
+
+def run_setting(images, opts):
+    tokens = {}
+    start = time.perf_counter()
+    for path in images:
+        try:
+            tokens[path] = {v for _, v in find_tokens(ocr(path, opts))}
+        except Exception as e:
+            print(f"  skip {path}: {e}", file=sys.stderr)
+            tokens[path] = set()
+    elapsed = time.perf_counter() - start
+    return elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, tokens
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input", "-i", default="./images")
+    ap.add_argument("--limit", type=int, default=200)
+    args = ap.parse_args()
+
+    images = sorted(os.path.join(args.input, f) for f in os.listdir(args.input) if f.lower().endswith(EXTENSIONS))
+    images = [p for p in images if os.path.getsize(p) > 0][:args.limit]
+    if not images:
+        print("No (non-empty) images in", args.input)
+        return
+
+    baseline = None
+    print(f"{len(images)} images\n{'setting':>18} | {'total':>8} | {'ms/img':>7} | {'peak RSS':>9} | recall | extra")
+    for name, opts in SETTINGS.items():
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            elapsed, rss_mb, tokens = pool.submit(run_setting, images, opts).result()
+        if baseline is None:
+            baseline = tokens
+        want = sum(len(baseline[p]) for p in images)
+        got = sum(len(baseline[p] & tokens[p]) for p in images)
+        extra = sum(len(tokens[p] - baseline[p]) for p in images)
+        recall = got / want if want else 1.0
+        print(f"{name:>18} | {elapsed:7.1f}s | {elapsed / len(images) * 1000:7.0f} | {rss_mb:7.0f}MB | "
+              f"{recall:6.1%} | {extra}")
+
+
+if __name__ == "__main__":
+    main()
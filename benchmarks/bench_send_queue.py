@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+bench_send_queue.py
+Send a burst of messages to the Bot API stub (stubs.py) set to enforce
+Telegram's limits (global msgs/s and per-chat msgs/s, answering 429 +
+retry_after), once with naive concurrent send_message calls and once through
+OutboundDispatcher.
+
+Usage:
+    python3 benchmarks/bench_send_queue.py --messages 600 --chats 300
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import stubs
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from telegram import Bot
+from telegram.error import RetryAfter
+from telegram.request import HTTPXRequest
+
+from utils.send_queue import OutboundDispatcher, PRIORITY_BROADCAST
+
+
+async def run(args, mode):
+    bot_api = await stubs.BotApiStub(latency=args.latency, global_rate=args.global_rate,
+                                     chat_rate=args.chat_rate).start()
+    bot = Bot(stubs.TOKEN, base_url=bot_api.url + "/bot", request=HTTPXRequest(connection_pool_size=64))
+    targets = [1000 + i % args.chats for i in range(args.messages)]
+    delivered = 0
+    async with bot:
+        start = time.perf_counter()
+        if mode == "naive":
+            async def send(chat_id):
+                try:
+                    await bot.send_message(chat_id, "bench")
+                    return True
+                except RetryAfter:
+                    return False
+            delivered = sum(await asyncio.gather(*(send(c) for c in targets)))
+        else:
+            outbox = OutboundDispatcher(global_rate=args.global_rate, chat_rate=args.chat_rate)
+            outbox.start(bot)
+            results = await asyncio.gather(
+                *(outbox.submit(c, "bench", PRIORITY_BROADCAST) for c in targets), return_exceptions=True)
+            delivered = sum(not isinstance(r, Exception) for r in results)
+            await outbox.stop()
+        elapsed = time.perf_counter() - start
+    await bot_api.stop()
+    print(f"{mode:>10} | delivered {delivered:>5}/{args.messages} | 429s {bot_api.too_many:>5} | "
+          f"{elapsed:6.2f} s | {delivered / elapsed:6.1f} msg/s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--messages", type=int, default=600)
+    ap.add_argument("--chats", type=int, default=300)
+    ap.add_argument("--global-rate", type=float, default=30)
+    ap.add_argument("--chat-rate", type=float, default=1)
+    ap.add_argument("--latency", type=float, default=0.02, help="Bot API stub latency in seconds")
+    args = ap.parse_args()
+    for mode in ("naive", "dispatcher"):
+        asyncio.run(run(args, mode))
+
+
+if __name__ == "__main__":
+    main()
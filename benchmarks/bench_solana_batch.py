@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_solana_batch.py
+Measure HTTP round trips and latency for N concurrent Solana calls against a
+local fake JSON-RPC server, unbatched (one POST per call) vs SolanaRpc batching.
+
+Usage:
+    python3 benchmarks/bench_solana_batch.py --calls 1000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from aiohttp import web
+
+from utils.http_client import client
+from utils.solana_rpc import SolanaRpc
+
+
+class FakeRpc:
+    def __init__(self, latency):
+        self.latency = latency
+        self.requests = 0
+
+    def answer(self, req):
+        return {"jsonrpc": "2.0", "id": req.get("id"), "result": {"context": {"slot": 1}, "value": 1_000_000_000}}
+
+    async def handle(self, request):
+        self.requests += 1
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+        if isinstance(body, list):
+            return web.json_response([self.answer(r) for r in body])
+        return web.json_response(self.answer(body))
+
+
+async def start_server(fake):
+    app = web.Application()
+    app.router.add_post("/", fake.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+
+async def timed_call(coro):
+    start = time.perf_counter()
+    await coro
+    return (time.perf_counter() - start) * 1000
+
+
+def summary(label, fake, latencies, wall):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:>10} | {fake.requests:>8} HTTP requests | p50 {statistics.median(latencies):7.1f} ms | "
+          f"p99 {p99:7.1f} ms | wall {wall * 1000:7.1f} ms")
+
+
+async def run(calls, latency, window, max_batch):
+    for label in ("unbatched", "batched"):
+        fake = FakeRpc(latency)
+        runner, url = await start_server(fake)
+        rpc = SolanaRpc(url, window=window, max_batch=max_batch)
+        if label == "unbatched":
+            payload = lambda i: {"jsonrpc": "2.0", "id": i, "method": "getBalance", "params": ["addr"]}
+            coros = [client.post_json(url, payload(i)) for i in range(calls)]
+        else:
+            coros = [rpc.get_balance("addr") for _ in range(calls)]
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(timed_call(c) for c in coros))
+        summary(label, fake, list(latencies), time.perf_counter() - start)
+        await runner.cleanup()
+    await client.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=1000)
+    ap.add_argument("--latency", type=float, default=0.05, help="Fake RPC server latency in seconds")
+    ap.add_argument("--window", type=float, default=0.005)
+    ap.add_argument("--max-batch", type=int, default=100)
+    args = ap.parse_args()
+    asyncio.run(run(args.calls, args.latency, args.window, args.max_batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+bench_subscription_store.py
+Compare per-command latency of the old users.json reload against
+SubscriptionRepository (SQLite/WAL).
+
+Usage:
+    python3 benchmarks/bench_subscription_store.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.subscription_db import SubscriptionRepository
+
+
+def legacy_has_sub(path, uid):
+    with open(path, "r") as f:
+        u = json.load(f)
+    exp = u.get(str(uid), 0)
+    return exp if exp > time.time() else 0
+
+
+def legacy_add_sub(path, uid, days):
+    with open(path, "r") as f:
+        u = json.load(f)
+    now = int(time.time())
+    exp = u.get(str(uid), 0)
+    u[str(uid)] = (exp if exp > now else now) + days * 86400
+    with open(path, "w") as f:
+        json.dump(u, f)
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(size, repeat):
+    now = int(time.time())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.json")
+        with open(path, "w") as f:
+            json.dump({str(i): now + 86400 for i in range(size)}, f)
+
+        # the legacy path is O(N) per call, so cap its iterations on big files
+        legacy_repeat = max(1, min(repeat, 2_000_000 // size))
+        old_read = timed(lambda i: legacy_has_sub(path, i), legacy_repeat)
+        old_write = timed(lambda i: legacy_add_sub(path, i, 7), legacy_repeat)
+
+        repo = SubscriptionRepository(os.path.join(tmp, "subscriptions.db"))
+        start = time.perf_counter()
+        repo.import_json(path)
+        import_ms = (time.perf_counter() - start) * 1000
+        db_read = timed(lambda i: repo.get_expiry(i), repeat)
+        db_write = timed(lambda i: repo.extend(i, 7), repeat)
+        repo.close()
+
+    return {
+        "users": size,
+        "legacy_has_sub_ms": old_read,
+        "legacy_add_sub_ms": old_write,
+        "sqlite_import_ms": import_ms,
+        "sqlite_has_sub_ms": db_read,
+        "sqlite_add_sub_ms": db_write,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--repeat", type=int, default=1000)
+    ap.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = ap.parse_args()
+
+    results = [run(n, args.repeat) for n in args.sizes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'users':>9} | {'legacy has_sub':>14} | {'legacy add_sub':>14} | {'import':>10} | {'sqlite has_sub':>14} | {'sqlite add_sub':>14}")
+    for r in results:
+        print(f"{r['users']:>9} | {r['legacy_has_sub_ms']:>11.3f} ms | {r['legacy_add_sub_ms']:>11.3f} ms | "
+              f"{r['sqlite_import_ms']:>7.1f} ms | "
+              f"{r['sqlite_has_sub_ms'] * 1000:>11.2f} µs | {r['sqlite_add_sub_ms'] * 1000:>11.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+bench_suite.py
+Offline, reproducible benchmark of both entry points against local stubs of
+the Bot API, Etherscan, Solana RPC and CoinGecko (benchmarks/stubs.py).
+
+- webhook: app.py is started and a synthetic stream of /start, /help and
+  /vip updates is POSTed to /webhook. Latency runs from the POST to the
+  reply's sendMessage reaching the stub.
+- polling: main.py is started and the Bot API stub serves a synthetic
+  stream of /start, /status, /subscribe, /confirm and /wallet through
+  getUpdates. Those commands hit CoinGecko, Etherscan and Solana. Latency
+  runs from getUpdates handing the update out to the reply arriving.
+
+Every update comes from its own chat, so each reply can be matched to its
+update. Telegram's send limits and the per-user command limit are lifted.
+The results (throughput, p50/p95/p99 latency, lost replies, peak and final
+RSS of the bot process) are written as JSON. Given --baseline, they are
+compared against a previous run, and the script exits 1 if any metric got
+worse by more than --tolerance, or if more replies were lost at all.
+
+Usage:
+    python3 benchmarks/bench_suite.py --updates 2000 --output bench.json
+    python3 benchmarks/bench_suite.py --baseline bench.json --latency 0.05 --failure-rate 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, TCPConnector
+
+import stubs
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from utils.subscription_db import SubscriptionRepository  # noqa: E402
+
+UNLIMITED = "1000000000"
+WALLET_ETH = "0x" + "ab" * 20
+WALLET_SOL = "So1ana1111111111111111111111111111111111112"
+CHAT_BASE = 10_000_000
+WEBHOOK_MIX = ["/start", "/help", "/vip"]
+POLLING_MIX = ["/start", "/status", "/subscribe", "/confirm", "/wallet"]
+# metric -> True if higher is better
+METRICS = {"throughput": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "rss_peak_kb": False,
+           "lost": False}
+# counts where any increase is a regression, whatever the tolerance
+STRICT = {"lost"}
+
+
+# ==========================
+# Synthetic updates
+# ==========================
+def make_update(i, command):
+    text = f"/confirm 0x{i:064x}" if command == "/confirm" else command
+    return stubs.command_update(i, CHAT_BASE + i, text)
+
+
+def stream(n, mix, first=1):
+    return [make_update(first + k, mix[k % len(mix)]) for k in range(n)]
+
+
+def chat_of(update):
+    return update["message"]["chat"]["id"]
+
+
+# ==========================
+# Measurement helpers
+# ==========================
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] if ordered else 0.0
+
+
+def memory_kb(pid):
+    """(peak, current) resident set of ``pid`` in kB, from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmHWM"].split()[0]), int(fields["VmRSS"].split()[0])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def summarise(sent, replies, updates, pid):
+    latencies = sorted(replies[c] - sent[c] for c in (chat_of(u) for u in updates) if c in replies and c in sent)
+    first = min(sent.values()) if sent else 0
+    last = max((replies[c] for c in sent if c in replies), default=first)
+    peak, rss = memory_kb(pid)
+    return {
+        "updates": len(updates),
+        "replied": len(latencies),
+        "lost": len(updates) - len(latencies),
+        "throughput": round(len(latencies) / (last - first), 1) if last > first else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "rss_peak_kb": peak,
+        "rss_kb": rss,
+    }
+
+
+# ==========================
+# Scenarios
+# ==========================
+async def start_bot(script, env, tmp):
+    env = dict(os.environ, **env, DATABASE_PATH=os.path.join(tmp, "bench.db"),
+               TELEGRAM_GLOBAL_RATE=UNLIMITED, TELEGRAM_CHAT_RATE=UNLIMITED,
+               COMMAND_RATE=UNLIMITED, COMMAND_BURST=UNLIMITED, PYTHONUNBUFFERED="1")
+    # outside tmp so it survives a failed run
+    log = open(os.path.join(tempfile.gettempdir(), f"bench_{script}.log"), "wb")
+    proc = await asyncio.create_subprocess_exec(sys.executable, script, cwd=ROOT, env=env,
+                                                stdout=log, stderr=asyncio.subprocess.STDOUT)
+    return proc, log
+
+
+async def stop_bot(proc, log):
+    if proc.returncode is None:
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), 10)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+    log.close()
+
+
+async def run_webhook(args, bot_api, upstream_env, tmp):
+    port = args.port
+    proc, log = await start_bot("app.py", dict(upstream_env, TELEGRAM_BOT_TOKEN=stubs.TOKEN, PORT=str(port)), tmp)
+    url = f"http://127.0.0.1:{port}/webhook"
+    try:
+        async with ClientSession(connector=TCPConnector(limit=args.concurrency)) as http:
+            async def post(update):
+                async with http.post(url, json=update) as r:
+                    return r.status
+
+            # warm-up: wait for the server and the bot to be up
+            warm = make_update(1, "/start")
+            while True:
+                try:
+                    if await post(warm) == 200:
+                        break
+                except OSError:
+                    pass
+                if proc.returncode is not None:
+                    raise RuntimeError(f"app.py exited, see {log.name}")
+                await asyncio.sleep(0.05)
+            await bot_api.wait_replies([chat_of(warm)], args.timeout)
+
+            updates = stream(args.updates, WEBHOOK_MIX, first=2)
+            sent = {}
+            sem = asyncio.Semaphore(args.concurrency)
+            interval = 1.0 / args.rate if args.rate else 0
+            start = time.perf_counter()
+
+            async def send(update):
+                async with sem:
+                    sent[chat_of(update)] = time.perf_counter()
+                    while await post(update) == 503:
+                        await asyncio.sleep(0.05)  # queue full: redeliver like Telegram
+
+            tasks = []
+            for k, update in enumerate(updates):
+                if interval:
+                    await asyncio.sleep(max(0, start + k * interval - time.perf_counter()))
+                tasks.append(asyncio.ensure_future(send(update)))
+            await asyncio.gather(*tasks)
+            await bot_api.wait_replies([chat_of(u) for u in updates], args.timeout)
+        return summarise(sent, bot_api.replies, updates, proc.pid)
+    finally:
+        await stop_bot(proc, log)
+
+
+async def run_polling(args, bot_api, upstream_env, tmp):
+    updates = stream(args.updates, POLLING_MIX, first=2)
+    # /wallet needs an active subscription
+    repo = SubscriptionRepository(os.path.join(tmp, "bench.db"))
+    for u in updates:
+        if u["message"]["text"] == "/wallet":
+            repo.extend(chat_of(u), 30)
+    repo.close()
+
+    env = dict(upstream_env, BOT_TOKEN=stubs.TOKEN, WALLET_ADDRESS_ETH=WALLET_ETH, WALLET_ADDRESS_SOL=WALLET_SOL,
+               ETHERSCAN_API_KEY="bench")
+    proc, log = await start_bot("main.py", env, tmp)
+    try:
+        warm = make_update(1, "/start")
+        bot_api.push([warm])
+        if not await bot_api.wait_replies([chat_of(warm)], args.timeout):
+            raise RuntimeError(f"main.py never answered, see {log.name}")
+        if args.rate:
+            interval = 1.0 / args.rate
+            start = time.perf_counter()
+            for k, update in enumerate(updates):
+                await asyncio.sleep(max(0, start + k * interval - time.perf_counter()))
+                bot_api.push([update])
+        else:
+            bot_api.push(updates)
+        await bot_api.wait_replies([chat_of(u) for u in updates], args.timeout)
+        return summarise(bot_api.delivered, bot_api.replies, updates, proc.pid)
+    finally:
+        await stop_bot(proc, log)
+
+
+SCENARIOS = {"webhook": run_webhook, "polling": run_polling}
+
+
+async def run_scenario(name, args):
+    fault = dict(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate)
+    bot_api = await stubs.BotApiStub(latency=args.bot_latency, failure_rate=args.bot_failure_rate, seed=args.seed).start()
+    upstreams = [await stubs.EtherscanStub(WALLET_ETH, seed=args.seed + 1, **fault).start(),
+                 await stubs.SolanaStub(seed=args.seed + 2, **fault).start(),
+                 await stubs.CoinGeckoStub(seed=args.seed + 3, **fault).start()]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            result = await SCENARIOS[name](args, bot_api, stubs.env(bot_api, *upstreams), tmp)
+    finally:
+        for stub in [bot_api] + upstreams:
+            await stub.stop()
+    result["stubs"] = {type(s).__name__: s.stats() for s in [bot_api] + upstreams}
+    return result
+
+
+# ==========================
+# Baseline comparison
+# ==========================
+def compare(baseline, current, tolerance):
+    """Print a table of changes; returns the list of regressions."""
+    regressions = []
+    print(f"\n{'scenario':>9} | {'metric':>11} | {'baseline':>10} | {'current':>10} | change")
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric, higher_better in METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if metric in STRICT:
+                regressed = new > old
+                change = f"{new - old:+d}"
+            elif old:
+                ratio = (new - old) / old
+                regressed = (-ratio if higher_better else ratio) > tolerance
+                change = f"{ratio:+.1%}"
+            else:
+                continue
+            flag = "  ❌ regression" if regressed else ""
+            if flag:
+                regressions.append((name, metric))
+            print(f"{name:>9} | {metric:>11} | {old:>10} | {new:>10} | {change}{flag}")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["webhook", "polling"])
+    ap.add_argument("--updates", type=int, default=2000)
+    ap.add_argument("--rate", type=float, default=0, help="Updates per second (0 = as fast as possible)")
+    ap.add_argument("--concurrency", type=int, default=64, help="In-flight webhook POSTs")
+    ap.add_argument("--latency", type=float, default=0.02, help="Upstream stub latency in seconds")
+    ap.add_argument("--jitter", type=float, default=0.01, help="Extra random upstream latency, up to this")
+    ap.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of upstream requests that 503")
+    ap.add_argument("--bot-latency", type=float, default=0.005, help="Bot API stub latency in seconds")
+    ap.add_argument("--bot-failure-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--port", type=int, default=18080, help="Port for app.py in the webhook scenario")
+    ap.add_argument("--timeout", type=float, default=120, help="Seconds to wait for outstanding replies")
+    ap.add_argument("--output", help="Write results JSON here")
+    ap.add_argument("--baseline", help="Compare against this results JSON; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = ap.parse_args()
+
+    results = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "time": int(time.time()), "args": {k: v for k, v in vars(args).items()
+                                                    if k not in ("output", "baseline")}},
+        "scenarios": {},
+    }
+    print(f"{'scenario':>9} | {'updates/s':>9} | {'p50':>8} | {'p95':>8} | {'p99':>8} | {'lost':>5} | {'peak RSS':>9}")
+    for name in args.scenarios:
+        r = results["scenarios"][name] = asyncio.run(run_scenario(name, args))
+        rss = f"{r['rss_peak_kb'] / 1024:.1f} MB" if r["rss_peak_kb"] else "n/a"
+        print(f"{name:>9} | {r['throughput']:>9} | {r['p50_ms']:>6}ms | {r['p95_ms']:>6}ms | {r['p99_ms']:>6}ms | "
+              f"{r['lost']:>5} | {rss:>9}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📝 Results → {args.output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
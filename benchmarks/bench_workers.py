@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+bench_workers.py
+Load-test the webhook with 1..N worker processes (WEB_PROCESSES) against
+the Bot API stub (stubs.py). For each worker count, start_icegods.py is
+started on a temp database, a burst of unique /help updates is POSTed from
+several client processes, and throughput is the number of updates whose
+reply reached the stub per second. Telegram's send limits are lifted so the webhook, not
+the pacing, is what's measured.
+
+The load generator and the stub need spare cores of their own: on a host
+with fewer than ~2x the largest worker count in cores the curve flattens
+because of the harness, not the bot.
+
+Usage:
+    python3 benchmarks/bench_workers.py --workers 1 2 4 8 --updates 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aiohttp import ClientSession, ClientError, TCPConnector
+
+import stubs
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+UNLIMITED = "1000000000"
+
+
+def help_update(i, chats):
+    return stubs.command_update(i, 100000 + i % chats, "/help")
+
+
+def post_slice(url, first, count, step, chats, concurrency):
+    """Runs in a client process: POST updates first, first+step, ... ."""
+    async def run():
+        rejected = 0
+        async with ClientSession(connector=TCPConnector(limit=concurrency)) as http:
+            sem = asyncio.Semaphore(concurrency)
+
+            async def post(i):
+                nonlocal rejected
+                async with sem:
+                    while True:
+                        async with http.post(url, json=help_update(i, chats)) as r:
+                            if r.status == 200:
+                                return
+                        rejected += 1
+                        await asyncio.sleep(0.05)  # 503: queue full, retry like Telegram would
+            await asyncio.gather(*(post(first + k * step) for k in range(count)))
+        return rejected
+    return asyncio.run(run())
+
+
+async def wait_for_workers(port, workers, timeout=60):
+    """Poll /stats on fresh connections until every worker has answered."""
+    pids = set()
+    deadline = time.monotonic() + timeout
+    while len(pids) < workers:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"only {len(pids)}/{workers} workers came up")
+        try:
+            async with ClientSession(connector=TCPConnector(force_close=True)) as http:
+                async with http.get(f"http://127.0.0.1:{port}/stats") as r:
+                    pids.add((await r.json())["pid"])
+        except (ClientError, ValueError):
+            await asyncio.sleep(0.05)
+
+
+async def run_once(workers, args, clients):
+    bot_api = await stubs.BotApiStub().start()
+    port = stubs.free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, TELEGRAM_BOT_TOKEN=stubs.TOKEN, PORT=str(port), WEB_PROCESSES=str(workers),
+                   TELEGRAM_BASE_URL=bot_api.url + "/bot", WEBHOOK_URL="https://example.invalid/webhook",
+                   DATABASE_PATH=os.path.join(tmp, "bench.db"), TELEGRAM_GLOBAL_RATE=UNLIMITED,
+                   TELEGRAM_CHAT_RATE=UNLIMITED, COMMAND_RATE=UNLIMITED, COMMAND_BURST=UNLIMITED)
+        proc = await asyncio.create_subprocess_exec(sys.executable, "start_icegods.py", cwd=ROOT, env=env,
+                                                    stdout=asyncio.subprocess.DEVNULL)
+        try:
+            await wait_for_workers(port, workers)
+            url = f"http://127.0.0.1:{port}/webhook"
+            loop = asyncio.get_running_loop()
+            per_client = args.updates // args.clients
+            start = time.perf_counter()
+            posted = [loop.run_in_executor(clients, post_slice, url, 1 + c, per_client, args.clients,
+                                           args.chats, args.concurrency) for c in range(args.clients)]
+            rejected = sum(await asyncio.gather(*posted))
+            accepted_at = time.perf_counter()
+            # every /help gets exactly one reply
+            if not await bot_api.wait_sent(args.updates, args.timeout):
+                raise RuntimeError(f"only {bot_api.sent}/{args.updates} replies within {args.timeout}s")
+            finished = time.perf_counter()
+        finally:
+            proc.terminate()
+            await proc.wait()
+            await bot_api.stop()
+    return {"workers": workers, "accepted_s": accepted_at - start, "elapsed_s": finished - start,
+            "throughput": args.updates / (finished - start), "rejected": rejected}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--updates", type=int, default=20000)
+    ap.add_argument("--clients", type=int, default=4, help="load-generator processes")
+    ap.add_argument("--concurrency", type=int, default=64, help="in-flight POSTs per client")
+    ap.add_argument("--chats", type=int, default=5000)
+    ap.add_argument("--timeout", type=float, default=300)
+    args = ap.parse_args()
+    args.updates -= args.updates % args.clients
+
+    print(f"{'workers':>7} | {'updates/s':>10} | {'speedup':>7} | {'all accepted':>12} | {'all replied':>11} | 503s")
+    base = None
+    with ProcessPoolExecutor(args.clients) as clients:
+        for n in args.workers:
+            r = asyncio.run(run_once(n, args, clients))
+            base = base or r["throughput"]
+            print(f"{n:>7} | {r['throughput']:>10.0f} | {r['throughput'] / base:>6.2f}x | "
+                  f"{r['accepted_s']:>11.2f}s | {r['elapsed_s']:>10.2f}s | {r['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
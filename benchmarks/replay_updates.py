@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+replay_updates.py
+Replay recorded Telegram updates against a running webhook server at a fixed rate.
+
+Usage:
+    python3 benchmarks/replay_updates.py --url http://127.0.0.1:5000/webhook \
+        --updates recorded_updates.jsonl --rate 200 --count 5000
+
+--updates is a JSONL file with one Telegram update per line. Without it,
+synthetic /start, /help and /vip messages are generated. update_ids are
+rewritten so every replayed update is unique.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import statistics
+import time
+from collections import Counter
+
+import aiohttp
+
+import stubs
+
+COMMANDS = ["/start", "/help", "/vip"]
+
+
+def synthetic_update(i, chats):
+    return stubs.command_update(i, 100000 + i % chats, COMMANDS[i % len(COMMANDS)])
+
+
+def load_updates(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def replay(args):
+    if args.updates:
+        recorded = load_updates(args.updates)
+        source = (dict(u) for u in itertools.cycle(recorded))
+    else:
+        source = (synthetic_update(i, args.chats) for i in itertools.count(1))
+
+    statuses = Counter()
+    latencies = []
+    interval = 1.0 / args.rate
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def post(update):
+            start = time.perf_counter()
+            try:
+                async with session.post(args.url, json=update) as resp:
+                    await resp.read()
+                    statuses[resp.status] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        tasks = []
+        started = time.perf_counter()
+        for i, update in zip(range(args.count), source):
+            update["update_id"] = args.start_id + i
+            # schedule against the wall clock so slow acks don't lower the offered rate
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(post(update)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+        server_stats = None
+        if args.stats_url:
+            await asyncio.sleep(args.settle)
+            async with session.get(args.stats_url) as resp:
+                server_stats = await resp.json()
+
+    latencies.sort()
+    report = {
+        "sent": args.count,
+        "offered_rate": args.rate,
+        "achieved_rate": round(args.count / elapsed, 1),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "ack_p50_ms": round(statistics.median(latencies), 2),
+        "ack_p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2),
+        "server": server_stats,
+    }
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:5000/webhook")
+    ap.add_argument("--stats-url", default="http://127.0.0.1:5000/stats", help="Empty to skip fetching server stats")
+    ap.add_argument("--updates", help="JSONL file of recorded updates")
+    ap.add_argument("--rate", type=float, default=100, help="Updates per second")
+    ap.add_argument("--count", type=int, default=1000)
+    ap.add_argument("--chats", type=int, default=500, help="Distinct chats for synthetic updates")
+    ap.add_argument("--concurrency", type=int, default=200, help="Max open connections")
+    ap.add_argument("--start-id", type=int, default=int(time.time()) * 1000)
+    ap.add_argument("--settle", type=float, default=1.0, help="Seconds to wait before reading server stats")
+    asyncio.run(replay(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
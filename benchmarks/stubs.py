@@ -0,0 +1,285 @@
+"""
+stubs.py
+Local stand-ins for the Bot API, Etherscan, Solana RPC and CoinGecko, shared
+by every benchmark (and the tests). Every request waits ``latency`` plus up
+to ``jitter`` seconds, and ``failure_rate`` of requests get a 503. The RNG
+is seeded, so a run with the same arguments sees the same faults.
+
+Point the bot at them with TELEGRAM_BASE_URL, ETHERSCAN_API_URL,
+SOLANA_RPC_URL and COINGECKO_API_URL (see ``env()``).
+"""
+
+import asyncio
+import json
+import random
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+
+from aiohttp import web
+
+TOKEN = "123456:bench-token-bench-token-bench-token-x"
+ETH_BALANCE_WEI = 1_230_000_000_000_000_000
+SOL_BALANCE_LAMPORTS = 4_560_000_000
+PAYMENT_WEI = 10**16            # 0.01 ETH: a weekly plan at the stub price
+PRICES = {"ethereum": {"usd": 3000.0}, "solana": {"usd": 150.0}}
+
+
+class Stub(ABC):
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self.url = None
+        self._runner = None
+
+    @abstractmethod
+    def routes(self, app):
+        """Add this stub's handlers to ``app``."""
+
+    @web.middleware
+    async def faults(self, request, handler):
+        self.requests += 1
+        delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.failure_rate and self.rng.random() < self.failure_rate:
+            self.failures += 1
+            return web.json_response({"ok": False, "error": "injected failure"}, status=503)
+        return await handler(request)
+
+    async def start(self, host="127.0.0.1"):
+        app = web.Application(middlewares=[self.faults])
+        self.routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, 0).start()
+        self.url = "http://%s:%d" % self._runner.addresses[0][:2]
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def stats(self):
+        return {"requests": self.requests, "failures": self.failures}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def command_update(update_id, chat_id, text):
+    """A private-chat message update whose text starts with a /command."""
+    command = text.split()[0]
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": text,
+        "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": chat_id, "is_bot": False, "first_name": "bench"}}}
+
+
+class BotApiStub(Stub):
+    """getUpdates serves whatever ``push`` queued; every sendMessage is
+    timestamped per chat, which is how a benchmark sees a reply land.
+
+    With ``global_rate``/``chat_rate`` (messages per second), sendMessage
+    enforces Telegram's flood limits over a sliding second and answers
+    429 with retry_after, like the real API.
+    """
+
+    def __init__(self, *args, global_rate=None, chat_rate=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.pending = deque()
+        self.delivered = {}     # chat_id -> when getUpdates handed its update out
+        self.replies = {}       # chat_id -> first sendMessage for it
+        self.sent = 0
+        self.too_many = 0
+        self._window = deque()
+        self._chat_windows = defaultdict(deque)
+        self._new_update = asyncio.Event()
+        self._new_reply = asyncio.Event()
+
+    def routes(self, app):
+        app.router.add_route("*", "/bot{token}/{method}", self.handle)
+
+    def push(self, updates):
+        self.pending.extend(updates)
+        self._new_update.set()
+
+    async def wait_replies(self, chats, timeout):
+        """Wait until every chat in ``chats`` got a reply (or ``timeout``); returns the count."""
+        deadline = time.monotonic() + timeout
+        missing = set(chats) - self.replies.keys()
+        while missing:
+            self._new_reply.clear()
+            missing -= self.replies.keys()
+            left = deadline - time.monotonic()
+            if not missing or left <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._new_reply.wait(), left)
+            except asyncio.TimeoutError:
+                break
+        return len(chats) - len(missing)
+
+    async def wait_sent(self, count, timeout):
+        """Wait until ``count`` messages were sent in total; True if they were."""
+        deadline = time.monotonic() + timeout
+        while self.sent < count:
+            self._new_reply.clear()
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            try:
+                await asyncio.wait_for(self._new_reply.wait(), left)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    def _limited(self, chat_id):
+        now = time.monotonic()
+        windows = [(self._window, self.global_rate), (self._chat_windows[chat_id], self.chat_rate)]
+        for window, limit in windows:
+            while window and now - window[0] > 1.0:
+                window.popleft()
+            if limit is not None and len(window) >= limit:
+                return True
+        for window, _ in windows:
+            window.append(now)
+        return False
+
+    async def params(self, request):
+        if request.content_type == "application/json":
+            return await request.json()
+        data = dict(await request.post())
+        return {k: _maybe_json(v) for k, v in data.items()}
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        if method == "getMe":
+            return _ok({"id": 123456, "is_bot": True, "first_name": "bench", "username": "bench_bot"})
+        if method == "getUpdates":
+            params = await self.params(request)
+            if not self.pending:
+                self._new_update.clear()
+                try:
+                    await asyncio.wait_for(self._new_update.wait(), min(float(params.get("timeout") or 0), 1.0))
+                except asyncio.TimeoutError:
+                    pass
+            batch = [self.pending.popleft() for _ in range(min(len(self.pending), int(params.get("limit") or 100)))]
+            now = time.perf_counter()
+            for u in batch:
+                self.delivered[u["message"]["chat"]["id"]] = now
+            return _ok(batch)
+        if method == "sendMessage":
+            params = await self.params(request)
+            chat_id = int(params["chat_id"])
+            if (self.global_rate or self.chat_rate) and self._limited(chat_id):
+                self.too_many += 1
+                return web.json_response({"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                                          "parameters": {"retry_after": 1}}, status=429)
+            self.sent += 1
+            self.replies.setdefault(chat_id, time.perf_counter())
+            self._new_reply.set()
+            return _ok({"message_id": 1, "date": int(time.time()), "chat": {"id": chat_id, "type": "private"},
+                        "text": str(params.get("text", ""))})
+        return _ok(True)
+
+
+class EtherscanStub(Stub):
+    def __init__(self, wallet, *args, rate_limited=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wallet = wallet.lower()
+        # like the real API over its quota: HTTP 200 with status "0"
+        self.rate_limited = rate_limited
+
+    def routes(self, app):
+        app.router.add_get("/api", self.handle)
+
+    async def handle(self, request):
+        q = request.query
+        action = q.get("action")
+        if self.rate_limited:
+            return web.json_response({"status": "0", "message": "NOTOK", "result": "Max rate limit reached"})
+        if action == "balancemulti":
+            return web.json_response({"status": "1", "message": "OK", "result": [
+                {"account": a, "balance": str(ETH_BALANCE_WEI)} for a in q.get("address", "").split(",")]})
+        if action == "txlist":
+            return web.json_response({"status": "0", "message": "No transactions found", "result": []})
+        if action == "eth_blockNumber":
+            return web.json_response({"jsonrpc": "2.0", "id": 83, "result": "0x1312d00"})
+        if action == "eth_getTransactionByHash":
+            return web.json_response({"jsonrpc": "2.0", "id": 1, "result": {
+                "hash": q.get("txhash"), "to": self.wallet, "value": hex(PAYMENT_WEI), "blockNumber": "0x1312d00"}})
+        if action == "eth_getTransactionReceipt":
+            return web.json_response({"jsonrpc": "2.0", "id": 1, "result": {
+                "transactionHash": q.get("txhash"), "to": self.wallet, "blockNumber": "0x1312d00", "status": "0x1"}})
+        return web.json_response({"status": "0", "message": "NOTOK", "result": f"unknown action {action}"})
+
+
+class SolanaStub(Stub):
+    def __init__(self, *args, omit=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        # methods whose responses are left out of a batch reply
+        self.omit = set(omit)
+
+    def routes(self, app):
+        app.router.add_post("/", self.handle)
+
+    def answer(self, call):
+        method, params = call.get("method"), call.get("params") or []
+        if method == "getMultipleAccounts":
+            result = {"context": {"slot": 1}, "value": [{"lamports": SOL_BALANCE_LAMPORTS} for _ in params[0]]}
+        elif method == "getBalance":
+            result = {"context": {"slot": 1}, "value": SOL_BALANCE_LAMPORTS}
+        elif method == "getSignaturesForAddress":
+            result = []
+        elif method == "getTransaction":
+            result = None
+        else:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+
+    async def handle(self, request):
+        body = await request.json()
+        if isinstance(body, list):
+            return web.json_response([self.answer(c) for c in body if c.get("method") not in self.omit])
+        return web.json_response(self.answer(body))
+
+
+class CoinGeckoStub(Stub):
+    def routes(self, app):
+        app.router.add_get("/api/v3/simple/price", self.handle)
+
+    async def handle(self, request):
+        return web.json_response(PRICES)
+
+
+def _ok(result):
+    return web.json_response({"ok": True, "result": result})
+
+
+def _maybe_json(value):
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def env(bot, etherscan, solana, coingecko):
+    """Environment that points the bot's upstream calls at the stubs."""
+    return {
+        "TELEGRAM_BASE_URL": bot.url + "/bot",
+        "ETHERSCAN_API_URL": etherscan.url + "/api",
+        "SOLANA_RPC_URL": solana.url + "/",
+        "COINGECKO_API_URL": coingecko.url + "/api/v3",
+    }
@@ -1,25 +1,53 @@
-from telegram import Update
-from telegram.ext import ContextTypes
-from config import ADMIN_ID
+import os
+from utils.send_queue import OutboundDispatcher
+from utils.command_router import CommandRouter, auth_middleware, rate_limit_middleware, error_middleware
+
+try:
+    from config import ADMIN_ID
+except ImportError:
+    ADMIN_ID = os.getenv("TELEGRAM_ADMIN_ID")
+
+COMMAND_RATE = float(os.getenv("COMMAND_RATE", "1"))
+COMMAND_BURST = int(os.getenv("COMMAND_BURST", "5"))
 
 bot = None
+# every reply goes through the rate-limited outbound queue; submit() returns
+# immediately so a worker is never parked behind one chat's 1 msg/s limit
+outbox = OutboundDispatcher()
+
+# one router for every command set (main.py adds its own via register_commands)
+ADMIN_IDS = {str(ADMIN_ID)} if ADMIN_ID else set()
+router = CommandRouter(send=outbox.submit, bot_username=os.getenv("TELEGRAM_BOT_USERNAME"))
+router.use(error_middleware(router))
+router.use(rate_limit_middleware(router, COMMAND_RATE, COMMAND_BURST))
+router.use(auth_middleware(router, ADMIN_IDS))
 
 def init_bot_objects(b):
     global bot
     bot = b
 
-async def handle_text_command(bot, update: Update):
-    message = update.message
-    chat_id = message.chat.id
-    text = message.text.strip().lower()
-
-    if text == "/start":
-        await bot.send_message(chat_id, "👋 Welcome to IceGods Bot!\nUse /help to see commands.")
-    elif text == "/help":
-        await bot.send_message(chat_id, "📌 Commands:\n/start - Welcome\n/help - Command list\n/vip - Join VIP group")
-    elif text == "/vip":
-        await bot.send_message(chat_id, "💎 To access VIP, please subscribe.")
-    elif str(chat_id) == str(ADMIN_ID):
-        await bot.send_message(chat_id, "🔑 Hello Admin!")
+@router.command("start", description="Welcome")
+async def start(update, ctx):
+    outbox.submit(ctx.chat_id, "👋 Welcome to IceGods Bot!\nUse /help to see commands.")
+
+@router.command("help", description="Command list")
+async def help_cmd(update, ctx):
+    lines = [f"/{c.name} - {c.description}" for c in router.commands() if c.description and not c.admin]
+    outbox.submit(ctx.chat_id, "📌 Commands:\n" + "\n".join(lines))
+
+@router.command("vip", description="Join VIP group")
+async def vip(update, ctx):
+    outbox.submit(ctx.chat_id, "💎 To access VIP, please subscribe.")
+
+async def fallback(update, ctx):
+    if str(ctx.chat_id) in ADMIN_IDS:
+        outbox.submit(ctx.chat_id, "🔑 Hello Admin!")
     else:
-        await bot.send_message(chat_id, "🤖 Command not recognized. Use /help")
+        outbox.submit(ctx.chat_id, "🤖 Command not recognized. Use /help")
+
+router.fallback = fallback
+
+async def handle_text_command(bot, update):
+    if update.effective_message is None or update.effective_message.text is None:
+        return
+    await router.dispatch(bot, update)
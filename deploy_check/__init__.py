@@ -0,0 +1,4 @@
+"""Deployment readiness checks: env, modules, database, network and files, run concurrently."""
+
+from deploy_check.probes import Result, module_available
+from deploy_check.runner import main, run_checks
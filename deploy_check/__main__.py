@@ -0,0 +1,5 @@
+import sys
+
+from deploy_check import main
+
+sys.exit(main())
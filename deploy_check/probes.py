@@ -0,0 +1,177 @@
+# deploy_check/probes.py
+
+import asyncio
+import importlib.util
+import json
+import os
+import socket
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from functools import lru_cache
+
+NET_TIMEOUT = float(os.getenv("CHECK_NET_TIMEOUT", "5"))
+
+ENV_FILE = ".env"
+ENV_VARS = [
+    "TELEGRAM_BOT_TOKEN",
+    "TELEGRAM_ADMIN_ID",
+    "TELEGRAM_CHANNEL_ID",
+    "DATABASE_URL",
+    "WEBHOOK_URL",
+]
+MODULES = ["requests", "sqlalchemy", "aiohttp", "web3", "telegram", "dotenv"]
+FILES = ["app.py", "main.py", "bot.py", "bot_handlers.py", "requirements.txt",
+         "Dockerfile", "init_db.py", "start_icegods.py", "utils"]
+INTERNET_URL = "https://www.google.com"
+TELEGRAM_API = "https://api.telegram.org"
+
+# status is "ok", "warn" or "fail"
+Result = namedtuple("Result", "section name status detail")
+
+
+# ==========================
+# Helpers
+# ==========================
+@lru_cache(maxsize=None)
+def module_available(name):
+    # find_spec locates the module without importing it (telegram/web3 take seconds to import)
+    return importlib.util.find_spec(name) is not None
+
+
+def in_thread(fn, *args):
+    """Run a blocking call in a daemon thread; a probe cut off by the deadline
+    then can't hold up interpreter exit the way an executor thread would."""
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+
+    def deliver(result, error):
+        if not fut.done():
+            fut.set_exception(error) if error else fut.set_result(result)
+
+    def run():
+        try:
+            result, error = fn(*args), None
+        except BaseException as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(deliver, result, error)
+        except RuntimeError:
+            pass  # loop already closed: the deadline passed
+
+    threading.Thread(target=run, daemon=True).start()
+    return fut
+
+
+def http_get(url, timeout=NET_TIMEOUT):
+    req = urllib.request.Request(url, headers={"User-Agent": "ninja-deploy-check"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return resp.status, resp.read(65536)
+    except urllib.error.HTTPError as e:
+        return e.code, e.read(65536)
+
+
+def sqlite_path():
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith("sqlite:///"):
+        return url[len("sqlite:///"):]
+    return os.getenv("DATABASE_PATH", "subscriptions.db")
+
+
+# ==========================
+# Probes (each returns a list of Results)
+# ==========================
+async def check_env_file():
+    if not os.path.exists(ENV_FILE):
+        return [Result("env", ENV_FILE, "fail", "missing. Copy .env.example and fill required values.")]
+    if module_available("dotenv"):
+        from dotenv import load_dotenv
+        load_dotenv(ENV_FILE)
+    return [Result("env", ENV_FILE, "ok", "found and loaded")]
+
+
+def check_env_vars():
+    return [Result("env", var, "ok", "detected") if (os.getenv(var) or "").strip()
+            else Result("env", var, "fail", "missing or empty") for var in ENV_VARS]
+
+
+async def check_modules():
+    return [Result("modules", m, "ok", "Module found") if module_available(m)
+            else Result("modules", m, "fail", "Missing module") for m in MODULES]
+
+
+async def check_database():
+    url = os.getenv("DATABASE_URL", "")
+    if url and not url.startswith("sqlite:///"):
+        return [Result("database", url.split(":", 1)[0], "warn", "Non-SQLite database, manual check needed")]
+    path = sqlite_path()
+    if not os.path.exists(path):
+        return [Result("database", path, "fail", "Database file missing")]
+
+    def probe():
+        conn = sqlite3.connect(path, timeout=NET_TIMEOUT)
+        try:
+            return [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        finally:
+            conn.close()
+    try:
+        tables = await in_thread(probe)
+    except Exception as e:
+        return [Result("database", path, "fail", f"exists but cannot connect: {e}")]
+    return [Result("database", path, "ok", f"Database ready ({len(tables)} tables)")]
+
+
+async def check_port():
+    port = int(os.getenv("PORT", 5000))
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        try:
+            s.bind(("0.0.0.0", port))
+        except OSError:
+            return [Result("network", f"port {port}", "fail", "in use")]
+    return [Result("network", f"port {port}", "ok", "free")]
+
+
+async def check_internet():
+    try:
+        await in_thread(http_get, INTERNET_URL)
+    except Exception as e:
+        return [Result("network", "internet", "fail", f"Internet connection failed: {e}")]
+    return [Result("network", "internet", "ok", "Internet connection OK")]
+
+
+async def check_webhook():
+    webhook = os.getenv("WEBHOOK_URL")
+    if not webhook:
+        return [Result("network", "webhook", "fail", "Webhook URL not set")]
+    try:
+        status, _ = await in_thread(http_get, webhook)
+    except Exception as e:
+        return [Result("network", "webhook", "fail", f"unreachable → {webhook} ({e})")]
+    # the route only accepts POST, so a 405 on GET still proves it's reachable
+    return [Result("network", "webhook", "ok" if status < 500 else "warn", f"reachable → {webhook} [Status: {status}]")]
+
+
+async def check_telegram():
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        return [Result("network", "telegram", "fail", "TELEGRAM_BOT_TOKEN not set")]
+    try:
+        status, body = await in_thread(http_get, f"{TELEGRAM_API}/bot{token}/getMe")
+        data = json.loads(body)
+    except Exception as e:
+        return [Result("network", "telegram", "fail", f"Telegram bot connection failed: {e}")]
+    if not data.get("ok"):
+        return [Result("network", "telegram", "fail", f"Telegram rejected the token [Status: {status}]")]
+    return [Result("network", "telegram", "ok", f"Telegram bot connected → @{data['result'].get('username')}")]
+
+
+async def check_files():
+    return [Result("files", f, "ok", "Found") if os.path.exists(f) else Result("files", f, "fail", "Missing")
+            for f in FILES]
+
+
+# .env is loaded first (the other probes read the variables it sets); these then run concurrently
+PROBES = [check_modules, check_database, check_port, check_internet, check_webhook, check_telegram, check_files]
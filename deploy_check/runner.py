@@ -0,0 +1,79 @@
+# deploy_check/runner.py
+
+import argparse
+import asyncio
+import json
+import time
+
+from deploy_check import probes
+from deploy_check.probes import Result
+
+SECTIONS = [
+    ("env", "🌿 Checking environment variables..."),
+    ("modules", "📦 Checking Python modules..."),
+    ("database", "💾 Checking database..."),
+    ("network", "🌐 Checking network (port, internet, webhook, Telegram)..."),
+    ("files", "📁 Checking project files..."),
+]
+ICONS = {"ok": "✅", "warn": "⚠️", "fail": "❌"}
+
+
+async def run_checks(deadline=None):
+    """Run every probe concurrently; anything still running at ``deadline`` seconds fails."""
+    deadline = probes.NET_TIMEOUT + 1 if deadline is None else deadline
+    results = await probes.check_env_file()
+    results += probes.check_env_vars()
+    tasks = {asyncio.ensure_future(p()): p for p in probes.PROBES}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in tasks:
+        name = tasks[task].__name__[len("check_"):]
+        if task in pending:
+            task.cancel()
+            results.append(Result(section_of(name), name, "fail", f"timed out after {deadline:g}s"))
+        elif task.exception() is not None:
+            results.append(Result(section_of(name), name, "fail", f"check crashed: {task.exception()}"))
+        else:
+            results += task.result()
+    return results
+
+
+def section_of(probe_name):
+    return probe_name if probe_name in ("modules", "database", "files") else "network"
+
+
+def render_text(results, elapsed):
+    lines = ["🔍 NINJA-DASHBOARD BOT DEPLOYMENT CHECK"]
+    for section, title in SECTIONS:
+        rows = [r for r in results if r.section == section]
+        if rows:
+            lines.append("\n" + title)
+            lines += [f"{ICONS[r.status]} {r.name}: {r.detail}" for r in rows]
+    failed = sum(r.status == "fail" for r in results)
+    lines.append(f"\n🧩 DEPLOYMENT READINESS CHECK COMPLETE in {elapsed:.1f}s.")
+    if failed:
+        lines.append(f"⚠️ {failed} check(s) failed; fix them before deployment.")
+    else:
+        lines.append("💡 All checks passed, the bot is ready to host.")
+    return "\n".join(lines)
+
+
+def render_json(results, elapsed):
+    return json.dumps({
+        "ok": not any(r.status == "fail" for r in results),
+        "elapsed_s": round(elapsed, 3),
+        "checks": [r._asdict() for r in results],
+    }, indent=2)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Check that this host is ready to run the bot.")
+    ap.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of text")
+    ap.add_argument("--deadline", type=float, default=None,
+                    help=f"Give up on checks still running after this many seconds (default {probes.NET_TIMEOUT + 1:.0f})")
+    args = ap.parse_args(argv)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_checks(args.deadline))
+    elapsed = time.perf_counter() - start
+    print(render_json(results, elapsed) if args.json else render_text(results, elapsed))
+    return 1 if any(r.status == "fail" for r in results) else 0
@@ -1,153 +1,226 @@
 import os
-import json
 import time
-import requests
 from datetime import datetime
-from telegram import Update
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
-from utils.address_tracker import get_wallet_status
+from utils import startup
+
+startup.track_imports()
+
+from utils.address_tracker import get_portfolio_status
+from utils.subscription_db import SubscriptionRepository
+from utils.price_oracle import PriceOracle
+from utils.state_backend import open_backend
+from utils.http_client import client, name_upstream
+from utils.circuit_breaker import CircuitOpen
+from utils import metrics
+from utils.profiler import install_signal_toggle
+from utils.tx_verifier import TxVerifier
+from utils.payment_watcher import PaymentWatcher, issue_invoices
+from utils.send_queue import PRIORITY_NOTIFY
+from utils.broadcast import BroadcastEngine, describe
+from utils.expiry_sweeper import ExpirySweeper
+from bot_handlers import router, outbox
 from dotenv import load_dotenv
 
+# PTB is only needed once main() builds the Application
+telegram_error = startup.lazy_import("telegram.error")
+
 load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+TELEGRAM_BASE_URL = os.getenv("TELEGRAM_BASE_URL", "https://api.telegram.org/bot")
 WALLET_ETH = os.getenv("WALLET_ADDRESS_ETH")
 WALLET_SOL = os.getenv("WALLET_ADDRESS_SOL")
 OWNER_ID = int(os.getenv("OWNER_ID", "0"))
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY", "")
+CHANNEL_ID = os.getenv("TELEGRAM_CHANNEL_ID")
+VIP_GROUP = os.getenv("VIP_GROUP")
+PORTFOLIO = [WALLET_ETH, os.getenv("ETH_MAIN_WALLET"), os.getenv("ETH_BACKUP_WALLET"),
+             WALLET_SOL, os.getenv("SOL_MAIN_WALLET"), os.getenv("SOL_BACKUP_WALLET")]
 
 USERS_FILE = "users.json"
+DB_PATH = os.getenv("DATABASE_PATH", "subscriptions.db")
 WEEK_USD = 10.0
 MONTH_USD = 100.0
-COINGECKO_API = "https://api.coingecko.com/api/v3/simple/price?ids=ethereum%2Csolana&vs_currencies=usd"
+PLANS = (("month", 30, MONTH_USD), ("week", 7, WEEK_USD))
+COINGECKO_API = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3") + "/simple/price?ids=ethereum%2Csolana&vs_currencies=usd"
+PRICE_TTL = int(os.getenv("PRICE_TTL", "60"))
+PRICE_GRACE = int(os.getenv("PRICE_GRACE", "600"))
+# polling has no web server of its own; set a port to expose /metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
 
-def load_users():
-    try:
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    except:
-        return {}
+name_upstream(COINGECKO_API, "coingecko")
+
+repo = SubscriptionRepository(DB_PATH)
 
-def save_users(u): 
-    with open(USERS_FILE, "w") as f:
-        json.dump(u, f)
+def migrate_users_file():
+    # users.json predates the database; fold it in once and keep a backup
+    if os.path.exists(USERS_FILE):
+        n = repo.import_json(USERS_FILE)
+        os.replace(USERS_FILE, USERS_FILE + ".migrated")
+        print(f"✅ Migrated {n} users from {USERS_FILE} → {DB_PATH}")
 
 def now_ts(): return int(time.time())
 def expiry_from_now(days): return now_ts() + days * 24 * 3600
 
-def get_prices():
+async def fetch_prices():
+    r = await client.get_json(COINGECKO_API)
+    eth_p, sol_p = r.get("ethereum", {}).get("usd"), r.get("solana", {}).get("usd")
+    if not eth_p or not sol_p:
+        raise ValueError(f"Unexpected CoinGecko response: {r}")
+    return eth_p, sol_p
+
+# shared with any other bot process on this host, so CoinGecko sees one fetch per TTL
+prices = PriceOracle(fetch_prices, ttl=PRICE_TTL, grace=PRICE_GRACE, shared=open_backend())
+verifier = TxVerifier(repo, WALLET_ETH, WALLET_SOL, ETHERSCAN_API_KEY, PLANS)
+watcher = PaymentWatcher(repo, WALLET_ETH, WALLET_SOL, ETHERSCAN_API_KEY)
+broadcaster = BroadcastEngine(repo, outbox)
+sweeper = ExpirySweeper(repo)
+
+async def get_prices():
     try:
-        r = requests.get(COINGECKO_API, timeout=10).json()
-        return r.get("ethereum", {}).get("usd"), r.get("solana", {}).get("usd")
-    except:
+        return await prices.get()
+    except Exception as e:
+        metrics.ERRORS.inc(where="prices")
+        print("❌ Price fetch failed:", e)
         return None, None
 
-def check_eth_tx(tx, required):
-    if not ETHERSCAN_API_KEY:
-        return False, "Add ETHERSCAN_API_KEY to .env"
-    url = f"https://api.etherscan.io/api?module=proxy&action=eth_getTransactionByHash&txhash={tx}&apikey={ETHERSCAN_API_KEY}"
-    r = requests.get(url, timeout=10).json().get("result")
-    if not r: return False, "TX not found."
-    val = int(r.get("value","0"),16)/1e18
-    return (r.get("to","").lower()==WALLET_ETH.lower() and val>=required), f"Value {val} ETH"
-
-def check_sol_tx(tx, required):
-    url="https://api.mainnet-beta.solana.com"
-    payload={"jsonrpc":"2.0","id":1,"method":"getTransaction","params":[tx,"jsonParsed"]}
-    r = requests.post(url,json=payload,timeout=10).json().get("result")
-    if not r: return False, "TX not found."
-    for instr in r.get("transaction",{}).get("message",{}).get("instructions",[]):
-        p=instr.get("parsed")
-        if p and p.get("type")=="transfer":
-            i=p.get("info",{})
-            if i.get("destination")==WALLET_SOL and int(i.get("lamports",0))/1e9>=required:
-                return True, None
-    return False, "Invalid SOL transfer"
-
 def add_sub(uid, days):
-    u = load_users()
-    exp = u.get(str(uid),0)
-    new = (exp if exp>now_ts() else now_ts()) + days*86400
-    u[str(uid)] = new
-    save_users(u)
-    return new
+    return repo.extend(uid, days, now=now_ts())
 
 def has_sub(uid):
-    exp=load_users().get(str(uid),0)
+    exp=repo.get_expiry(uid)
     return exp if exp>now_ts() else 0
 
+async def reply(update, text):
+    # queued behind Telegram's global/per-chat limits; replies outrank broadcasts
+    outbox.submit(update.effective_chat.id, text)
+
 async def start(update, ctx):
-    await update.message.reply_text("Welcome to ICEGODS Bot. Use /subscribe /confirm <tx> /status /wallet")
+    await reply(update, "Welcome to ICEGODS Bot. Use /subscribe /confirm <tx> /status /wallet")
 
 async def status(update, ctx):
     exp=has_sub(update.effective_user.id)
-    if exp: await update.message.reply_text("Active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d %H:%M UTC"))
-    else: await update.message.reply_text("Not subscribed. Use /subscribe")
+    if exp: await reply(update, "Active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d %H:%M UTC"))
+    else: await reply(update, "Not subscribed. Use /subscribe")
 
 async def subscribe(update, ctx):
-    eth_p, sol_p = get_prices()
+    eth_p, sol_p = await get_prices()
     if not eth_p:
-        return await update.message.reply_text("Price fetch failed.")
-    e_w=10/eth_p; e_m=100/eth_p; s_w=10/sol_p; s_m=100/sol_p
-    await update.message.reply_text(f"Weekly: {e_w:.6f} ETH or {s_w:.6f} SOL\nMonthly: {e_m:.6f} ETH or {s_m:.6f} SOL\nThen /confirm <tx>")
+        return await reply(update, "Price fetch failed.")
+    inv=issue_invoices(repo, update.effective_user.id, eth_p, sol_p, PLANS)
+    w, m = inv["week"], inv["month"]
+    await reply(update,
+        f"Weekly: {w['eth']} ETH or {w['sol']} SOL\nMonthly: {m['eth']} ETH or {m['sol']} SOL\n"
+        "Send the exact amount and your subscription activates automatically, or use /confirm <tx>")
 
 async def confirm(update, ctx):
     uid=update.effective_user.id
-    if not ctx.args: return await update.message.reply_text("Use /confirm <txhash>")
-    tx=ctx.args[0]
-    eth_p, sol_p=get_prices()
-    e_w, e_m = 10/eth_p, 100/eth_p
-    s_w, s_m = 10/sol_p, 100/sol_p
-    if tx.startswith("0x"):
-        ok, err = check_eth_tx(tx, e_w)
-        if ok:
-            exp=add_sub(uid,7)
-            return await update.message.reply_text("Week sub active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d"))
-        ok, err = check_eth_tx(tx,e_m)
-        if ok:
-            exp=add_sub(uid,30)
-            return await update.message.reply_text("Month sub active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d"))
-        return await update.message.reply_text("ETH confirm error: "+err)
-    ok, err = check_sol_tx(tx, s_w)
-    if ok:
-        exp=add_sub(uid,7)
-        return await update.message.reply_text("Week sub active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d"))
-    ok, err = check_sol_tx(tx,s_m)
-    if ok:
-        exp=add_sub(uid,30)
-        return await update.message.reply_text("Month sub active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d"))
-    await update.message.reply_text("SOL confirm error: "+err)
+    eth_p, sol_p=await get_prices()
+    if not eth_p:
+        return await reply(update, "Price fetch failed.")
+    try:
+        res=await verifier.verify(uid, ctx.params["txhash"], (eth_p, sol_p))
+    except CircuitOpen as e:
+        # the upstream is known to be down: answer now instead of waiting out a timeout
+        return await reply(update, f"⚠️ Payment lookups are unavailable right now ({e.upstream}), try again in {max(1, round(e.retry_in))}s.")
+    except Exception as e:
+        metrics.ERRORS.inc(where="/confirm")
+        print("❌ Confirm lookup failed:", e)
+        return await reply(update, "Could not reach the blockchain API, try again shortly.")
+    if not res.ok:
+        return await reply(update, res.message)
+    label="Week" if res.plan=="week" else "Month"
+    await reply(update, f"{label} sub active until "+datetime.utcfromtimestamp(res.expires_at).strftime("%Y-%m-%d"))
 
 async def wallet(update, ctx):
     if not has_sub(update.effective_user.id):
-        return await update.message.reply_text("Subscribe first.")
-    await update.message.reply_text(get_wallet_status(WALLET_ETH))
+        return await reply(update, "Subscribe first.")
+    await reply(update, await get_portfolio_status(PORTFOLIO))
 
 async def list_subs(update, ctx):
-    if update.effective_user.id!=OWNER_ID:
-        return await update.message.reply_text("No")
-    u=load_users()
-    msg="\n".join(f"{k}: {datetime.utcfromtimestamp(v)}" for k,v in u.items())
-    await update.message.reply_text(msg or "No subs.")
+    msg="\n".join(f"{k}: {datetime.utcfromtimestamp(v)}" for k,v in repo.items())
+    await reply(update, msg or "No subs.")
 
 async def revoke(update, ctx):
-    if update.effective_user.id!=OWNER_ID:
-        return await update.message.reply_text("No")
-    if not ctx.args: return await update.message.reply_text("Use /revoke <user_id>")
-    u=load_users()
-    u.pop(ctx.args[0],None)
-    save_users(u)
-    await update.message.reply_text("Removed.")
+    repo.remove(ctx.params["user_id"])
+    await reply(update, "Removed.")
+
+async def broadcast(update, ctx):
+    chat_id=update.effective_chat.id
+    async def done(job):
+        outbox.submit(chat_id, describe(job))
+    try:
+        job=broadcaster.start(ctx.params["message"], (CHANNEL_ID, VIP_GROUP), on_done=done)
+    except RuntimeError as e:
+        return await reply(update, str(e))
+    await reply(update, f"📣 Broadcast {job['id']} started.")
+
+async def broadcast_status(update, ctx):
+    await reply(update, describe(broadcaster.load()))
+
+def register_commands(router):
+    # owner-only, as before the router: TELEGRAM_ADMIN_ID doesn't get these
+    owner = {str(OWNER_ID)} if OWNER_ID else set()
+    router.register("start", start, replace=True, description="Welcome")
+    router.register("subscribe", subscribe, description="Get payment amounts")
+    router.register("confirm", confirm, "txhash", description="Confirm a payment by tx hash")
+    router.register("status", status, description="Subscription status")
+    router.register("wallet", wallet, description="Portfolio (subscribers)")
+    router.register("list_subs", list_subs, admins=owner)
+    router.register("revoke", revoke, "user_id", admins=owner)
+    router.register("broadcast", broadcast, "message:text", admins=owner)
+    router.register("broadcast_status", broadcast_status, admins=owner)
+
+async def on_command(update, context):
+    await router.dispatch(context.bot, update)
+
+async def on_startup(app):
+    router.bot_username = router.bot_username or app.bot.username
+    outbox.start(app.bot)
+    async def notify_paid(uid, plan, exp):
+        label="Week" if plan=="week" else "Month"
+        outbox.submit(int(uid), f"✅ Payment received. {label} sub active until "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d"), PRIORITY_NOTIFY)
+    watcher.on_paid=notify_paid
+    watcher.start()
+    async def broadcast_done(job):
+        if OWNER_ID: outbox.submit(OWNER_ID, describe(job))
+    broadcaster.resume(on_done=broadcast_done)
+    async def remind(uid, exp):
+        outbox.submit(int(uid), "⏰ Your subscription ends "+datetime.utcfromtimestamp(exp).strftime("%Y-%m-%d %H:%M UTC")+". Use /subscribe to renew.", PRIORITY_NOTIFY)
+    async def expire(uid, exp):
+        if VIP_GROUP:
+            try:
+                # ban+unban removes them without blocking a later rejoin
+                await app.bot.ban_chat_member(VIP_GROUP, int(uid))
+                await app.bot.unban_chat_member(VIP_GROUP, int(uid), only_if_banned=True)
+            except (telegram_error.BadRequest, telegram_error.Forbidden) as e:
+                print(f"⚠️ Could not remove {uid} from VIP:", e)
+        outbox.submit(int(uid), "Your subscription has expired. Use /subscribe to renew.", PRIORITY_NOTIFY)
+    sweeper.on_remind, sweeper.on_expire = remind, expire
+    sweeper.start()
+    if METRICS_PORT:
+        app.bot_data["metrics_server"] = await metrics.serve("0.0.0.0", METRICS_PORT)
+    startup.report("Polling bot")
+
+async def on_shutdown(app):
+    await watcher.stop()
+    await sweeper.stop()
+    await broadcaster.stop()
+    await outbox.stop()
+    if "metrics_server" in app.bot_data:
+        await app.bot_data["metrics_server"].cleanup()
+    await client.close()
 
 def main():
-    app=ApplicationBuilder().token(BOT_TOKEN).build()
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("subscribe", subscribe))
-    app.add_handler(CommandHandler("confirm", confirm))
-    app.add_handler(CommandHandler("status", status))
-    app.add_handler(CommandHandler("wallet", wallet))
-    app.add_handler(CommandHandler("list_subs", list_subs))
-    app.add_handler(CommandHandler("revoke", revoke))
+    from telegram.ext import ApplicationBuilder, MessageHandler, filters
+    migrate_users_file()
+    # kill -USR2 <pid> toggles the sampling profiler
+    install_signal_toggle()
+    app=(ApplicationBuilder().token(BOT_TOKEN).base_url(TELEGRAM_BASE_URL)
+         .post_init(on_startup).post_shutdown(on_shutdown).build())
+    register_commands(router)
+    # one handler; the router does the per-command dispatch
+    app.add_handler(MessageHandler(filters.COMMAND, on_command))
     print("Bot running")
     app.run_polling()
 
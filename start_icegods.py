@@ -1,9 +1,9 @@
 import os
 import asyncio
-from app import app, bot
-from telegram import Bot
+from app import app, bot_ready, get_bot, configure_worker, WEB_PROCESSES
+from utils import prefork
 from dotenv import load_dotenv
-import sqlite3
+from utils.subscription_db import SubscriptionRepository
 
 load_dotenv()
 
@@ -14,31 +14,35 @@ WEBHOOK_URL = os.getenv("WEBHOOK_URL")
 def check_database():
     if not os.path.exists(DB_PATH):
         print(f"⚠️ DB missing. Creating {DB_PATH}...")
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute("""CREATE TABLE IF NOT EXISTS subscriptions (
-                          id INTEGER PRIMARY KEY AUTOINCREMENT,
-                          user_id TEXT NOT NULL,
-                          plan TEXT NOT NULL
-                          );""")
-        conn.commit()
-        conn.close()
+        SubscriptionRepository(DB_PATH).close()
         print("✅ DB created.")
     else:
+        # existing databases get the expires_at column and indexes added
+        SubscriptionRepository(DB_PATH).close()
         print(f"✅ Database exists → {DB_PATH}")
 
 async def set_webhook():
+    # the shared bot initializes in the background after the server is up
+    await bot_ready.wait()
     try:
-        await bot.set_webhook(WEBHOOK_URL)
+        await get_bot().set_webhook(WEBHOOK_URL)
         print(f"✅ Webhook set → {WEBHOOK_URL}")
     except Exception as e:
         print(f"⚠️ Failed to set webhook: {e}")
 
+async def schedule_set_webhook(app):
+    app["set_webhook"] = asyncio.ensure_future(set_webhook())
+
+def on_worker(index):
+    configure_worker(index)
+    # one setWebhook per deployment, not one per worker
+    if index == 0:
+        app.on_startup.append(schedule_set_webhook)
+
 def main():
     check_database()
-    asyncio.run(set_webhook())
-    print(f"🚀 Launching Flask app on port {PORT}...")
-    app.run(host="0.0.0.0", port=PORT)
+    print(f"🚀 Launching webhook server on port {PORT}...")
+    prefork.serve(app, "0.0.0.0", PORT, WEB_PROCESSES, on_worker=on_worker)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,85 @@
+"""
+Router replies go through the outbound queue without holding up dispatch.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.command_router import CommandRouter, auth_middleware, error_middleware, rate_limit_middleware  # noqa: E402
+
+
+def update(text, chat_id=42):
+    message = SimpleNamespace(text=text, chat=SimpleNamespace(id=chat_id))
+    return SimpleNamespace(effective_message=message, effective_user=SimpleNamespace(id=chat_id))
+
+
+def test_router_replies_do_not_wait_for_the_send():
+    async def main():
+        sent = []
+        loop = asyncio.get_running_loop()
+
+        def submit(chat_id, text):
+            # like OutboundDispatcher.submit: queued now, resolved (here: failed) much later
+            sent.append(text)
+            fut = loop.create_future()
+            loop.call_later(60, fut.set_exception, RuntimeError("send failed"))
+            return fut
+
+        router = CommandRouter(send=submit)
+        router.use(error_middleware(router))
+        router.use(rate_limit_middleware(router, rate=0.001, burst=1))
+
+        @router.command("pay", schema="tx")
+        async def pay(update, ctx):
+            raise RuntimeError("boom")
+
+        # usage reply, error reply, then the rate-limit reply: none of them block
+        for text in ("/pay", "/pay 0xabc", "/pay 0xdef"):
+            assert await asyncio.wait_for(router.dispatch(None, update(text)), 1)
+        assert sent == ["Use /pay <tx>", "⚠️ Something went wrong, try again shortly.", "⏳ Slow down a little."]
+
+    asyncio.run(main())
+
+
+def test_coroutine_send_is_awaited():
+    async def main():
+        sent = []
+
+        async def send(chat_id, text):
+            sent.append((chat_id, text))
+
+        router = CommandRouter(send=send)
+        router.register("need", lambda update, ctx: None, schema="x")
+        await router.dispatch(None, update("/need", chat_id=7))
+        assert sent == [(7, "Use /need <x>")]
+
+    asyncio.run(main())
+
+
+def test_command_admins_override_the_router_admins():
+    async def main():
+        sent = []
+
+        async def send(chat_id, text):
+            sent.append((chat_id, text))
+
+        async def handler(update, ctx):
+            sent.append((ctx.chat_id, "ran"))
+
+        router = CommandRouter(send=send)
+        router.use(auth_middleware(router, {"1"}))
+        router.register("revoke", handler, admins={"2"})
+        router.register("nobody", handler, admins=set())
+        await router.dispatch(None, update("/revoke", chat_id=1))  # a router admin, not the owner
+        await router.dispatch(None, update("/revoke", chat_id=2))
+        await router.dispatch(None, update("/nobody", chat_id=1))
+        assert sent == [(1, "No"), (2, "ran"), (1, "No")]
+
+    asyncio.run(main())
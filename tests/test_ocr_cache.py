@@ -0,0 +1,42 @@
+"""
+OCR cache eviction.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.ocr_cache import OcrCache  # noqa: E402
+
+
+def write_image(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_evict_drops_files_once_no_variant_is_left(tmp_path):
+    db = str(tmp_path / "cache.db")
+    a = write_image(tmp_path, "a.png", b"a")
+    b = write_image(tmp_path, "b.png", b"b")
+
+    raw = OcrCache(db, variant="raw")
+    for path in (a, b):
+        assert raw.get(path) is None
+        raw.put(path, "text " + path, [], "s1")
+    raw.close()
+
+    # a second variant of a, used last; max_entries=1 keeps only that one
+    tiled = OcrCache(db, max_entries=1, variant="w1600")
+    assert tiled.get(a) is None
+    tiled.put(a, "tiled", [], "s1")
+    assert tiled.evict() == 2
+    files = [r[0] for r in tiled.conn.execute("SELECT path FROM files")]
+    assert files == [a]
+    assert tiled.get(a)[1] == "tiled"
+    tiled.close()
+
@@ -0,0 +1,81 @@
+"""
+PriceOracle against a local CoinGecko stub (benchmarks/stubs.py) over real HTTP.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.stubs import PRICES, CoinGeckoStub  # noqa: E402
+from utils.http_client import HttpClient, HttpError  # noqa: E402
+from utils.price_oracle import PriceOracle  # noqa: E402
+
+
+def run_with_stub(test, latency=0.0, **oracle_kwargs):
+    """Start the stub, build an oracle that fetches from it and run ``test(stub, oracle)``."""
+    async def main():
+        stub = await CoinGeckoStub(latency=latency).start()
+        http = HttpClient(timeout=5, retries=0)
+
+        async def fetch():
+            return await http.get_json(stub.url + "/api/v3/simple/price")
+
+        try:
+            await test(stub, PriceOracle(fetch, **oracle_kwargs))
+        finally:
+            await http.close()
+            await stub.stop()
+    asyncio.run(main())
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def test(stub, oracle):
+        values = await asyncio.gather(*(oracle.get() for _ in range(50)))
+        assert all(v == PRICES for v in values)
+        assert stub.requests == 1
+        assert oracle.misses == 50 and oracle.refreshes == 1
+
+    run_with_stub(test, latency=0.1, ttl=60)
+
+
+def test_hit_near_expiry_refreshes_in_background():
+    async def test(stub, oracle):
+        await oracle.get()
+        await oracle.get()
+        assert stub.requests == 1  # fresh hit, outside the refresh window
+
+        await asyncio.sleep(0.7)  # inside the last 0.4s of the 1s TTL
+        assert await oracle.get() == PRICES
+        assert oracle.misses == 1  # still served from cache...
+        await asyncio.sleep(0.1)
+        assert stub.requests == 2  # ...while a refresh went out
+        assert oracle.stats()["age"] < 0.2
+
+        await asyncio.sleep(0.4)  # past the original expiry, but the refreshed value is fresh
+        await oracle.get()
+        assert oracle.misses == 1
+
+    run_with_stub(test, ttl=1.0, refresh_ahead=0.4)
+
+
+def test_serves_stale_within_grace_when_upstream_fails():
+    async def test(stub, oracle):
+        assert await oracle.get() == PRICES
+        stub.failure_rate = 1.0
+        await asyncio.sleep(0.25)  # expired, inside grace
+
+        assert await oracle.get() == PRICES
+        assert oracle.stale_served == 1 and oracle.errors == 1
+
+        await asyncio.sleep(0.4)  # past ttl + grace
+        with pytest.raises(HttpError):
+            await oracle.get()
+
+    run_with_stub(test, ttl=0.2, grace=0.3, refresh_ahead=0)
@@ -0,0 +1,40 @@
+"""
+OutboundDispatcher pacing.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.send_queue import OutboundDispatcher  # noqa: E402
+
+
+class Bot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, time.monotonic()))
+        return text
+
+
+def test_chat_limit_holds_while_workers_wait_on_the_global_bucket():
+    async def main():
+        bot = Bot()
+        outbox = OutboundDispatcher(global_rate=20, chat_rate=2, workers=4)
+        outbox.start(bot)
+        # "a" takes the global token, so both "b" messages reach the global
+        # bucket's wait together
+        await asyncio.gather(outbox.send("a", "a1"), outbox.send("b", "b1"), outbox.send("b", "b2"))
+        await outbox.stop()
+        b = [(text, at) for chat, text, at in bot.sent if chat == "b"]
+        assert [text for text, _ in b] == ["b1", "b2"]
+        assert b[1][1] - b[0][1] >= 0.45  # 2 msgs/s per chat
+
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+JSON-RPC batching against a local Solana stub (benchmarks/stubs.py).
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.stubs import SOL_BALANCE_LAMPORTS, SolanaStub  # noqa: E402
+from utils.http_client import client  # noqa: E402
+from utils.solana_rpc import RpcError, SolanaRpc  # noqa: E402
+
+
+def run_with_stub(test, latency=0.0, omit=(), **rpc_kwargs):
+    """Start the stub, point a SolanaRpc at it and run ``test(stub, rpc)``."""
+    async def main():
+        stub = await SolanaStub(latency=latency, omit=omit).start()
+        try:
+            await test(stub, SolanaRpc(stub.url + "/", fallbacks=(), **rpc_kwargs))
+        finally:
+            await client.close()
+            await stub.stop()
+    asyncio.run(main())
+
+
+def test_concurrent_calls_go_out_as_one_post():
+    async def test(stub, rpc):
+        start = time.perf_counter()
+        balances = await asyncio.gather(*(rpc.get_balance(f"addr{i}") for i in range(50)))
+        elapsed = time.perf_counter() - start
+        assert balances == [SOL_BALANCE_LAMPORTS] * 50
+        assert stub.requests == 1 and rpc.stats() == {"calls": 50, "requests": 1}
+        assert elapsed < 0.3  # one 0.1s round trip, not fifty
+
+    run_with_stub(test, latency=0.1)
+
+
+def test_full_batches_are_sent_without_waiting():
+    async def test(stub, rpc):
+        await asyncio.gather(*(rpc.get_balance("addr") for _ in range(250)))
+        assert stub.requests == 3  # 100 + 100 + 50
+
+    run_with_stub(test, max_batch=100)
+
+
+def test_errors_go_to_their_own_caller():
+    async def test(stub, rpc):
+        ok, bad, also_ok = await asyncio.gather(
+            rpc.get_balance("a"), rpc.call("noSuchMethod"), rpc.get_balance("b"), return_exceptions=True)
+        assert ok == also_ok == SOL_BALANCE_LAMPORTS
+        assert isinstance(bad, RpcError) and bad.error["code"] == -32601
+        assert stub.requests == 1
+
+    run_with_stub(test)
+
+
+def test_missing_response_fails_only_that_call():
+    async def test(stub, rpc):
+        balance, sigs = await asyncio.gather(
+            rpc.get_balance("a"), rpc.get_signatures_for_address("a"), return_exceptions=True)
+        assert balance == SOL_BALANCE_LAMPORTS
+        assert isinstance(sigs, RpcError) and "no response for request" in str(sigs)
+
+    run_with_stub(test, omit={"getSignaturesForAddress"})
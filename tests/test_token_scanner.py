@@ -0,0 +1,33 @@
+"""
+The token scanner reports what one finditer per pattern used to.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.bench_find_tokens import legacy_find_tokens, make_dump  # noqa: E402
+from utils.token_scanner import find_tokens, find_tokens_chunked  # noqa: E402
+
+ADDRESS = "0x" + "ab12" * 10
+TX = "0x" + "cd34" * 16
+
+
+def test_tokens_nested_in_urls_are_reported():
+    text = (f"see https://etherscan.io/address/{ADDRESS} and\n"
+            f"https://etherscan.io/tx/{TX}, paid to {ADDRESS}")
+    tokens = find_tokens(text)
+    assert ("Ethereum (0x) Address", ADDRESS) in tokens
+    assert ("URL", f"https://etherscan.io/address/{ADDRESS}") in tokens
+    assert tokens == legacy_find_tokens(text)
+
+
+def test_matches_the_six_pass_scan_on_a_dump():
+    text = make_dump(200_000, seed=7)
+    tokens = find_tokens(text)
+    assert tokens == legacy_find_tokens(text)
+    assert find_tokens_chunked(text[i:i + 4096] for i in range(0, len(text), 4096)) == tokens
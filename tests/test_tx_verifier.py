@@ -0,0 +1,107 @@
+"""
+Payment decoding: only settled transfers to the configured wallet count.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmarks.stubs import EtherscanStub  # noqa: E402
+from utils import tx_verifier  # noqa: E402
+from utils.http_client import client  # noqa: E402
+from utils.subscription_db import SubscriptionRepository  # noqa: E402
+from utils.tx_verifier import TxVerifier, _eth_transfer, decode_sol_transfer  # noqa: E402
+
+WALLET_SOL = "So1ana1111111111111111111111111111111111112"
+WALLET_ETH = "0x" + "ab" * 20
+TX = "0x" + "12" * 32
+
+
+def sol_tx(*instructions, err=None):
+    return {"meta": {"err": err}, "transaction": {"message": {"instructions": list(instructions)}}}
+
+
+def transfer(program="system", destination=WALLET_SOL, lamports=10**9):
+    return {"program": program, "parsed": {"type": "transfer", "info": {
+        "source": "payer", "destination": destination, "lamports": lamports}}}
+
+
+def test_sol_transfer_to_wallet():
+    t = decode_sol_transfer("sig", sol_tx(transfer(), transfer(lamports=5 * 10**8)), WALLET_SOL)
+    assert t.recipient == WALLET_SOL and t.amount == 1.5 and t.status == "ok"
+
+
+def test_sol_failed_tx_is_not_settled():
+    t = decode_sol_transfer("sig", sol_tx(transfer(), err={"InstructionError": [1, "Custom"]}), WALLET_SOL)
+    assert t.status == "failed"
+
+
+def test_sol_ignores_spl_transfers():
+    t = decode_sol_transfer("sig", sol_tx(transfer(program="spl-token")), WALLET_SOL)
+    assert t.recipient is None and t.amount == 0
+
+
+def test_eth_pending_and_reverted():
+    tx = {"hash": TX, "to": WALLET_ETH, "value": hex(10**18), "blockNumber": None}
+    assert _eth_transfer(TX, tx, None).status == "pending"
+
+    mined = dict(tx, blockNumber="0x10")
+    assert _eth_transfer(TX, mined, {"blockNumber": "0x10", "status": "0x0"}).status == "failed"
+    ok = _eth_transfer(TX, mined, {"blockNumber": "0x10", "status": "0x1"})
+    assert ok.status == "ok" and ok.recipient == WALLET_ETH and ok.amount == 1.0
+
+
+def test_eth_refused_without_a_wallet(tmp_path):
+    repo = SubscriptionRepository(str(tmp_path / "subs.db"))
+    verifier = TxVerifier(repo, "", WALLET_SOL, "key")
+    # a contract creation has no "to"; with no wallet configured it must not match
+    result = asyncio.run(verifier.verify(1, TX, (3000.0, 150.0)))
+    assert not result.ok and "WALLET_ADDRESS_ETH" in result.message
+    repo.close()
+
+
+class Node:
+    """Stands in for ``eth_rpc``: every lookup finds a mined 0.1 ETH payment."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def call(self, method, params):
+        self.calls.append(method)
+        if method == "eth_getTransactionReceipt":
+            return {"blockNumber": "0x10", "status": "0x1"}
+        return {"hash": params[0], "to": WALLET_ETH, "value": hex(10**17), "blockNumber": "0x10"}
+
+
+def fetch_from_rate_limited_etherscan(monkeypatch, node):
+    monkeypatch.setattr(tx_verifier, "eth_rpc", node)
+
+    async def main():
+        stub = await EtherscanStub(WALLET_ETH, rate_limited=True).start()
+        monkeypatch.setattr(tx_verifier, "ETHERSCAN_API", stub.url + "/api")
+        try:
+            return await TxVerifier(None, WALLET_ETH, WALLET_SOL, "key").fetch_eth(TX)
+        finally:
+            await client.close()
+            await stub.stop()
+    return asyncio.run(main())
+
+
+def test_etherscan_rate_limit_falls_back_to_the_node(monkeypatch):
+    node = Node()
+    t = fetch_from_rate_limited_etherscan(monkeypatch, node)
+    assert sorted(node.calls) == ["eth_getTransactionByHash", "eth_getTransactionReceipt"]
+    assert t.status == "ok" and t.recipient == WALLET_ETH and t.amount == 0.1
+
+
+def test_etherscan_rate_limit_without_a_node_is_an_error(monkeypatch):
+    # not "TX not found": the lookup never happened
+    with pytest.raises(RuntimeError, match="Max rate limit reached"):
+        fetch_from_rate_limited_etherscan(monkeypatch, None)
@@ -0,0 +1,113 @@
+"""
+Webhook redelivery dedup and per-chat dispatch.
+
+Run from the repo root:
+    python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils.update_dedup import UpdateDeduplicator  # noqa: E402
+from utils.update_queue import UpdateQueue  # noqa: E402
+
+
+class State(dict):
+    def get_state(self, key, default=None):
+        return self.get(key, default)
+
+    def set_state(self, key, value):
+        self[key] = str(value)
+
+
+def test_redelivery_and_restart_mark():
+    state = State()
+    dedup = UpdateDeduplicator(state)
+    assert not dedup.is_duplicate(500)
+    dedup.queued(500)
+    assert dedup.is_duplicate(500)
+    dedup.persist()
+
+    restarted = UpdateDeduplicator(state)
+    assert restarted.is_duplicate(500)
+    assert not restarted.is_duplicate(501)
+
+
+def test_rejected_update_is_accepted_after_restart():
+    state = State()
+    dedup = UpdateDeduplicator(state)
+    assert not dedup.is_duplicate(500)
+    dedup.queued(500)
+    # 501 is answered with a 503 (queue full) and never queued
+    assert not dedup.is_duplicate(501)
+    dedup.forget(501)
+    dedup.persist()
+
+    restarted = UpdateDeduplicator(state)
+    assert not restarted.is_duplicate(501)  # Telegram's redelivery
+    assert restarted.is_duplicate(500)
+
+
+def test_old_mark_is_ignored_after_restart():
+    # saved two days ago; Telegram may have restarted the ids since
+    state = State({"webhook:update_high_water": f"900000:{time.time() - 2 * 86400:.0f}"})
+    dedup = UpdateDeduplicator(state)
+    assert not dedup.is_duplicate(1234)
+
+
+def test_quiet_period_resets_the_sequence():
+    dedup = UpdateDeduplicator(max_age=60)
+    assert not dedup.is_duplicate(900_000)
+    dedup.queued(900_000)
+    assert dedup.is_duplicate(1234)  # too soon for a reset: stale
+
+    dedup.last_accepted_at -= 61
+    assert not dedup.is_duplicate(1234)
+    assert dedup.is_duplicate(1234)
+    assert not dedup.is_duplicate(1235)
+    assert dedup.stats()["sequence_resets"] == 1
+
+
+def test_busy_chat_does_not_hold_every_worker():
+    async def main():
+        handled = []
+
+        async def handler(update):
+            await asyncio.sleep(0.02)
+            handled.append((update["chat"], update["n"]))
+
+        queue = UpdateQueue(handler, workers=4, maxsize=100, key=lambda u: u["chat"])
+        queue.start()
+        for n in range(20):
+            assert queue.put_nowait({"chat": "spam", "n": n})
+        assert queue.put_nowait({"chat": "other", "n": 0})
+        await asyncio.sleep(0.1)
+        # the other chat ran while the burst was still going, on a free worker
+        assert ("other", 0) in handled
+        await queue.stop()
+        assert [n for chat, n in handled if chat == "spam"] == list(range(20))
+        assert queue.backlogged == 0 and queue.active_keys() == 0
+
+    asyncio.run(main())
+
+
+def test_backlog_counts_towards_capacity():
+    async def main():
+        async def handler(update):
+            await asyncio.sleep(0.05)
+
+        queue = UpdateQueue(handler, workers=4, maxsize=4, key=lambda u: u["chat"])
+        queue.start()
+        for n in range(4):
+            assert queue.put_nowait({"chat": 1, "n": n})
+        await asyncio.sleep(0)  # one runs, the other three wait in the chat's backlog
+        assert queue.queue.qsize() == 0 and queue.backlogged == 3
+        assert queue.put_nowait({"chat": 1, "n": 4})
+        assert not queue.put_nowait({"chat": 1, "n": 5})
+        await queue.stop()
+
+    asyncio.run(main())
@@ -1,44 +1,143 @@
 # utils/address_tracker.py
 
-import requests
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
+from utils import metrics
+from utils.http_client import client, UPSTREAM_ERRORS
+from utils.solana_rpc import solana
+from utils.eth_rpc import eth_rpc
+from utils.tx_verifier import ETHERSCAN_API
 
 load_dotenv()
 
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY")
+BALANCE_TTL = float(os.getenv("BALANCE_TTL", "30"))
+ETH_BATCH = 20    # balancemulti limit
+SOL_BATCH = 100   # getMultipleAccounts limit
 
-def get_wallet_status(wallet_address):
+# address -> (fetched_at, balance in ETH/SOL)
+_cache = {}
+# address -> in-flight task fetching the chunk that contains it
+_inflight = {}
+
+
+def chain_of(wallet_address):
     if wallet_address.startswith("0x"):  # Ethereum wallet
-        if not ETHERSCAN_API_KEY:
-            return "Missing ETHERSCAN_API_KEY in .env file."
+        return "eth"
+    if len(wallet_address) > 30:  # Likely Solana
+        return "sol"
+    return None
 
-        url = f"https://api.etherscan.io/api?module=account&action=balance&address={wallet_address}&tag=latest&apikey={ETHERSCAN_API_KEY}"
-        try:
-            response = requests.get(url)
-            data = response.json()
-            if data["status"] == "1":
-                return f"ETH Balance: {int(data['result']) / 10**18:.4f} ETH"
-            else:
-                return f"Error: {data.get('message', 'Failed to fetch ETH balance.')}"
-        except Exception as e:
-            return f"Error fetching ETH balance: {str(e)}"
-
-    elif len(wallet_address) > 30:  # Likely Solana
-        url = f"https://api.mainnet-beta.solana.com"
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getBalance",
-            "params": [wallet_address]
-        }
-        headers = {"Content-Type": "application/json"}
+
+async def _fetch_eth(addresses):
+    if not ETHERSCAN_API_KEY:
+        return await eth_rpc.get_balances(addresses)
+    try:
+        data = await client.get_json(ETHERSCAN_API, params={
+            "module": "account", "action": "balancemulti", "address": ",".join(addresses),
+            "tag": "latest", "apikey": ETHERSCAN_API_KEY,
+        })
+    except UPSTREAM_ERRORS:
+        if eth_rpc is None:
+            raise
+        return await eth_rpc.get_balances(addresses)
+    if data.get("status") != "1":
+        if eth_rpc is not None:
+            # Etherscan answers rate limits with a 200 and status "0"
+            return await eth_rpc.get_balances(addresses)
+        raise RuntimeError(data.get("message", "Failed to fetch ETH balance."))
+    return {row["account"].lower(): int(row["balance"]) / 10**18 for row in data["result"]}
+
+
+async def _fetch_sol(addresses):
+    res = await solana.call("getMultipleAccounts", [addresses, {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}])
+    # unfunded accounts come back as null
+    return {a: (acc["lamports"] if acc else 0) / 10**9 for a, acc in zip(addresses, res["value"])}
+
+
+async def _fetch_chunk(chain, chunk):
+    try:
+        balances = await (_fetch_eth(chunk) if chain == "eth" else _fetch_sol(chunk))
+        now = time.monotonic()
+        for addr, bal in balances.items():
+            _cache[addr] = (now, bal)
+        return balances
+    finally:
+        for addr in chunk:
+            _inflight.pop(addr, None)
+
+
+async def get_balances(addresses):
+    """Balances for many addresses with as few upstream calls as possible.
+
+    Fresh cache entries are served directly; concurrent callers share
+    in-flight lookups; the rest go out as ``balancemulti`` /
+    ``getMultipleAccounts`` chunks. Returns {address: balance or Exception}.
+    """
+    now = time.monotonic()
+    out, tasks, missing = {}, {}, {"eth": [], "sol": []}
+    for raw in dict.fromkeys(addresses):
+        chain = chain_of(raw)
+        addr = raw.lower() if chain == "eth" else raw
+        if chain is None:
+            out[raw] = ValueError("Invalid wallet address.")
+            continue
+        hit = _cache.get(addr)
+        if hit and now - hit[0] < BALANCE_TTL:
+            metrics.CACHE_REQUESTS.inc(cache="balances", result="hit")
+            out[raw] = hit[1]
+        elif addr in _inflight:
+            metrics.CACHE_REQUESTS.inc(cache="balances", result="shared")
+            tasks[raw] = (addr, _inflight[addr])
+        else:
+            metrics.CACHE_REQUESTS.inc(cache="balances", result="miss")
+            missing[chain].append((raw, addr))
+
+    for chain, size in (("eth", ETH_BATCH), ("sol", SOL_BATCH)):
+        items = missing[chain]
+        for i in range(0, len(items), size):
+            chunk = items[i:i + size]
+            task = asyncio.ensure_future(_fetch_chunk(chain, [addr for _, addr in chunk]))
+            for raw, addr in chunk:
+                _inflight[addr] = task
+                tasks[raw] = (addr, task)
+
+    for raw, (addr, task) in tasks.items():
         try:
-            response = requests.post(url, json=payload, headers=headers)
-            sol = response.json()["result"]["value"] / 10**9
-            return f"SOL Balance: {sol:.4f} SOL"
+            out[raw] = (await task)[addr]
         except Exception as e:
-            return f"Error fetching SOL balance: {str(e)}"
+            out[raw] = e
+    return out
+
+
+def _format(wallet_address, balance):
+    chain = chain_of(wallet_address)
+    if isinstance(balance, ValueError) and chain is None:
+        return "Invalid wallet address."
+    label = "ETH" if chain == "eth" else "SOL"
+    if isinstance(balance, Exception):
+        return f"Error fetching {label} balance: {balance}"
+    return f"{label} Balance: {balance:.4f} {label}"
+
+
+async def get_wallet_status(wallet_address):
+    if wallet_address.startswith("0x") and not ETHERSCAN_API_KEY and eth_rpc is None:
+        return "Missing ETHERSCAN_API_KEY in .env file."
+    balance = (await get_balances([wallet_address]))[wallet_address]
+    return _format(wallet_address, balance)
+
 
-    else:
-        return "Invalid wallet address."
\ No newline at end of file
+async def get_portfolio_status(wallet_addresses):
+    """One line per wallet, fetched together through ``get_balances``."""
+    wallet_addresses = [a for a in dict.fromkeys(wallet_addresses) if a]
+    lines = []
+    if not ETHERSCAN_API_KEY and eth_rpc is None and any(chain_of(a) == "eth" for a in wallet_addresses):
+        lines.append("Missing ETHERSCAN_API_KEY in .env file.")
+        wallet_addresses = [a for a in wallet_addresses if chain_of(a) != "eth"]
+    balances = await get_balances(wallet_addresses)
+    for addr in wallet_addresses:
+        short = addr[:6] + "…" + addr[-4:] if len(addr) > 12 else addr
+        lines.append(f"{short}: {_format(addr, balances[addr])}")
+    return "\n".join(lines) or "No wallets configured."
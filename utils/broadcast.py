@@ -0,0 +1,124 @@
+# utils/broadcast.py
+
+import asyncio
+import json
+import time
+import uuid
+
+from utils.send_queue import PRIORITY_BROADCAST
+
+STATE_KEY = "broadcast:current"
+CHUNK_SIZE = 500
+
+
+class BroadcastEngine:
+    """Send one message to every active subscriber, resumably.
+
+    Subscribers are read from the repository one keyset page at a time,
+    so memory stays flat however many there are. Each page is handed to
+    the outbound dispatcher, which applies Telegram's rate limits. Once a
+    page is fully delivered its last user_id is saved to ``bot_state``;
+    after a crash the broadcast resumes from that cursor instead of
+    starting again.
+    """
+
+    def __init__(self, repo, outbox, chunk_size=CHUNK_SIZE):
+        self.repo = repo
+        self.outbox = outbox
+        self.chunk_size = chunk_size
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def load(self):
+        raw = self.repo.get_state(STATE_KEY)
+        return json.loads(raw) if raw else None
+
+    def _save(self, job):
+        self.repo.set_state(STATE_KEY, json.dumps(job))
+
+    def start(self, text, extra_chats=(), on_done=None):
+        if self.running:
+            raise RuntimeError("A broadcast is already running.")
+        job = {
+            "id": uuid.uuid4().hex[:8],
+            "text": text,
+            "extra_chats": [c for c in extra_chats if c],
+            "extras_done": False,
+            "cursor": "",
+            "sent": 0,
+            "failed": 0,
+            "started_at": time.time(),
+            "elapsed": 0.0,
+            "status": "running",
+        }
+        self._save(job)
+        self._task = asyncio.ensure_future(self._run(job, on_done))
+        return job
+
+    def resume(self, on_done=None):
+        """Pick up a broadcast that was interrupted by a restart, if any."""
+        job = self.load()
+        if job and job["status"] == "running" and not self.running:
+            print(f"🔁 Resuming broadcast {job['id']} after user {job['cursor'] or '(start)'}")
+            self._task = asyncio.ensure_future(self._run(job, on_done))
+            return job
+        return None
+
+    async def _deliver(self, chat_ids, job):
+        futures = [self.outbox.submit(chat_id, job["text"], PRIORITY_BROADCAST) for chat_id in chat_ids]
+        for res in await asyncio.gather(*futures, return_exceptions=True):
+            if isinstance(res, Exception):
+                job["failed"] += 1
+            else:
+                job["sent"] += 1
+
+    async def _run(self, job, on_done):
+        resumed_at = time.monotonic()
+        base_elapsed = job["elapsed"]
+        try:
+            if not job["extras_done"]:
+                await self._deliver(job["extra_chats"], job)
+                job["extras_done"] = True
+                self._save(job)
+            while True:
+                page = self.repo.active_user_ids(after=job["cursor"], limit=self.chunk_size)
+                if not page:
+                    break
+                await self._deliver([int(uid) for uid in page], job)
+                job["cursor"] = page[-1]
+                job["elapsed"] = base_elapsed + time.monotonic() - resumed_at
+                self._save(job)
+            job["status"] = "done"
+        except asyncio.CancelledError:
+            # leave status "running" so the next process resumes it
+            job["elapsed"] = base_elapsed + time.monotonic() - resumed_at
+            self._save(job)
+            raise
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            print(f"❌ Broadcast {job['id']} failed:", e)
+        job["elapsed"] = base_elapsed + time.monotonic() - resumed_at
+        self._save(job)
+        if on_done:
+            await on_done(job)
+        return job
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def describe(job):
+    if not job:
+        return "No broadcast yet."
+    rate = job["sent"] / job["elapsed"] if job["elapsed"] else 0.0
+    return (f"📣 Broadcast {job['id']} [{job['status']}]: {job['sent']} sent, {job['failed']} failed, "
+            f"{job['elapsed']:.1f}s ({rate:.1f} msg/s)")
@@ -0,0 +1,126 @@
+# utils/circuit_breaker.py
+
+import os
+import time
+
+from utils.latency import LatencyTracker
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURES", "5"))
+COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "10"))
+MAX_COOLDOWN = float(os.getenv("BREAKER_MAX_COOLDOWN", "120"))
+TIMEOUT_FACTOR = float(os.getenv("ADAPTIVE_TIMEOUT_FACTOR", "3"))
+TIMEOUT_MIN = float(os.getenv("ADAPTIVE_TIMEOUT_MIN", "1"))
+TIMEOUT_SAMPLES = 20      # successes needed before the timeout adapts
+TIMEOUT_REFRESH = 50      # recompute the percentile every N successes
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, upstream, retry_in):
+        super().__init__(f"{upstream} is unavailable, retrying in {retry_in:.0f}s")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Per-upstream breaker with half-open probing and an adaptive timeout.
+
+    ``failure_threshold`` consecutive failures open it; while open every
+    call fails immediately with CircuitOpen. After ``cooldown`` seconds one
+    probe call is let through (half-open): success closes the breaker,
+    failure reopens it with the cooldown doubled, up to ``max_cooldown``.
+
+    ``timeout()`` is the p99 of recent successful calls times
+    ``factor``, clamped to [``min_timeout``, ``max_timeout``], so a slow
+    upstream is given up on well before the fixed client timeout. Each
+    timeout doubles it (an upstream that got slower for good is then
+    relearned rather than timed out forever) and probes get the maximum.
+    """
+
+    def __init__(self, name, max_timeout, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN,
+                 max_cooldown=MAX_COOLDOWN, factor=TIMEOUT_FACTOR, min_timeout=TIMEOUT_MIN):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.factor = factor
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.max_timeout = max_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.latency = LatencyTracker(window=512)
+        self._timeout = max_timeout
+        self._since_refresh = 0
+        self.opens = 0
+        self.fast_fails = 0
+
+    def before(self):
+        """Call before each attempt; raises CircuitOpen if it must not go out."""
+        if self.state == CLOSED:
+            return
+        if self.state == OPEN:
+            wait = self.opened_at + self.cooldown - time.monotonic()
+            if wait > 0:
+                self.fast_fails += 1
+                raise CircuitOpen(self.name, wait)
+            self.state = HALF_OPEN
+        if self.probing:
+            # one probe at a time; everyone else keeps failing fast until it's back
+            self.fast_fails += 1
+            raise CircuitOpen(self.name, self.cooldown)
+        self.probing = True
+
+    def success(self, seconds):
+        """The upstream answered (any response that isn't a 5xx/429 counts)."""
+        self.latency.observe(seconds)
+        self._since_refresh += 1
+        if self.latency.count == TIMEOUT_SAMPLES or (
+                self.latency.count > TIMEOUT_SAMPLES and self._since_refresh >= TIMEOUT_REFRESH):
+            self._since_refresh = 0
+            self._timeout = min(self.max_timeout, max(self.min_timeout, self.latency.percentile(99) * self.factor))
+        self.failures = 0
+        self.probing = False
+        if self.state != CLOSED:
+            print(f"✅ {self.name} recovered, closing circuit")
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+
+    def failure(self, timed_out=False):
+        self.failures += 1
+        if timed_out:
+            self._timeout = min(self.max_timeout, self._timeout * 2)
+        if self.state == HALF_OPEN:
+            self.probing = False
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def abandon(self):
+        """The call was cancelled before the upstream said anything."""
+        self.probing = False
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.opens += 1
+        print(f"⚠️ {self.name} failing, circuit open for {self.cooldown:.0f}s")
+
+    def timeout(self):
+        return self.max_timeout if self.state == HALF_OPEN else self._timeout
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opens": self.opens,
+            "fast_fails": self.fast_fails,
+            "timeout": round(self._timeout, 3),
+            **self.latency.summary(),
+        }
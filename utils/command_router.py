@@ -0,0 +1,237 @@
+# utils/command_router.py
+
+import asyncio
+import time
+from functools import lru_cache
+
+from utils import metrics
+from utils.latency import LatencyTracker
+from utils.send_queue import TokenBucket
+
+COMMAND_SECONDS = metrics.histogram("bot_command_seconds", "Command handler latency, middlewares included", ("command",))
+COMMANDS_UNMATCHED = metrics.counter("bot_commands_unmatched_total", "Messages that matched no command")
+
+
+def parse_command(text):
+    """Split "/cmd@botname args..." into ("cmd", "botname" or None, "args...")."""
+    if not text or not text.startswith("/"):
+        return None
+    parts = text[1:].split(None, 1)
+    if not parts:
+        return None
+    name, _, botname = parts[0].partition("@")
+    return name.lower(), botname.lower() or None, parts[1].strip() if len(parts) > 1 else ""
+
+
+CONVERTERS = {"str": str, "int": int, "float": float, "text": str}
+
+
+@lru_cache(maxsize=None)
+def compile_schema(spec):
+    """Compile "tx user_id:int? message:text" into [(name, type, optional, greedy)].
+
+    ``text`` swallows the rest of the line (so it must come last); ``?``
+    marks a field optional. Specs are compiled once and cached.
+    """
+    fields = []
+    for token in spec.split():
+        optional = token.endswith("?")
+        name, _, kind = token.rstrip("?").partition(":")
+        kind = kind or "str"
+        if kind not in CONVERTERS:
+            raise ValueError(f"Unknown argument type {kind!r} in {spec!r}")
+        fields.append((name, kind, optional, kind == "text"))
+    return tuple(fields)
+
+
+def usage(name, schema):
+    return "Use /" + " ".join([name] + [f"<{f[0]}>" if not f[2] else f"[{f[0]}]" for f in schema])
+
+
+def parse_args(schema, raw):
+    params, rest = {}, raw
+    for name, kind, optional, greedy in schema:
+        if greedy:
+            value, rest = rest, ""
+        else:
+            head = rest.split(None, 1)
+            value, rest = (head[0], head[1] if len(head) > 1 else "") if head else ("", "")
+        if not value:
+            if not optional:
+                raise ValueError(name)
+            params[name] = None
+            continue
+        params[name] = CONVERTERS[kind](value)
+    return params
+
+
+class CommandContext:
+    """What a handler gets as ``ctx``; mirrors the bits of PTB's context we used."""
+
+    __slots__ = ("bot", "update", "command", "botname", "raw_args", "args", "params", "chat_id", "user_id")
+
+    def __init__(self, bot, update, command, botname, raw_args):
+        self.bot = bot
+        self.update = update
+        self.command = command
+        self.botname = botname
+        self.raw_args = raw_args
+        self.args = raw_args.split()
+        self.params = {}
+        message = update.effective_message
+        self.chat_id = message.chat.id if message else None
+        user = update.effective_user
+        self.user_id = user.id if user else None
+
+
+class Command:
+    __slots__ = ("name", "handler", "schema", "admin", "admins", "description", "latency", "chain")
+
+    def __init__(self, name, handler, schema, admin, description, admins=None):
+        self.name = name
+        self.handler = handler
+        self.schema = compile_schema(schema)
+        self.admin = admin or admins is not None
+        # who may run it, if not the router's admins
+        self.admins = admins
+        self.description = description
+        self.latency = LatencyTracker()
+        self.chain = None
+
+
+class CommandRouter:
+    """Dict-based command dispatch with middlewares and per-command timings.
+
+    Handlers keep the ``async def handler(update, ctx)`` shape. A
+    middleware is ``async def mw(cmd, update, ctx, call_next)``; the chain
+    for each command is built once and cached.
+    """
+
+    def __init__(self, send=None, bot_username=None):
+        self.send = send
+        self.bot_username = bot_username
+        self._commands = {}
+        self._middlewares = []
+        self.fallback = None
+        self.unmatched = 0
+
+    def command(self, name, schema="", admin=False, description="", replace=False, admins=None):
+        def decorator(handler):
+            self.register(name, handler, schema, admin, description, replace, admins)
+            return handler
+        return decorator
+
+    def register(self, name, handler, schema="", admin=False, description="", replace=False, admins=None):
+        """``admins``, a set of str ids, restricts the command to those ids
+        instead of the ids the auth middleware was given."""
+        name = name.lower()
+        if name in self._commands and not replace:
+            raise ValueError(f"/{name} is already registered")
+        self._commands[name] = Command(name, handler, schema, admin, description, admins)
+
+    def use(self, middleware):
+        self._middlewares.append(middleware)
+        for cmd in self._commands.values():
+            cmd.chain = None
+
+    def commands(self):
+        return list(self._commands.values())
+
+    def _build_chain(self, cmd):
+        async def call(update, ctx):
+            return await cmd.handler(update, ctx)
+        for mw in reversed(self._middlewares):
+            call = _bind(mw, cmd, call)
+        cmd.chain = call
+        return call
+
+    async def reply(self, ctx, text):
+        """Send ``text`` to the command's chat.
+
+        A ``send`` that queues and returns a future (OutboundDispatcher.submit)
+        is not waited on, so the worker isn't held up by the chat's send rate
+        and a failed send doesn't surface here. A coroutine is awaited.
+        """
+        res = self.send(ctx.chat_id, text) if self.send is not None else ctx.bot.send_message(ctx.chat_id, text)
+        if asyncio.iscoroutine(res):
+            await res
+
+    async def dispatch(self, bot, update):
+        """Route one update; returns True if a command (or the fallback) handled it."""
+        message = update.effective_message
+        text = message.text if message else None
+        parsed = parse_command(text.strip()) if text else None
+        if parsed is not None and parsed[1] and self.bot_username and parsed[1] != self.bot_username.lower():
+            return False  # "/cmd@otherbot" in a group
+        cmd = self._commands.get(parsed[0]) if parsed else None
+        if cmd is None:
+            self.unmatched += 1
+            COMMANDS_UNMATCHED.inc()
+            if self.fallback is None or text is None:
+                return False
+            await self.fallback(update, CommandContext(bot, update, None, None, text or ""))
+            return True
+
+        ctx = CommandContext(bot, update, cmd.name, parsed[1], parsed[2])
+        try:
+            ctx.params = parse_args(cmd.schema, ctx.raw_args)
+        except ValueError:
+            await self.reply(ctx, usage(cmd.name, cmd.schema))
+            return True
+        start = time.perf_counter()
+        try:
+            await (cmd.chain or self._build_chain(cmd))(update, ctx)
+        finally:
+            elapsed = time.perf_counter() - start
+            cmd.latency.observe(elapsed)
+            COMMAND_SECONDS.observe(elapsed, command=cmd.name)
+        return True
+
+    def stats(self):
+        return {"unmatched": self.unmatched, **{f"/{c.name}": c.latency.summary() for c in self._commands.values()}}
+
+
+def _bind(mw, cmd, call_next):
+    async def call(update, ctx):
+        return await mw(cmd, update, ctx, call_next)
+    return call
+
+
+# ==========================
+# Middlewares
+# ==========================
+def auth_middleware(router, admin_ids, denied="No"):
+    """``admin_ids`` is a set of str ids, read on every call so it can grow later."""
+    async def auth(cmd, update, ctx, call_next):
+        if cmd.admin and str(ctx.user_id) not in (admin_ids if cmd.admins is None else cmd.admins):
+            return await router.reply(ctx, denied)
+        return await call_next(update, ctx)
+    return auth
+
+
+def rate_limit_middleware(router, rate=1.0, burst=5, message="⏳ Slow down a little."):
+    buckets = {}
+
+    async def rate_limit(cmd, update, ctx, call_next):
+        if len(buckets) > 10_000:
+            for k in [k for k, b in buckets.items() if b.full()]:
+                del buckets[k]
+        bucket = buckets.get(ctx.user_id)
+        if bucket is None:
+            bucket = buckets[ctx.user_id] = TokenBucket(rate, burst)
+        if bucket.delay() > 0:
+            return await router.reply(ctx, message)
+        bucket.take()
+        return await call_next(update, ctx)
+    return rate_limit
+
+
+def error_middleware(router, message="⚠️ Something went wrong, try again shortly."):
+    async def errors(cmd, update, ctx, call_next):
+        try:
+            return await call_next(update, ctx)
+        except Exception as e:
+            print(f"❌ /{cmd.name} failed:", e)
+            metrics.ERRORS.inc(where=f"/{cmd.name}")
+            await router.reply(ctx, message)
+    return errors
@@ -0,0 +1,30 @@
+# utils/eth_rpc.py
+
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from utils.solana_rpc import JsonRpcClient
+
+load_dotenv()
+
+INFURA_API_KEY = os.getenv("INFURA_API_KEY", "")
+# an explicit node URL wins; otherwise Infura if a key is configured
+ETH_RPC_URL = os.getenv("ETH_RPC_URL") or (f"https://mainnet.infura.io/v3/{INFURA_API_KEY}" if INFURA_API_KEY else "")
+ETH_RPC_FALLBACKS = [u.strip() for u in os.getenv("ETH_RPC_FALLBACKS", "").split(",") if u.strip()]
+
+
+class EthRpc(JsonRpcClient):
+    """Plain Ethereum JSON-RPC, the fallback for the Etherscan calls that have
+    a node equivalent (transaction lookup and balances, not txlist)."""
+
+    name = "eth-rpc"
+
+    async def get_balances(self, addresses):
+        """{address: balance in ETH}; the eth_getBalance calls go out as one batch."""
+        results = await asyncio.gather(*(self.call("eth_getBalance", [a, "latest"]) for a in addresses))
+        return {a.lower(): int(wei, 16) / 10**18 for a, wei in zip(addresses, results)}
+
+
+# None when no node is configured: callers then have no ETH fallback
+eth_rpc = EthRpc(ETH_RPC_URL, fallbacks=ETH_RPC_FALLBACKS) if ETH_RPC_URL else None
@@ -0,0 +1,109 @@
+# utils/expiry_sweeper.py
+
+import asyncio
+import os
+import time
+
+SWEEP_INTERVAL = float(os.getenv("EXPIRY_SWEEP_INTERVAL", "300"))
+REMIND_BEFORE = int(os.getenv("EXPIRY_REMIND_BEFORE", str(2 * 86400)))
+SWEEP_BATCH = 500
+CALLBACK_CONCURRENCY = 10
+
+
+class ExpirySweeper:
+    """Remind users before their subscription lapses and clean up after it does.
+
+    Everything is a range scan over the ``expires_at`` index, so a sweep
+    costs O(k log n) for the k users due, never a pass over everyone.
+    ``on_remind(uid, expires_at)`` runs once per expiry; ``on_expire(uid,
+    expires_at)`` (e.g. removing them from the VIP group) runs before the
+    row is deleted, and a row whose callback failed stays for the next
+    sweep. Between sweeps it sleeps until the next expiry or ``interval``,
+    whichever is sooner.
+    """
+
+    def __init__(self, repo, on_remind=None, on_expire=None, interval=SWEEP_INTERVAL,
+                 remind_before=REMIND_BEFORE, batch=SWEEP_BATCH):
+        self.repo = repo
+        self.on_remind = on_remind
+        self.on_expire = on_expire
+        self.interval = interval
+        self.remind_before = remind_before
+        self.batch = batch
+        self._sem = asyncio.Semaphore(CALLBACK_CONCURRENCY)
+        self._task = None
+        self.reminded = 0
+        self.expired = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.sweep_once()
+            except Exception as e:
+                print("❌ Expiry sweep failed:", e)
+            await asyncio.sleep(self.next_delay())
+
+    def next_delay(self, now=None):
+        now = int(time.time()) if now is None else now
+        nxt = self.repo.next_expiry(now)
+        if nxt is None:
+            return self.interval
+        return max(1.0, min(self.interval, nxt - now + 1))
+
+    async def sweep_once(self, now=None):
+        now = int(time.time()) if now is None else now
+        await self.remind(now)
+        await self.expire(now)
+
+    async def remind(self, now):
+        while True:
+            rows = self.repo.expiring_between(now + 1, now + self.remind_before, self.batch)
+            if not rows:
+                return
+            if self.on_remind:
+                await asyncio.gather(*(self._call(self.on_remind, uid, exp) for uid, exp in rows))
+            # marked even if the message failed: one missed reminder beats a retry storm
+            self.repo.mark_reminded(rows)
+            self.reminded += len(rows)
+            if len(rows) < self.batch:
+                return
+
+    async def expire(self, now):
+        while True:
+            rows = self.repo.expired(now, self.batch)
+            if not rows:
+                return
+            if self.on_expire:
+                ok = await asyncio.gather(*(self._call(self.on_expire, uid, exp) for uid, exp in rows))
+            else:
+                ok = [True] * len(rows)
+            done = [uid for (uid, _), good in zip(rows, ok) if good]
+            self.expired += self.repo.delete_expired(done, now)
+            if not done or len(rows) < self.batch:
+                # a batch of nothing but failures waits for the next sweep
+                return
+
+    async def _call(self, fn, uid, exp):
+        try:
+            async with self._sem:
+                await fn(uid, exp)
+            return True
+        except Exception as e:
+            print(f"⚠️ Expiry callback failed for {uid}:", e)
+            return False
+
+    def stats(self):
+        return {"reminded": self.reminded, "expired": self.expired}
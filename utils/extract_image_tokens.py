@@ -12,56 +12,147 @@ Usage:
 
     2) Put images you want scanned into a folder, e.g. ./images
 
-    3) Run:
-         python3 extract_image_tokens.py --input ./images --out scan_tokens.csv --env out.env
+    3) Run from the repo root:
+         python3 -m utils.extract_image_tokens --input ./images --out scan_tokens.csv --env out.env
+
+       Large folders: --workers N runs N OCR processes (default: CPU count);
+       results are written as each image finishes (--ordered keeps folder order).
+       OCR results are cached in .ocr_cache.db (--cache), so re-runs only OCR
+       new or changed images; --rescan ignores the cache.
+       Images are converted to grayscale, capped at --max-width, binarized and
+       OCRed in --tile-height tiles (see utils/ocr_preprocess.py for the trade-offs);
+       --no-preprocess sends the original image to tesseract.
+       Subfolders are scanned too (--no-recursive to stop that); narrow the
+       scan with --include/--exclude globs. An interrupted run resumes from
+       <out>.checkpoint on the next start (--restart to begin again).
 
 Notes:
  - Script tries to detect JWTs, Telegram bot tokens, Ethereum addresses, hex keys, base64-ish strings.
  - By default the .env output will REDACT values. Set --full to write full values locally (be careful).
 """
 
-import re
 import os
+import sys
+import time
 import argparse
 import csv
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from PIL import Image
 import pytesseract
-from dotenv import dotenv_values, set_key, load_dotenv
-
-# Patterns to detect (tuned but not exhaustive)
-PATTERNS = {
-    "JWT": re.compile(r'\b[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\b'),
-    "Telegram Bot Token": re.compile(r'\b\d{6,18}:[A-Za-z0-9_\-]{35,}\b'),
-    "Ethereum (0x) Address": re.compile(r'\b0x[a-fA-F0-9]{40}\b'),
-    "Hex Key (40-128 hex chars)": re.compile(r'\b[a-fA-F0-9]{40,128}\b'),
-    "Base64-like": re.compile(r'\b[A-Za-z0-9+/]{20,}={0,2}\b'),
-    "URL": re.compile(r'https?://[^\s,]+')
-}
-
-def ocr_image(path):
+from dotenv import dotenv_values
+
+if not __package__:
+    # run as utils/extract_image_tokens.py: make the utils package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ocr_cache import OcrCache
+from utils.image_walker import iter_images, Checkpoint
+from utils import ocr_preprocess
+# Patterns to detect (tuned but not exhaustive) live in token_scanner,
+# which only runs them over the parts of the text that can hold a token
+from utils.token_scanner import SCANNER_ID, find_tokens
+
+def decode_image(path):
+    with Image.open(path) as img:
+        img.load()
+        # copy the first frame out so the file can be closed
+        return img.copy()
+
+STAGES = ("cache", "decode", "preprocess", "ocr", "regex")
+
+def process_image(path, opts=None):
+    """OCR one image; returns (path, text, tokens, error, {stage: seconds}, cached). Runs in a worker process.
+
+    With ``opts`` (ocr_preprocess.Options) every frame is preprocessed and
+    OCRed in tiles; without, the first frame goes to tesseract as is.
+    """
+    timings = dict.fromkeys(STAGES, 0.0)
     try:
-        text = pytesseract.image_to_string(Image.open(path))
-        return text
+        if opts is None:
+            t = time.perf_counter()
+            img = decode_image(path)
+            timings["decode"] = time.perf_counter() - t
+            t = time.perf_counter()
+            text = pytesseract.image_to_string(img)
+            timings["ocr"] = time.perf_counter() - t
+        else:
+            texts = []
+            t = time.perf_counter()
+            with ocr_preprocess.open_image(path, opts) as src:
+                for frame in ocr_preprocess.iter_frames(src, opts.max_frames):
+                    timings["decode"] += time.perf_counter() - t
+                    t = time.perf_counter()
+                    img = ocr_preprocess.prepare(frame, opts)
+                    timings["preprocess"] += time.perf_counter() - t
+                    t = time.perf_counter()
+                    texts.append(ocr_preprocess.ocr_frame(img, pytesseract.image_to_string, opts))
+                    timings["ocr"] += time.perf_counter() - t
+                    t = time.perf_counter()
+            text = "\n".join(texts)
     except Exception as e:
-        return f"[ERROR opening/ocr image {path}]: {e}"
-
-def find_tokens(text):
-    found = []
-    for name, pat in PATTERNS.items():
-        for m in pat.finditer(text):
-            value = m.group(0).strip()
-            # small sanity filters
-            if len(value) < 8:
+        return path, "", [], str(e), timings, False
+    t = time.perf_counter()
+    tokens = find_tokens(text)
+    timings["regex"] = time.perf_counter() - t
+    return path, text, tokens, None, timings, False
+
+def run_pipeline(images, workers, ordered=False, max_inflight=None, lookup=None, opts=None):
+    """Yield process_image() results as they finish.
+
+    ``lookup(path)`` may return a finished result (a cache hit, or an error
+    for a file it could not read) instead of sending the image to a worker. At most ``max_inflight`` images are in
+    flight or buffered at once, so memory stays flat however large the
+    folder. ``ordered`` holds finished results back until every earlier
+    image is done. workers=1 runs in-process.
+    """
+    max_inflight = max_inflight or max(workers, 1) * 4
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        it = enumerate(images)
+        pending = {}
+        ready = {}
+        next_out = 0
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) + len(ready) < max_inflight:
+                try:
+                    i, path = next(it)
+                except StopIteration:
+                    exhausted = True
+                    break
+                hit = lookup(path) if lookup else None
+                if hit is not None:
+                    ready[i] = hit
+                elif pool is None:
+                    ready[i] = process_image(path, opts)
+                else:
+                    pending[pool.submit(process_image, path, opts)] = i
+            if ordered:
+                while next_out in ready:
+                    yield ready.pop(next_out)
+                    next_out += 1
+            else:
+                yield from ready.values()
+                ready.clear()
+            if not pending:
+                if exhausted:
+                    return
                 continue
-            found.append((name, value))
-    # deduplicate preserving order
-    seen = set()
-    dedup = []
-    for typ, val in found:
-        if val not in seen:
-            dedup.append((typ, val))
-            seen.add(val)
-    return dedup
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                ready[pending.pop(fut)] = fut.result()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def last_key_numbers(env_path):
+    """{BASE: highest N} over the BASE_N keys already written to ``env_path``."""
+    counter = {}
+    for key in dotenv_values(env_path):
+        base, _, n = key.rpartition("_")
+        if base and n.isdigit():
+            counter[base] = max(counter.get(base, 0), int(n))
+    return counter
 
 def redact(value):
     if len(value) <= 10:
@@ -71,9 +162,26 @@ def redact(value):
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--input", "-i", default="./images", help="Input folder with images")
+    ap.add_argument("--include", action="append", default=[], help="Only scan paths matching this glob (repeatable)")
+    ap.add_argument("--exclude", action="append", default=[], help="Skip files/folders matching this glob (repeatable)")
+    ap.add_argument("--no-recursive", action="store_true", help="Don't descend into subfolders")
+    ap.add_argument("--checkpoint", default=None, help="Resume checkpoint file (default: <out>.checkpoint)")
+    ap.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and scan everything")
     ap.add_argument("--out", "-o", default="scan_tokens.csv", help="CSV output")
     ap.add_argument("--env", "-e", default="extracted_tokens.env", help="Write .env-like file (redacted by default)")
     ap.add_argument("--full", action="store_true", help="Write full token values to the .env file (local only; sensitive!)")
+    ap.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="OCR processes to run in parallel")
+    ap.add_argument("--ordered", action="store_true", help="Write results in folder order instead of completion order")
+    ap.add_argument("--cache", default=".ocr_cache.db", help="OCR cache file ('' to disable)")
+    ap.add_argument("--cache-size", type=int, default=100_000, help="Max cached images (least recently used are evicted)")
+    ap.add_argument("--rescan", action="store_true", help="Ignore cached results and OCR every image again")
+    d = ocr_preprocess.DEFAULTS
+    ap.add_argument("--no-preprocess", action="store_true", help="OCR the original first frame, without preprocessing")
+    ap.add_argument("--max-width", type=int, default=d.max_width, help="Downscale wider images to this width (0 = never)")
+    ap.add_argument("--no-binarize", action="store_true", help="Keep grayscale instead of black/white")
+    ap.add_argument("--tile-height", type=int, default=d.tile_height, help="OCR tall images in tiles of this height (0 = never)")
+    ap.add_argument("--tile-workers", type=int, default=None, help="Parallel tiles per image (default: CPU count / workers)")
+    ap.add_argument("--max-frames", type=int, default=d.max_frames, help="OCR at most this many frames of GIF/TIFF/WebP files")
     args = ap.parse_args()
 
     img_folder = args.input
@@ -81,70 +189,115 @@ def main():
         print("Input folder does not exist:", img_folder)
         return
 
-    images = []
-    for fn in sorted(os.listdir(img_folder)):
-        if fn.lower().endswith((".png",".jpg",".jpeg",".gif",".bmp",".tiff","webp")):
-            images.append(os.path.join(img_folder, fn))
+    checkpoint = Checkpoint(args.checkpoint or args.out + ".checkpoint", img_folder)
+    resumed = not args.restart and checkpoint.load()
+    if resumed:
+        print(f"Resuming after {checkpoint.last} ({checkpoint.count} images already done)")
+    # files are discovered lazily, so OCR starts on the first one found
+    images = checkpoint.track(iter_images(img_folder, args.include, args.exclude, not args.no_recursive,
+                                          after=checkpoint.last if resumed else None))
 
-    if not images:
-        print("No images found in", img_folder)
-        return
+    opts = None if args.no_preprocess else ocr_preprocess.Options(
+        max_width=args.max_width, binarize=not args.no_binarize, tile_height=args.tile_height, overlap=d.overlap,
+        tile_workers=args.tile_workers or ocr_preprocess.default_tile_workers(args.workers), max_frames=args.max_frames)
+    # OCR text depends on the preprocessing, so each setting gets its own cache entries
+    variant = "raw" if opts is None else "w{}b{}t{}f{}".format(
+        opts.max_width, int(opts.binarize), opts.tile_height, opts.max_frames)
+    cache = OcrCache(args.cache, args.cache_size, args.rescan, variant) if args.cache else None
+
+    def lookup(path):
+        t = time.perf_counter()
+        timings = dict.fromkeys(STAGES, 0.0)
+        try:
+            hit = cache.get(path)
+        except OSError as e:
+            # vanished or unreadable: one error row, as process_image would give
+            return path, "", [], str(e), timings, False
+        if hit is None:
+            return None
+        digest, text, tokens, scanner = hit
+        if scanner != SCANNER_ID:
+            tokens = find_tokens(text)
+            cache.put(path, text, tokens, SCANNER_ID, digest)
+        timings["cache"] = time.perf_counter() - t
+        return path, text, tokens, None, timings, True
 
-    rows = []
-    for img in images:
-        print("OCR:", img)
-        text = ocr_image(img)
-        tokens = find_tokens(text)
-        if not tokens:
-            rows.append([img, "", ""])
+    # Results stream to the CSV and .env files as each image finishes;
+    # only the first 20 hits are kept in memory for the summary.
+    # a resumed run appends; rows of images finished after the last checkpoint
+    # save may be written a second time, but key numbers carry on from the
+    # .env file itself so no KEY_N is ever reused
+    counter = last_key_numbers(args.env) if resumed and os.path.exists(args.env) else {}
+    shown = []
+    totals = dict.fromkeys(STAGES, 0.0)
+    done = errors = 0
+    start = time.perf_counter()
+    mode = "a" if resumed else "w"
+    completed = False
+    try:
+        with open(args.out, mode, newline="", encoding="utf-8") as out_f, open(args.env, mode, encoding="utf-8") as env_f:
+            writer = csv.writer(out_f)
+            if not resumed:
+                writer.writerow(["image","type","value"])
+                env_f.write("# Extracted tokens (redacted by default). Keep this file private.\n")
+            for img, text, tokens, error, timings, cached in run_pipeline(
+                    images, args.workers, args.ordered, lookup=lookup if cache else None, opts=opts):
+                done += 1
+                if cache and not cached and not error:
+                    cache.put(img, text, tokens, SCANNER_ID)
+                for stage in STAGES:
+                    totals[stage] += timings[stage]
+                if error:
+                    errors += 1
+                    print(f"[ERROR opening/ocr image {img}]: {error}")
+                if not tokens:
+                    writer.writerow([img, "", ""])
+                for typ, val in tokens:
+                    writer.writerow([img, typ, val])
+                    # create a safe key name, grouped by label: KEYNAME_N=VALUE
+                    base = typ.upper().replace(" ", "_").replace("-", "_")
+                    count = counter.get(base, 0) + 1
+                    counter[base] = count
+                    outval = val if args.full else redact(val)
+                    env_f.write(f"{base}_{count}={outval}\n")
+                    if len(shown) < 20:
+                        shown.append((img, typ, outval))
+                out_f.flush()
+                env_f.flush()
+                checkpoint.done(img)
+                elapsed = time.perf_counter() - start
+                print(f"\rOCR {done} ({done / elapsed:.1f} img/s)", end="", file=sys.stderr, flush=True)
+            completed = True
+    finally:
+        if cache:
+            cache.close()
+        if completed:
+            checkpoint.clear()
         else:
-            for typ, val in tokens:
-                rows.append([img, typ, val])
-
-    # Write CSV full results (sensitive)
-    with open(args.out, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(["image","type","value"])
-        for r in rows:
-            writer.writerow(r)
+            checkpoint.save()
+            print(f"\nInterrupted; rerun the same command to resume after {checkpoint.last}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    if not done:
+        print("No images found in", img_folder)
+        return
+    if cache:
+        c = cache.stats()
+        print(f"Cache: {c['hit_rate']:.1%} hits ({c['stat_hits']} unchanged, {c['hash_hits']} same content, "
+              f"{c['misses']} OCRed)")
     print("Wrote:", args.out)
-
-    # Write a redacted .env-style output
-    # Group tokens by label and write KEYNAME=VALUE
-    env_lines = []
-    counter = {}
-    for _, typ, val in rows:
-        if not typ:
-            continue
-        # create a safe key name
-        base = typ.upper().replace(" ", "_").replace("-", "_")
-        count = counter.get(base, 0) + 1
-        counter[base] = count
-        key = f"{base}_{count}"
-        outval = val if args.full else redact(val)
-        env_lines.append(f"{key}={outval}")
-
-    with open(args.env, "w", encoding="utf-8") as f:
-        f.write("# Extracted tokens (redacted by default). Keep this file private.\n")
-        for line in env_lines:
-            f.write(line + "\n")
     print("Wrote .env-like file (redacted unless --full):", args.env)
+    print(f"Processed {done} images in {elapsed:.1f}s ({done / elapsed:.2f} img/s, {args.workers} workers, {errors} errors)")
+    print("Stage time (summed over workers): " + ", ".join(
+        f"{stage} {totals[stage]:.1f}s ({totals[stage] / max(done, 1) * 1000:.0f} ms/img)" for stage in STAGES))
 
     # Print summary
-    found_any = any(r[1] for r in rows)
-    if not found_any:
+    if not shown:
         print("No tokens found in images.")
     else:
         print("Summary (first 20 results):")
-        shown = 0
-        for img, typ, val in rows:
-            if not typ:
-                continue
-            display = val if args.full else redact(val)
+        for img, typ, display in shown:
             print(f" - {img} :: {typ} => {display}")
-            shown += 1
-            if shown >= 20:
-                break
 
 if __name__ == "__main__":
     main()
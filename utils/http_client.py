@@ -0,0 +1,181 @@
+# utils/http_client.py
+
+import asyncio
+import os
+import random
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from utils import metrics
+from utils.circuit_breaker import CircuitBreaker, CircuitOpen
+
+TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 4.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+UPSTREAM_SECONDS = metrics.histogram("upstream_request_seconds", "Upstream HTTP calls, retries included",
+                                     ("upstream", "outcome"))
+UPSTREAM_RETRIES = metrics.counter("upstream_retries_total", "Upstream HTTP attempts that were retried", ("upstream",))
+BREAKER_STATE = metrics.gauge("upstream_breaker_state", "Circuit breaker: 0 closed, 1 half-open, 2 open", ("upstream",))
+UPSTREAM_TIMEOUT = metrics.gauge("upstream_timeout_seconds", "Current adaptive timeout", ("upstream",))
+STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+# host -> short label ("coingecko", "etherscan", "solana"); unknown hosts are labelled by host
+UPSTREAM_NAMES = {}
+
+
+def name_upstream(url, name):
+    UPSTREAM_NAMES[urlsplit(url).netloc] = name
+
+
+def upstream_of(url):
+    host = urlsplit(url).netloc
+    return UPSTREAM_NAMES.get(host, host)
+
+
+class HttpError(Exception):
+    def __init__(self, status, url, body=""):
+        super().__init__(f"HTTP {status} from {url}")
+        self.status = status
+        self.url = url
+        self.body = body
+
+
+# what a caller with a fallback should fail over on
+UPSTREAM_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, HttpError, CircuitOpen)
+
+
+class HttpClient:
+    """One pooled keep-alive ClientSession per event loop.
+
+    Every outbound chain/price call goes through ``request_json`` so they
+    share connections, per-host limits, timeouts and retry policy. Each
+    upstream also gets a CircuitBreaker: its adaptive timeout replaces the
+    fixed one, and while it is open calls fail fast with CircuitOpen.
+    """
+
+    def __init__(self, timeout=TIMEOUT, retries=RETRIES):
+        self.timeout = timeout
+        self.retries = retries
+        self._sessions = weakref.WeakKeyDictionary()
+        self._breakers = {}
+
+    def breaker(self, upstream):
+        br = self._breakers.get(upstream)
+        if br is None:
+            br = self._breakers[upstream] = CircuitBreaker(upstream, self.timeout)
+            BREAKER_STATE.set_function(lambda: STATE_VALUES[br.state], upstream=upstream)
+            UPSTREAM_TIMEOUT.set_function(br.timeout, upstream=upstream)
+        return br
+
+    def session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=POOL_LIMIT,
+                limit_per_host=POOL_LIMIT_PER_HOST,
+                keepalive_timeout=30,
+                ttl_dns_cache=300,
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=CONNECT_TIMEOUT),
+            )
+            self._sessions[loop] = session
+        return session
+
+    async def request_json(self, method, url, *, params=None, json=None, timeout=None, retries=None):
+        retries = self.retries if retries is None else retries
+        kwargs = {"params": params, "json": json}
+        upstream = upstream_of(url)
+        breaker = self.breaker(upstream)
+        start = time.perf_counter()
+        outcome = "error"
+        attempt = 0
+        try:
+            while True:
+                try:
+                    breaker.before()
+                except CircuitOpen:
+                    if attempt == 0:
+                        outcome = "fast_fail"
+                    raise
+                limit = timeout if timeout is not None else breaker.timeout()
+                kwargs["timeout"] = aiohttp.ClientTimeout(total=limit, connect=min(limit, CONNECT_TIMEOUT))
+                sent = time.perf_counter()
+                reported = False
+                try:
+                    async with self.session().request(method, url, **kwargs) as resp:
+                        reported = True
+                        if resp.status in RETRY_STATUSES:
+                            breaker.failure()
+                            if attempt < retries:
+                                raise HttpError(resp.status, url)
+                        else:
+                            breaker.success(time.perf_counter() - sent)
+                        if resp.status >= 400:
+                            raise HttpError(resp.status, url, await resp.text())
+                        data = await resp.json(content_type=None)
+                        outcome = "ok"
+                        return data
+                except (aiohttp.ClientError, asyncio.TimeoutError, HttpError) as e:
+                    if not reported:
+                        reported = True
+                        breaker.failure(timed_out=isinstance(e, asyncio.TimeoutError))
+                    retryable = not isinstance(e, HttpError) or e.status in RETRY_STATUSES
+                    if not retryable or attempt >= retries:
+                        raise
+                finally:
+                    if not reported:
+                        breaker.abandon()
+                UPSTREAM_RETRIES.inc(upstream=upstream)
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+        finally:
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, upstream=upstream, outcome=outcome)
+
+    @staticmethod
+    def _backoff(attempt):
+        # full jitter: spread retries so a burst of failures doesn't re-sync
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+    async def request_failover(self, method, urls, **kwargs):
+        """Try ``urls`` in order until one answers. Endpoints with an open
+        breaker are skipped at once, and only the last one is retried."""
+        for i, url in enumerate(urls):
+            last = i == len(urls) - 1
+            try:
+                return await self.request_json(method, url, **dict(kwargs, retries=None if last else 0))
+            except UPSTREAM_ERRORS as e:
+                if last or (isinstance(e, HttpError) and e.status not in RETRY_STATUSES):
+                    raise
+
+    def stats(self):
+        return {name: br.stats() for name, br in self._breakers.items()}
+
+    async def get_json(self, url, **kwargs):
+        return await self.request_json("GET", url, **kwargs)
+
+    async def post_json(self, url, payload, **kwargs):
+        return await self.request_json("POST", url, json=payload, **kwargs)
+
+    async def close(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+client = HttpClient()
@@ -0,0 +1,132 @@
+# utils/image_walker.py
+"""
+Streaming image discovery and resume checkpoints for extract_image_tokens.py.
+
+``iter_images`` walks a tree with os.scandir and yields files as it finds
+them; only the entry lists of the directories on the current path are held
+in memory. Entries are sorted per directory and subdirectories are entered
+in place, so the walk order is the sort order of the path components. That
+is what lets a checkpoint say "everything up to this path is done" even if
+files were added since.
+"""
+
+import fnmatch
+import json
+import os
+
+EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff", ".tif", ".webp")
+
+
+def path_key(rel):
+    return tuple(rel.replace(os.sep, "/").split("/"))
+
+
+def _matches(rel, name, patterns):
+    return any(fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def iter_images(root, include=(), exclude=(), recursive=True, extensions=EXTENSIONS, after=None):
+    """Yield image paths under ``root`` in sorted walk order.
+
+    ``include``/``exclude`` are globs matched against the path relative to
+    ``root`` (with "/" separators) or the bare name; an excluded directory
+    is not entered. Without ``include`` any file with an image extension
+    is taken. ``after`` (a relative path) skips everything up to and
+    including it.
+    """
+    return _walk(root, "", include, exclude, recursive, extensions, path_key(after) if after else None)
+
+
+def _walk(root, rel_dir, include, exclude, recursive, extensions, after):
+    try:
+        with os.scandir(os.path.join(root, rel_dir)) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError as e:
+        print("⚠️ Skipping unreadable folder:", os.path.join(root, rel_dir), e)
+        return
+    for entry in entries:
+        rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+        if exclude and _matches(rel, entry.name, exclude):
+            continue
+        key = path_key(rel)
+        if entry.is_dir(follow_symlinks=False):
+            if not recursive:
+                continue
+            prefix = after[:len(key)] if after else None
+            if prefix is None or key > prefix:
+                yield from _walk(root, rel, include, exclude, recursive, extensions, None)
+            elif key == prefix:
+                yield from _walk(root, rel, include, exclude, recursive, extensions, after)
+            continue
+        if after is not None and key <= after:
+            continue
+        if include:
+            if not _matches(rel, entry.name, include):
+                continue
+        elif not entry.name.lower().endswith(extensions):
+            continue
+        if entry.is_file():
+            yield entry.path
+
+
+class Checkpoint:
+    """Remember how far a scan got, so an interrupted run can pick up there.
+
+    Paths are registered in walk order with ``track``; results may finish
+    in any order, and the checkpoint only advances past a path once it and
+    everything before it is done. Saved atomically every ``every`` results.
+    """
+
+    def __init__(self, path, root, every=50):
+        self.path = path
+        self.root = root
+        self.every = every
+        self.count = 0
+        self.last = None
+        self._seq = 0
+        self._inflight = {}   # path -> seq
+        self._finished = {}   # seq -> path, done but not yet contiguous
+        self._since_save = 0
+
+    def load(self):
+        """Restore a previous run's state for this root; True if there was one."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("root") != os.path.abspath(self.root):
+            return False
+        self.count, self.last = state["count"], state["last"]
+        return True
+
+    def track(self, paths):
+        # sequence numbers carry on from the resumed count
+        self._seq = self.count
+        for p in paths:
+            self._inflight[p] = self._seq
+            self._seq += 1
+            yield p
+
+    def done(self, path):
+        self._finished[self._inflight.pop(path)] = path
+        done_before = self.count
+        while self.count in self._finished:
+            self.last = os.path.relpath(self._finished.pop(self.count), self.root)
+            self.count += 1
+        self._since_save += self.count - done_before
+        if self._since_save >= self.every:
+            self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"root": os.path.abspath(self.root), "count": self.count, "last": self.last}, f)
+        os.replace(tmp, self.path)
+        self._since_save = 0
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
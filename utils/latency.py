@@ -0,0 +1,49 @@
+# utils/latency.py
+
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """Rolling window of recent durations (seconds) with percentile lookups."""
+
+    def __init__(self, window=2048):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def time(self):
+        return _Timer(self)
+
+    def percentile(self, p):
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self):
+        ordered = sorted(self._samples)
+        n = len(ordered)
+
+        def pct(p):
+            return round(ordered[min(n - 1, int(p / 100 * n))] * 1000, 3) if n else 0.0
+
+        return {"count": self.count, "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99)}
+
+
+class _Timer:
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracker.observe(time.perf_counter() - self.start)
+        return False
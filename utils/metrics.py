@@ -0,0 +1,202 @@
+# utils/metrics.py
+"""
+Counters, gauges and latency histograms for the hot paths, rendered in the
+Prometheus text format by app.py's /metrics route.
+
+Metrics are module-level objects made with counter()/gauge()/histogram()
+next to the code that records them. Families recorded from several
+modules (ERRORS, CACHE_REQUESTS) are declared once in this module.
+Recording is a dict update (plus a bisect for histograms) on the event
+loop, with no locks.
+"""
+
+import bisect
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_REGISTRY = {}
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} takes labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        return [[list(key), value] for key, value in self._values.items()]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, fn, **labels):
+        """Read the value from ``fn()`` at scrape time (queue depths and the like)."""
+        self._functions[self._key(labels)] = fn
+
+    def samples(self):
+        for key, fn in self._functions.items():
+            try:
+                self._values[key] = fn()
+            except Exception as e:
+                print(f"⚠️ Gauge {self.name} failed:", e)
+        return super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        h = self._values.get(key)
+        if h is None:
+            # per-bucket counts (last one is +Inf), sum, count
+            h = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        h[0][bisect.bisect_left(self.buckets, value)] += 1
+        h[1] += value
+        h[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def _register(cls, name, help, labels, **kwargs):
+    metric = _REGISTRY.get(name)
+    if metric is None:
+        metric = _REGISTRY[name] = cls(name, help, labels, **kwargs)
+    elif not isinstance(metric, cls) or metric.labels != tuple(labels):
+        raise ValueError(f"Metric {name} already registered differently")
+    return metric
+
+
+def counter(name, help, labels=()):
+    return _register(Counter, name, help, labels)
+
+
+def gauge(name, help, labels=()):
+    return _register(Gauge, name, help, labels)
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help, labels, buckets=buckets)
+
+
+# shared families
+ERRORS = counter("bot_errors_total", "Errors caught and logged instead of raised", ("where",))
+CACHE_REQUESTS = counter("cache_requests_total", "Cache lookups", ("cache", "result"))
+
+
+# ==========================
+# Export
+# ==========================
+def snapshot():
+    """JSON-serialisable copy of every metric in this process."""
+    return {m.name: {"type": m.kind, "help": m.help, "labels": list(m.labels),
+                     "buckets": list(getattr(m, "buckets", ())), "samples": m.samples()}
+            for m in _REGISTRY.values()}
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render(snapshots=None):
+    """Prometheus text exposition. ``snapshots`` maps a worker label to a
+    snapshot() taken in that worker; by default only this process is shown."""
+    snapshots = snapshots or {None: snapshot()}
+    families = {}
+    for worker, snap in snapshots.items():
+        for name, fam in snap.items():
+            families.setdefault(name, (fam, []))[1].append((worker, fam["samples"]))
+    lines = []
+    for name in sorted(families):
+        fam, per_worker = families[name]
+        lines.append(f"# HELP {name} {fam['help']}")
+        lines.append(f"# TYPE {name} {fam['type']}")
+        for worker, samples in per_worker:
+            extra = [("worker", worker)] if worker is not None else []
+            for values, value in samples:
+                pairs = list(zip(fam["labels"], values)) + extra
+                if fam["type"] != "histogram":
+                    lines.append(f"{name}{_labels(pairs)} {_fmt(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(fam["buckets"] + [float("inf")], counts):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(pairs + [('le', _fmt(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_labels(pairs)} {_fmt(total)}")
+                lines.append(f"{name}_count{_labels(pairs)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def serve(host, port):
+    """Standalone /metrics listener for processes without a web server (main.py)."""
+    from aiohttp import web
+
+    async def handle(request):
+        return web.Response(body=render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,154 @@
+# utils/ocr_cache.py
+"""
+Persistent OCR result cache for extract_image_tokens.py.
+
+Results are keyed on the SHA-256 of the image bytes (plus the OCR settings
+``variant``), so a renamed or copied screenshot is still a hit. A (path,
+size, mtime) table in front of it means unchanged files are recognised
+from a stat() alone, without reading them. Entries not used for the
+longest time are evicted once the cache holds more than ``max_entries``
+results.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    digest TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    text TEXT NOT NULL,
+    tokens TEXT NOT NULL,
+    scanner TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (digest, variant)
+);
+CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+COMMIT_EVERY = 200
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class OcrCache:
+    def __init__(self, path=".ocr_cache.db", max_entries=100_000, rescan=False, variant=""):
+        self.path = path
+        self.variant = variant
+        self.max_entries = max_entries
+        self.rescan = rescan
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._hashes = {}  # path -> (size, mtime_ns, hash) for misses awaiting put()
+        self._writes = 0
+        self.stat_hits = 0
+        self.hash_hits = 0
+        self.misses = 0
+
+    def get(self, path):
+        """Return (hash, text, tokens, scanner) for this file, or None on a miss."""
+        st = os.stat(path)
+        row = self.conn.execute(
+            "SELECT hash FROM files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (path, st.st_size, st.st_mtime_ns),
+        ).fetchone()
+        fast = row is not None
+        digest = row[0] if fast else file_hash(path)
+        hit = None if self.rescan else self.conn.execute(
+            "SELECT text, tokens, scanner FROM results WHERE digest = ? AND variant = ?", (digest, self.variant)
+        ).fetchone()
+        if hit is None:
+            self.misses += 1
+            self._hashes[path] = (st.st_size, st.st_mtime_ns, digest)
+            return None
+        if fast:
+            self.stat_hits += 1
+        else:
+            self.hash_hits += 1
+            self._remember_file(path, st.st_size, st.st_mtime_ns, digest)
+        self.conn.execute("UPDATE results SET last_used = ? WHERE digest = ? AND variant = ?",
+                          (time.time(), digest, self.variant))
+        self._wrote()
+        return digest, hit[0], [tuple(t) for t in json.loads(hit[1])], hit[2]
+
+    def put(self, path, text, tokens, scanner, digest=None):
+        entry = self._hashes.pop(path, None)
+        if digest is not None:
+            self.conn.execute(
+                "UPDATE results SET tokens = ?, scanner = ? WHERE digest = ? AND variant = ?",
+                (json.dumps(tokens), scanner, digest, self.variant),
+            )
+            self._wrote()
+            return
+        if entry is None:
+            st = os.stat(path)
+            entry = (st.st_size, st.st_mtime_ns, file_hash(path))
+        size, mtime_ns, digest = entry
+        self.conn.execute(
+            "INSERT INTO results (digest, variant, text, tokens, scanner, last_used) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(digest, variant) DO UPDATE SET text = excluded.text, tokens = excluded.tokens, "
+            "scanner = excluded.scanner, last_used = excluded.last_used",
+            (digest, self.variant, text, json.dumps(tokens), scanner, time.time()),
+        )
+        self._remember_file(path, size, mtime_ns, digest)
+        self._wrote()
+
+    def _remember_file(self, path, size, mtime_ns, digest):
+        self.conn.execute(
+            "INSERT INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, hash = excluded.hash",
+            (path, size, mtime_ns, digest),
+        )
+
+    def _wrote(self):
+        self._writes += 1
+        if self._writes >= COMMIT_EVERY:
+            self.conn.commit()
+            self._writes = 0
+
+    def evict(self):
+        """Drop least-recently-used results beyond max_entries; returns how many."""
+        excess = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        # a file is kept while any variant of its content is; each probe is a
+        # lookup on the (digest, variant) primary key
+        self.conn.execute(
+            "DELETE FROM files WHERE NOT EXISTS (SELECT 1 FROM results WHERE results.digest = files.hash)"
+        )
+        return excess
+
+    def close(self):
+        self.evict()
+        self.conn.commit()
+        self.conn.close()
+
+    def stats(self):
+        lookups = self.stat_hits + self.hash_hits + self.misses
+        return {
+            "lookups": lookups,
+            "stat_hits": self.stat_hits,
+            "hash_hits": self.hash_hits,
+            "misses": self.misses,
+            "hit_rate": (self.stat_hits + self.hash_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,117 @@
+# utils/ocr_preprocess.py
+"""
+Preprocessing between decode and OCR for extract_image_tokens.py.
+
+Each frame is converted to grayscale, capped at ``max_width`` pixels wide,
+optionally binarized (Otsu threshold), and cut into horizontal tiles of
+``tile_height`` rows that tesseract OCRs in parallel threads. Tiles overlap
+by ``overlap`` rows so a line of text on a cut is whole in at least one
+tile; the duplicate line this produces is harmless because tokens are
+deduplicated. Multi-frame GIF/TIFF/WebP files are read one frame at a
+time, and only the first ``max_frames`` are OCRed.
+
+Trade-offs. The bundled images/ samples are empty placeholder files, so
+nothing could be measured on them; these are the expected effects, and
+benchmarks/bench_ocr_preprocess.py measures time, peak memory and token
+recall per setting on a real folder:
+ - Grayscale: free accuracy-wise, tesseract converts anyway; cuts memory
+   for RGBA screenshots by 4x before any further work.
+ - Width cap: OCR time scales with pixel count. At 2000 px phone UI text
+   stays well above the ~20 px glyph height tesseract wants; capping much
+   lower starts dropping characters from long hex/base64 strings, which is
+   exactly what this tool looks for. JPEGs are decoded already reduced
+   (Image.draft), which also bounds peak memory.
+ - Binarize: speeds tesseract up slightly and helps on low-contrast or
+   dark-mode screenshots; on anti-aliased small text it can merge
+   characters (0/O, l/1). Off with --no-binarize.
+ - Tiling: a tall screenshot becomes several small OCR jobs that run in
+   parallel, so wall time drops on idle cores. Tesseract's own page layout
+   analysis also degrades on very tall pages. With many --workers already
+   busy, extra tile threads just compete, hence the default of
+   cpu_count // workers.
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageSequence
+
+Options = namedtuple("Options", "max_width binarize tile_height overlap tile_workers max_frames")
+DEFAULTS = Options(max_width=2000, binarize=True, tile_height=2000, overlap=60, tile_workers=1, max_frames=10)
+
+
+def open_image(path, opts=DEFAULTS):
+    """Open ``path`` for iter_frames(); use it as a context manager so the file is closed."""
+    img = Image.open(path)
+    if img.format == "JPEG" and opts.max_width:
+        # decode at a reduced scale straight from the DCT, never at full size
+        img.draft("L", (opts.max_width, 1))
+    return img
+
+
+def iter_frames(img, max_frames=None):
+    """Yield frames one at a time; only the current frame is decoded."""
+    for i, frame in enumerate(ImageSequence.Iterator(img)):
+        if max_frames is not None and i >= max_frames:
+            return
+        frame.load()
+        yield frame
+
+
+def otsu_threshold(gray):
+    hist = gray.histogram()[:256]
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best, threshold = -1.0, 128
+    for i, h in enumerate(hist):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, i
+    return threshold
+
+
+def prepare(frame, opts=DEFAULTS):
+    """Grayscale, cap the width and (optionally) binarize one frame."""
+    img = frame.convert("L")
+    if opts.max_width and img.width > opts.max_width:
+        factor = img.width // opts.max_width + (img.width % opts.max_width > 0)
+        # reduce() is a fast integer box downscale; exact sizing isn't needed for OCR
+        img = img.reduce(factor)
+    if opts.binarize:
+        threshold = otsu_threshold(img)
+        img = img.point(lambda v: 255 if v > threshold else 0)
+    return img
+
+
+def tiles(img, tile_height, overlap):
+    if not tile_height or img.height <= tile_height:
+        yield img
+        return
+    step = tile_height - overlap
+    for top in range(0, img.height - overlap, step):
+        yield img.crop((0, top, img.width, min(top + tile_height, img.height)))
+
+
+def ocr_frame(img, ocr, opts=DEFAULTS):
+    """OCR a prepared image tile by tile and merge the text top to bottom."""
+    parts = list(tiles(img, opts.tile_height, opts.overlap))
+    if len(parts) == 1 or opts.tile_workers <= 1:
+        return "\n".join(ocr(p) for p in parts)
+    with ThreadPoolExecutor(max_workers=min(opts.tile_workers, len(parts))) as pool:
+        # tesseract runs as a subprocess, so threads do run in parallel
+        return "\n".join(pool.map(ocr, parts))
+
+
+def default_tile_workers(workers):
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
@@ -0,0 +1,162 @@
+# utils/payment_watcher.py
+
+import asyncio
+import math
+import os
+import time
+
+from utils.http_client import client
+from utils.solana_rpc import solana
+from utils.tx_verifier import ETHERSCAN_API, decode_sol_transfer
+
+POLL_INTERVAL = float(os.getenv("PAYMENT_POLL_INTERVAL", "15"))
+INVOICE_TTL = int(os.getenv("INVOICE_TTL", "7200"))
+ETH_PAGE = 100
+SOL_PAGE = 1000
+SOL_MAX_PAGES = 10
+
+# invoice amounts are tracked in integer units per chain:
+# ETH in 1e-8 ETH steps (1e10 wei) so amounts stay typeable in wallets,
+# SOL in lamports
+UNITS = {
+    "eth": {"per_coin": 10**8, "wei_per_unit": 10**10, "decimals": 8},
+    "sol": {"per_coin": 10**9, "decimals": 9},
+}
+
+
+def format_units(chain, units):
+    u = UNITS[chain]
+    return f"{units / u['per_coin']:.{u['decimals']}f}"
+
+
+def issue_invoices(repo, uid, eth_p, sol_p, plans, ttl=INVOICE_TTL):
+    """Open one ETH and one SOL invoice per plan; returns {plan: {chain: amount_str}}."""
+    out = {}
+    for name, days, usd in plans:
+        out[name] = {}
+        for chain, price in (("eth", eth_p), ("sol", sol_p)):
+            base = math.ceil(usd / price * UNITS[chain]["per_coin"])
+            units = repo.create_invoice(uid, chain, name, days, base, ttl=ttl)
+            out[name][chain] = format_units(chain, units)
+    return out
+
+
+class PaymentWatcher:
+    """Tail transfers into the payment wallets and settle matching invoices.
+
+    Each chain is polled in pages from a cursor kept in ``bot_state``
+    (last ETH block, last SOL signature), so a restart picks up exactly
+    where the previous process stopped.
+    """
+
+    def __init__(self, repo, wallet_eth, wallet_sol, etherscan_key, on_paid=None, interval=POLL_INTERVAL):
+        self.repo = repo
+        self.wallet_eth = (wallet_eth or "").lower()
+        self.wallet_sol = wallet_sol
+        self.etherscan_key = etherscan_key
+        self.on_paid = on_paid
+        self.interval = interval
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.interval)
+
+    async def poll_once(self):
+        jobs = []
+        if self.wallet_eth and self.etherscan_key:
+            jobs.append(self.poll_eth())
+        if self.wallet_sol:
+            jobs.append(self.poll_sol())
+        for res in await asyncio.gather(*jobs, return_exceptions=True):
+            if isinstance(res, Exception):
+                print("❌ Payment watcher error:", res)
+
+    # ==========================
+    # Ethereum (Etherscan txlist from the last seen block)
+    # ==========================
+    async def poll_eth(self):
+        cursor = self.repo.get_state("watcher:eth:block")
+        if cursor is None:
+            latest = (await client.get_json(ETHERSCAN_API, params={
+                "module": "proxy", "action": "eth_blockNumber", "apikey": self.etherscan_key,
+            }))["result"]
+            self.repo.set_state("watcher:eth:block", int(latest, 16))
+            return
+        cursor = int(cursor)
+        while True:
+            data = await client.get_json(ETHERSCAN_API, params={
+                "module": "account", "action": "txlist", "address": self.wallet_eth,
+                "startblock": cursor + 1, "endblock": 99999999, "page": 1, "offset": ETH_PAGE,
+                "sort": "asc", "apikey": self.etherscan_key,
+            })
+            txs = data.get("result") if isinstance(data.get("result"), list) else []
+            for tx in txs:
+                if tx.get("to", "").lower() != self.wallet_eth or tx.get("isError") != "0":
+                    continue
+                wei = int(tx["value"])
+                units = round(wei / UNITS["eth"]["wei_per_unit"])
+                await self._settle("eth", tx["hash"].lower(), units, wei / 1e18)
+            if not txs:
+                return
+            last = int(txs[-1]["blockNumber"])
+            if len(txs) < ETH_PAGE:
+                self.repo.set_state("watcher:eth:block", last)
+                return
+            # a full page may have cut a block in half; re-read it next page,
+            # already-settled hashes are ignored by the payments table
+            cursor = last - 1 if last - 1 > cursor else last
+            self.repo.set_state("watcher:eth:block", cursor)
+
+    # ==========================
+    # Solana (signatures newer than the last processed one)
+    # ==========================
+    async def poll_sol(self):
+        cursor = self.repo.get_state("watcher:sol:signature")
+        if cursor is None:
+            latest = await solana.get_signatures_for_address(self.wallet_sol, limit=1)
+            self.repo.set_state("watcher:sol:signature", latest[0]["signature"] if latest else "")
+            return
+        sigs, before = [], None
+        for _ in range(SOL_MAX_PAGES):
+            page = await solana.get_signatures_for_address(self.wallet_sol, until=cursor or None, before=before, limit=SOL_PAGE)
+            sigs.extend(page)
+            if len(page) < SOL_PAGE:
+                break
+            before = page[-1]["signature"]
+        if not sigs:
+            return
+        sigs.reverse()  # oldest first
+        ok = [s["signature"] for s in sigs if s.get("err") is None]
+        # concurrent getTransaction calls are coalesced into batch requests by SolanaRpc
+        results = await asyncio.gather(*(solana.get_transaction(sig) for sig in ok))
+        for sig, result in zip(ok, results):
+            if not result:
+                continue
+            transfer = decode_sol_transfer(sig, result, self.wallet_sol)
+            if transfer.recipient and transfer.status == "ok":
+                await self._settle("sol", sig, round(transfer.amount * UNITS["sol"]["per_coin"]), transfer.amount)
+        self.repo.set_state("watcher:sol:signature", sigs[-1]["signature"])
+
+    async def _settle(self, chain, tx, units, amount):
+        res = self.repo.settle_invoice(chain, units, tx, amount, int(time.time()))
+        if res and self.on_paid:
+            uid, plan, exp = res
+            try:
+                await self.on_paid(uid, plan, exp)
+            except Exception as e:
+                print(f"⚠️ Payment notify failed for {uid}:", e)
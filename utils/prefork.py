@@ -0,0 +1,101 @@
+# utils/prefork.py
+"""
+Serve one aiohttp app from several worker processes on the same port.
+
+Where the OS has SO_REUSEPORT (Linux, BSD), every worker binds its own
+listening socket and the kernel spreads new connections across them.
+Elsewhere the supervisor binds once before forking and the workers accept
+from that shared socket. The supervisor restarts a worker that dies and
+passes SIGINT/SIGTERM on to all of them.
+
+Anything a worker must not share (SQLite connections, the Bot, the event
+loop) has to be created after the fork, i.e. lazily or in ``on_worker``.
+"""
+
+import os
+import signal
+import socket
+import time
+import traceback
+
+from aiohttp import web
+
+RESTART_DELAY = 1.0
+
+# index of this worker process (None in the supervisor or a single-process run)
+WORKER_ID = None
+
+
+def bind(host, port, reuse_port=False):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def serve(app, host, port, workers=1, on_worker=None, reuse_port=None):
+    """Run ``app`` in ``workers`` processes; ``on_worker(index)`` runs in each
+    one before it starts serving. Blocks until all workers have exited."""
+    if workers <= 1:
+        if on_worker:
+            on_worker(0)
+        web.run_app(app, host=host, port=port)
+        return
+    if reuse_port is None:
+        reuse_port = hasattr(socket, "SO_REUSEPORT")
+    shared = None if reuse_port else bind(host, port)
+    children = {}
+
+    def spawn(index):
+        pid = os.fork()
+        if pid:
+            children[pid] = index
+            return
+        global WORKER_ID
+        WORKER_ID = index
+        code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            sock = shared or bind(host, port, reuse_port=True)
+            if on_worker:
+                on_worker(index)
+            web.run_app(app, sock=sock, print=None)
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    print(f"🚀 {workers} workers on {host}:{port} ({'SO_REUSEPORT' if reuse_port else 'shared socket'})")
+    for i in range(workers):
+        spawn(i)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"⚠️ Worker {index} (pid {pid}) exited with status {status}, restarting")
+        time.sleep(RESTART_DELAY)
+        if not stopping:
+            spawn(index)
@@ -0,0 +1,105 @@
+# utils/price_oracle.py
+
+import asyncio
+import time
+
+from utils import metrics
+
+
+class PriceOracle:
+    """TTL cache in front of an async price fetcher.
+
+    - concurrent callers on a cold/expired cache share one in-flight fetch
+    - a hit inside the last ``refresh_ahead`` seconds of the TTL starts a
+      background refresh so callers rarely see a miss
+    - if the upstream fails, the last good value is served for up to
+      ``grace`` seconds past expiry
+    - with a ``shared`` StateBackend, a refresh first takes a value another
+      process fetched within the TTL, and publishes what it fetches itself
+      (values must then be JSON-serialisable)
+    """
+
+    def __init__(self, fetch, ttl=60, grace=600, refresh_ahead=10, shared=None, key="prices"):
+        self._fetch = fetch
+        self.shared = shared
+        self.key = key
+        self.ttl = ttl
+        self.grace = grace
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self._value = None
+        self._fetched_at = 0.0
+        self._inflight = None
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+        self.stale_served = 0
+        self.shared_hits = 0
+
+    async def get(self):
+        age = time.monotonic() - self._fetched_at
+        if self._value is not None and age < self.ttl:
+            self.hits += 1
+            metrics.CACHE_REQUESTS.inc(cache=self.key, result="hit")
+            if age >= self.ttl - self.refresh_ahead:
+                self._start_refresh()
+            return self._value
+
+        self.misses += 1
+        metrics.CACHE_REQUESTS.inc(cache=self.key, result="miss")
+        try:
+            # shield so one cancelled caller doesn't cancel the shared fetch
+            return await asyncio.shield(self._start_refresh())
+        except Exception:
+            if self._value is not None and age < self.ttl + self.grace:
+                self.stale_served += 1
+                metrics.CACHE_REQUESTS.inc(cache=self.key, result="stale")
+                return self._value
+            raise
+
+    def _start_refresh(self):
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+            self._inflight.add_done_callback(self._refresh_done)
+        return self._inflight
+
+    def _refresh_done(self, task):
+        self._inflight = None
+        if not task.cancelled():
+            task.exception()  # background failures are counted in _refresh
+
+    async def _refresh(self):
+        if self.shared is not None:
+            entry = self.shared.get(self.key)
+            # refresh-ahead also applies here, so one process refetches early
+            # instead of every process missing at once
+            if entry is not None and time.time() - entry[1] < self.ttl - self.refresh_ahead:
+                self.shared_hits += 1
+                self._value = entry[0]
+                self._fetched_at = time.monotonic() - (time.time() - entry[1])
+                return self._value
+        self.refreshes += 1
+        try:
+            value = await self._fetch()
+        except Exception:
+            self.errors += 1
+            raise
+        self._value = value
+        self._fetched_at = time.monotonic()
+        if self.shared is not None:
+            self.shared.set(self.key, [value, time.time()], ttl=self.ttl + self.grace)
+        return value
+
+    def invalidate(self):
+        self._fetched_at = 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "stale_served": self.stale_served,
+            "shared_hits": self.shared_hits,
+            "age": round(time.monotonic() - self._fetched_at, 3) if self._value is not None else None,
+        }
@@ -0,0 +1,92 @@
+# utils/profiler.py
+"""
+Sampling profiler that can be switched on in a running bot.
+
+A background thread looks at one thread's stack (by default the one that
+started it, i.e. the event loop) every ``interval`` seconds and counts
+each distinct stack. Output is the "folded" format (``a;b;c 42`` per
+line) that flamegraph.pl and speedscope read. Nothing runs while it is
+off; while on, the cost is one stack walk per interval.
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+
+class SamplingProfiler:
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self._stop = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self, thread_id=None):
+        if self.running:
+            raise RuntimeError("Profiler already running")
+        self.stacks.clear()
+        self.samples = 0
+        self.started_at = time.monotonic()
+        self._stop = threading.Event()
+        target = thread_id or threading.get_ident()
+        self._thread = threading.Thread(target=self._run, args=(target, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the folded stacks."""
+        if not self.running:
+            raise RuntimeError("Profiler not running")
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.folded()
+
+    def _run(self, target, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                return  # profiled thread is gone
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+profiler = SamplingProfiler()
+
+
+def install_signal_toggle(sig=getattr(signal, "SIGUSR2", None), directory="."):
+    """``kill -USR2 <pid>`` starts the profiler; the next one stops it and
+    writes ``profile-<pid>-<time>.folded`` into ``directory``."""
+    if sig is None:
+        return  # no SIGUSR2 on Windows
+
+    def toggle(signum, frame):
+        if not profiler.running:
+            profiler.start()
+            print(f"🔬 Profiler on (pid {os.getpid()}); send the signal again to stop")
+            return
+        elapsed = time.monotonic() - profiler.started_at
+        path = os.path.join(directory, f"profile-{os.getpid()}-{int(time.time())}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(profiler.stop())
+        print(f"🔬 Profiler off after {elapsed:.0f}s, {profiler.samples} samples → {path}")
+
+    signal.signal(sig, toggle)
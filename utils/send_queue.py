@@ -0,0 +1,199 @@
+# utils/send_queue.py
+
+import asyncio
+import itertools
+import os
+import time
+
+from utils.startup import lazy_import
+
+# loaded with the Bot itself; importing it here would pull in all of PTB at start-up
+telegram_error = lazy_import("telegram.error")
+
+GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+SEND_WORKERS = int(os.getenv("TELEGRAM_SEND_WORKERS", "16"))
+MAX_RETRIES = 5
+
+# lower value = sent first
+PRIORITY_REPLY = 0
+PRIORITY_NOTIFY = 5
+PRIORITY_BROADCAST = 10
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def full(self):
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+    async def acquire(self):
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.take()
+                return
+            await asyncio.sleep(wait)
+
+
+def retry_after_seconds(e):
+    r = e.retry_after
+    return r.total_seconds() if hasattr(r, "total_seconds") else float(r)
+
+
+class OutboundDispatcher:
+    """Queue for every outgoing ``send_message``.
+
+    Sends are paced by a global token bucket (~30/s) and one bucket per
+    chat (~1/s). Neither bucket allows a burst: Telegram counts over a
+    sliding second, so a full bucket of 30 followed by 30/s refill would
+    put ~60 sends into the first second and draw 429s. A priority queue
+    lets command replies jump ahead of broadcasts. A 429 pauses all
+    sending for ``retry_after`` and requeues the message. The bot's own
+    pooled HTTP client does the sending.
+    """
+
+    def __init__(self, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE, workers=SEND_WORKERS):
+        self.bot = None
+        self.global_bucket = TokenBucket(global_rate, burst=1)
+        self.chat_rate = chat_rate
+        self.workers = workers
+        self.queue = None
+        self._chats = {}
+        self._sending = set()  # chats with a send in flight
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._tasks = []
+        self.sent = 0
+        self.throttled = 0
+        self.failed = 0
+
+    def start(self, bot):
+        self.bot = bot
+        if self.queue is None:
+            self.queue = asyncio.PriorityQueue()
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout=10):
+        if self.queue is not None:
+            try:
+                await asyncio.wait_for(self.queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Dropping {self.queue.qsize()} queued messages on shutdown")
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, chat_id, text, priority=PRIORITY_REPLY, **kwargs):
+        """Queue a message; returns a future resolved with the sent Message."""
+        fut = asyncio.get_running_loop().create_future()
+        # fire-and-forget callers never await the future; don't warn about their errors
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.queue.put_nowait((priority, next(self._seq), [chat_id, text, kwargs, fut, 0]))
+        return fut
+
+    async def send(self, chat_id, text, priority=PRIORITY_REPLY, **kwargs):
+        return await self.submit(chat_id, text, priority, **kwargs)
+
+    def _bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 10_000:
+                # idle chats have refilled buckets and carry no state worth keeping
+                self._chats = {k: b for k, b in self._chats.items() if not b.full()}
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, burst=1)
+        return bucket
+
+    def _requeue(self, entry, delay):
+        asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, entry)
+
+    async def _worker(self):
+        while True:
+            entry = await self.queue.get()
+            try:
+                await self._process(entry)
+            finally:
+                self.queue.task_done()
+
+    async def _process(self, entry):
+        priority, seq, item = entry
+        chat_id, text, kwargs, fut, attempts = item
+        if fut.cancelled():
+            return
+
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            self._requeue(entry, pause)
+            return
+        if chat_id in self._sending:
+            # one send per chat at a time: its messages keep their order, and
+            # the next one is paced from when this one actually goes out
+            self._requeue(entry, 1 / self.chat_rate)
+            return
+        bucket = self._bucket(chat_id)
+        wait = bucket.delay()
+        if wait > 0:
+            # don't hold a worker for one busy chat; other chats keep flowing
+            self._requeue(entry, wait)
+            return
+        self._sending.add(chat_id)
+        try:
+            await self.global_bucket.acquire()
+            bucket.take()
+            await self._send(entry)
+        finally:
+            self._sending.discard(chat_id)
+
+    async def _send(self, entry):
+        priority, seq, item = entry
+        chat_id, text, kwargs, fut, attempts = item
+        try:
+            msg = await self.bot.send_message(chat_id, text, **kwargs)
+        except telegram_error.RetryAfter as e:
+            self.throttled += 1
+            retry = retry_after_seconds(e)
+            self._paused_until = max(self._paused_until, time.monotonic() + retry)
+            if attempts + 1 >= MAX_RETRIES:
+                self.failed += 1
+                fut.set_exception(e)
+            else:
+                item[4] = attempts + 1
+                self._requeue(entry, retry)
+            return
+        except Exception as e:
+            self.failed += 1
+            if not fut.done():
+                fut.set_exception(e)
+            return
+        self.sent += 1
+        if not fut.done():
+            fut.set_result(msg)
+
+    def stats(self):
+        return {
+            "queued": self.queue.qsize() if self.queue else 0,
+            "sent": self.sent,
+            "throttled": self.throttled,
+            "failed": self.failed,
+            "tracked_chats": len(self._chats),
+        }
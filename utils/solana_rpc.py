@@ -0,0 +1,118 @@
+# utils/solana_rpc.py
+
+import asyncio
+import itertools
+import os
+
+from utils.http_client import client, name_upstream
+
+SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+# comma-separated endpoints tried in order when the primary fails or its breaker is open
+SOLANA_RPC_FALLBACKS = [u.strip() for u in os.getenv("SOLANA_RPC_FALLBACKS", "").split(",") if u.strip()]
+BATCH_WINDOW = float(os.getenv("SOLANA_BATCH_WINDOW", "0.005"))
+MAX_BATCH = int(os.getenv("SOLANA_MAX_BATCH", "100"))
+
+
+class RpcError(Exception):
+    def __init__(self, error):
+        super().__init__(error.get("message", str(error)) if isinstance(error, dict) else str(error))
+        self.error = error
+
+
+class JsonRpcClient:
+    """JSON-RPC client that coalesces concurrent calls into batch requests.
+
+    Calls made within ``window`` seconds of each other (up to ``max_batch``)
+    go out as one JSON array POST; each response is routed back to its
+    caller by id. A batch goes to ``url`` or, if that fails, to each of
+    ``fallbacks`` in turn.
+    """
+
+    name = "rpc"
+
+    def __init__(self, url, window=BATCH_WINDOW, max_batch=MAX_BATCH, fallbacks=()):
+        self.url = url
+        self.urls = [url, *fallbacks]
+        for i, u in enumerate(self.urls):
+            # metrics/breaker labels: "solana", "solana-fallback-1", ...
+            name_upstream(u, self.name if i == 0 else f"{self.name}-fallback-{i}")
+        self.window = window
+        self.max_batch = max_batch
+        self._ids = itertools.count(1)
+        self._pending = []
+        self._timer = None
+        self.requests_sent = 0
+        self.calls = 0
+
+    async def call(self, method, params=None):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((next(self._ids), method, params or [], fut))
+        self.calls += 1
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch):
+        payload = [{"jsonrpc": "2.0", "id": i, "method": m, "params": p} for i, m, p, _ in batch]
+        self.requests_sent += 1
+        try:
+            resp = await client.request_failover("POST", self.urls, json=payload)
+            if not isinstance(resp, list):
+                raise RpcError(resp.get("error", resp) if isinstance(resp, dict) else resp)
+        except Exception as e:
+            for *_, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        by_id = {r.get("id"): r for r in resp if isinstance(r, dict)}
+        for i, _, _, fut in batch:
+            if fut.done():
+                continue
+            r = by_id.get(i)
+            if r is None:
+                fut.set_exception(RpcError({"message": f"no response for request {i}"}))
+            elif "error" in r:
+                fut.set_exception(RpcError(r["error"]))
+            else:
+                fut.set_result(r.get("result"))
+
+    def stats(self):
+        return {"calls": self.calls, "requests": self.requests_sent}
+
+
+class SolanaRpc(JsonRpcClient):
+    name = "solana"
+
+    def __init__(self, url=SOLANA_RPC_URL, window=BATCH_WINDOW, max_batch=MAX_BATCH, fallbacks=SOLANA_RPC_FALLBACKS):
+        super().__init__(url, window, max_batch, fallbacks)
+
+    # ==========================
+    # Helpers
+    # ==========================
+    async def get_transaction(self, signature):
+        return await self.call("getTransaction", [signature, {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
+
+    async def get_balance(self, address):
+        return (await self.call("getBalance", [address]))["value"]
+
+    async def get_signatures_for_address(self, address, until=None, before=None, limit=1000):
+        opts = {"limit": limit}
+        if until:
+            opts["until"] = until
+        if before:
+            opts["before"] = before
+        return await self.call("getSignaturesForAddress", [address, opts])
+
+
+solana = SolanaRpc()
@@ -0,0 +1,95 @@
+# utils/startup.py
+"""
+Cold-start helpers for the entry points.
+
+``track_imports()`` times every top-level import from then on (only the
+outermost import is charged, so "telegram" includes httpx and everything
+else it pulls in). ``lazy_import()`` defers a heavy module until its first
+attribute access, which is then timed too; ``load_in_thread()`` does that
+import off the event loop instead. ``report()`` prints the breakdown once
+the process is ready to serve.
+"""
+
+import asyncio
+import builtins
+import importlib
+import sys
+import threading
+import time
+import types
+
+STARTED = time.perf_counter()
+IMPORT_TIMES = {}
+
+_original_import = builtins.__import__
+# per thread, so a module loaded in the background doesn't hide the main thread's imports
+_nesting = threading.local()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    depth = getattr(_nesting, "depth", 0)
+    if level or depth or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _nesting.depth = depth + 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _nesting.depth = depth
+        IMPORT_TIMES[name] = IMPORT_TIMES.get(name, 0.0) + time.perf_counter() - start
+
+
+def track_imports():
+    builtins.__import__ = _timed_import
+
+
+def stop_tracking():
+    builtins.__import__ = _original_import
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            IMPORT_TIMES.setdefault(self.__name__ + " (lazy)", time.perf_counter() - start)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    async def load_in_thread(self):
+        """Import the module in a worker thread so the event loop keeps serving."""
+        if not self.loaded:
+            await asyncio.get_running_loop().run_in_executor(None, self._load)
+
+    @property
+    def loaded(self):
+        return self.__dict__["_module"] is not None
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def elapsed_ms():
+    """Milliseconds since this module was imported (the entry point's first line)."""
+    return (time.perf_counter() - STARTED) * 1000
+
+
+def report(label, top=8):
+    """Print time since start-up plus the slowest imports, and stop tracking."""
+    stop_tracking()
+    elapsed = elapsed_ms()
+    slowest = sorted(IMPORT_TIMES.items(), key=lambda kv: -kv[1])[:top]
+    imports = ", ".join(f"{name} {secs * 1000:.0f} ms" for name, secs in slowest) or "none"
+    print(f"⏱ {label} ready in {elapsed:.0f} ms (imports: {imports})")
+    return elapsed
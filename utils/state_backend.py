@@ -0,0 +1,175 @@
+# utils/state_backend.py
+"""
+State shared between webhook worker processes.
+
+A backend is a small key/value store with expiry plus an atomic ``claim``
+(set-if-absent), which is all the workers need: update dedup claims each
+update_id once, and cached prices are published for the other workers to
+read. SQLite in WAL mode is the default (the same file as the
+subscriptions, so a single host needs nothing extra); other stores plug in
+with ``register_backend`` and are picked by URL scheme from STATE_BACKEND.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from utils.subscription_db import DB_PATH, drop_connections_in_child
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "")
+PURGE_EVERY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shared_state_expires_at ON shared_state (expires_at);
+"""
+
+
+class StateBackend(ABC):
+    """Interface. Values are anything JSON-serialisable; ``ttl`` is in seconds
+    (None = no expiry)."""
+
+    @abstractmethod
+    def get(self, key, default=None):
+        ...
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        ...
+
+    @abstractmethod
+    def claim(self, key, ttl, value=1):
+        """Create ``key`` unless it exists and hasn't expired; True if this caller created it."""
+
+    @abstractmethod
+    def release(self, key):
+        ...
+
+    def close(self):
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local stand-in for a single worker (memory://)."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live(key, time.time())
+        return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    def claim(self, key, ttl, value=1):
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._data[key] = (value, now + ttl if ttl is not None else None)
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteStateBackend(StateBackend):
+    """``shared_state`` table in a WAL database; one connection per thread
+    (and per process: forked workers open their own)."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._claims = 0
+        drop_connections_in_child(self)
+        self.connection().executescript(SCHEMA)
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None):
+        row = self.connection().execute(
+            "SELECT value FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key, value, ttl=None):
+        self.connection().execute(
+            "INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, json.dumps(value), time.time() + ttl if ttl is not None else None),
+        )
+
+    def claim(self, key, ttl, value=1):
+        now = time.time()
+        # one statement, so two workers can't both win: the upsert only
+        # overwrites a row that has already expired
+        cur = self.connection().execute(
+            "INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE shared_state.expires_at IS NOT NULL AND shared_state.expires_at <= ?",
+            (key, json.dumps(value), now + ttl if ttl is not None else None, now),
+        )
+        self._claims += 1
+        if self._claims % PURGE_EVERY == 0:
+            self.purge(now)
+        return cur.rowcount == 1
+
+    def release(self, key):
+        self.connection().execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    def purge(self, now=None):
+        self.connection().execute("DELETE FROM shared_state WHERE expires_at <= ?", (now or time.time(),))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+BACKENDS = {
+    "sqlite": lambda rest: SQLiteStateBackend(rest or DB_PATH),
+    "memory": lambda rest: MemoryStateBackend(),
+}
+
+
+def register_backend(scheme, factory):
+    """``factory(rest_of_url)`` returns a StateBackend for ``scheme://...`` URLs."""
+    BACKENDS[scheme] = factory
+
+
+def open_backend(url=None):
+    """sqlite:///path/to.db (default: the subscriptions database) or memory://."""
+    url = url or STATE_BACKEND or f"sqlite:///{DB_PATH}"
+    scheme, sep, rest = url.partition("://")
+    if not sep or scheme not in BACKENDS:
+        raise ValueError(f"Unknown state backend: {url}")
+    return BACKENDS[scheme](rest[1:] if scheme == "sqlite" else rest)
@@ -0,0 +1,370 @@
+# utils/subscription_db.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+DB_PATH = os.getenv("DATABASE_PATH", "subscriptions.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    plan TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS payments (
+    tx_hash TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    amount REAL NOT NULL,
+    plan TEXT NOT NULL,
+    confirmed_at INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    plan TEXT NOT NULL,
+    days INTEGER NOT NULL,
+    amount_units INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    tx_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS bot_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_subscriptions_user_id ON subscriptions (user_id);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_expires_at ON subscriptions (expires_at);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_invoices_pending_amount ON invoices (chain, amount_units) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS idx_invoices_status_expires ON invoices (status, expires_at);
+"""
+
+
+def drop_connections_in_child(obj):
+    """Give ``obj`` a fresh ``_local`` in forked worker processes.
+
+    An SQLite connection must not be used on both sides of a fork(), so a
+    child opens its own on first use instead of inheriting the parent's.
+    """
+    if hasattr(os, "register_at_fork"):
+        ref = weakref.ref(obj)
+
+        def reset():
+            o = ref()
+            if o is not None:
+                o._local = threading.local()
+        os.register_at_fork(after_in_child=reset)
+
+
+def plan_name(days):
+    return {7: "week", 30: "month"}.get(days, f"{days}d")
+
+
+class SubscriptionRepository:
+    """All subscription reads and writes go through the ``subscriptions`` table.
+
+    Every thread gets one long-lived connection in WAL mode, so webhook
+    workers read concurrently and writers serialise on SQLite's lock
+    instead of overwriting each other's files.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        drop_connections_in_child(self)
+        self.init_schema()
+
+    # ==========================
+    # Connections / schema
+    # ==========================
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self):
+        conn = self.connection()
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(subscriptions)")}
+        if "expires_at" not in columns:
+            conn.execute("ALTER TABLE subscriptions ADD COLUMN expires_at INTEGER NOT NULL DEFAULT 0")
+        if "reminded_for" not in columns:
+            # the expiry a renewal reminder was last sent for; renewing moves
+            # expires_at away from it, which re-arms the reminder
+            conn.execute("ALTER TABLE subscriptions ADD COLUMN reminded_for INTEGER NOT NULL DEFAULT 0")
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(subscriptions)")}
+        if "idx_subscriptions_user_id" not in indexes:
+            # the original table never enforced one row per user; keep the newest
+            conn.execute(
+                "DELETE FROM subscriptions WHERE id NOT IN "
+                "(SELECT MAX(id) FROM subscriptions GROUP BY user_id)"
+            )
+        conn.executescript(INDEXES)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # ==========================
+    # Reads
+    # ==========================
+    def get_expiry(self, uid):
+        row = self.connection().execute(
+            "SELECT expires_at FROM subscriptions WHERE user_id = ?", (str(uid),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def items(self):
+        return self.connection().execute(
+            "SELECT user_id, expires_at FROM subscriptions ORDER BY expires_at"
+        ).fetchall()
+
+    def active_user_ids(self, after="", limit=500, now=None):
+        """One keyset page of active subscribers ordered by user_id."""
+        now = int(time.time()) if now is None else now
+        return [row[0] for row in self.connection().execute(
+            "SELECT user_id FROM subscriptions WHERE user_id > ? AND expires_at > ? ORDER BY user_id LIMIT ?",
+            (after, now, limit),
+        )]
+
+    # ==========================
+    # Expiry (range scans over idx_subscriptions_expires_at)
+    # ==========================
+    def expiring_between(self, start, end, limit=500):
+        """Users expiring in [start, end) who haven't been reminded for that expiry."""
+        return self.connection().execute(
+            "SELECT user_id, expires_at FROM subscriptions "
+            "WHERE expires_at >= ? AND expires_at < ? AND reminded_for != expires_at "
+            "ORDER BY expires_at LIMIT ?",
+            (start, end, limit),
+        ).fetchall()
+
+    def mark_reminded(self, rows):
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE subscriptions SET reminded_for = ? WHERE user_id = ? AND expires_at = ?",
+                ((exp, uid, exp) for uid, exp in rows),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def expired(self, now=None, limit=500):
+        """The oldest expired subscriptions, at most ``limit`` of them."""
+        now = int(time.time()) if now is None else now
+        return self.connection().execute(
+            "SELECT user_id, expires_at FROM subscriptions WHERE expires_at <= ? ORDER BY expires_at LIMIT ?",
+            (now, limit),
+        ).fetchall()
+
+    def next_expiry(self, after):
+        row = self.connection().execute(
+            "SELECT MIN(expires_at) FROM subscriptions WHERE expires_at > ?", (after,)
+        ).fetchone()
+        return row[0]
+
+    def delete_expired(self, uids, now=None):
+        """Delete these users if still expired (a renewal in the meantime wins)."""
+        now = int(time.time()) if now is None else now
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.executemany(
+                "DELETE FROM subscriptions WHERE user_id = ? AND expires_at <= ?",
+                ((str(uid), now) for uid in uids),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount
+
+    def count(self):
+        return self.connection().execute("SELECT COUNT(*) FROM subscriptions").fetchone()[0]
+
+    # ==========================
+    # Writes
+    # ==========================
+    def extend(self, uid, days, plan=None, now=None):
+        now = int(time.time()) if now is None else now
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            new = self._extend(conn, uid, days, plan, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return new
+
+    def _extend(self, conn, uid, days, plan, now):
+        conn.execute(
+            "INSERT INTO subscriptions (user_id, plan, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET plan = excluded.plan, "
+            "expires_at = MAX(subscriptions.expires_at, ?) + ?",
+            (str(uid), plan or plan_name(days), now + days * 86400, now, days * 86400),
+        )
+        return conn.execute(
+            "SELECT expires_at FROM subscriptions WHERE user_id = ?", (str(uid),)
+        ).fetchone()[0]
+
+    # ==========================
+    # Payments
+    # ==========================
+    def get_payment(self, tx_hash):
+        return self.connection().execute(
+            "SELECT user_id, chain, amount, plan, confirmed_at FROM payments WHERE tx_hash = ?",
+            (tx_hash,),
+        ).fetchone()
+
+    def apply_payment(self, tx_hash, uid, chain, amount, plan, days, now=None):
+        """Record a payment and extend the subscription in one transaction.
+
+        Returns the new expiry, or None if ``tx_hash`` was already used.
+        """
+        now = int(time.time()) if now is None else now
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO payments (tx_hash, user_id, chain, amount, plan, confirmed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (tx_hash, str(uid), chain, amount, plan, now),
+            )
+            new = self._extend(conn, uid, days, plan, now) if cur.rowcount else None
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return new
+
+    def remove(self, uid):
+        cur = self.connection().execute("DELETE FROM subscriptions WHERE user_id = ?", (str(uid),))
+        return cur.rowcount > 0
+
+    # ==========================
+    # Invoices
+    # ==========================
+    def create_invoice(self, uid, chain, plan, days, base_units, tag_space=1000, ttl=7200, now=None):
+        """Open a pending invoice and return its unique amount (in chain units).
+
+        ``base_units`` is topped up with a small tag so that every pending
+        invoice on a chain has a distinct amount the payment watcher can
+        match an incoming transfer against.
+        """
+        now = int(time.time()) if now is None else now
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE invoices SET status = 'expired' WHERE status = 'pending' AND "
+                "(expires_at < ? OR (user_id = ? AND chain = ? AND plan = ?))",
+                (now, str(uid), chain, plan),
+            )
+            taken = {row[0] for row in conn.execute(
+                "SELECT amount_units FROM invoices WHERE status = 'pending' AND chain = ? "
+                "AND amount_units BETWEEN ? AND ?",
+                (chain, base_units + 1, base_units + tag_space - 1),
+            )}
+            tag = next((t for t in range(1, tag_space) if base_units + t not in taken), None)
+            if tag is None:
+                raise RuntimeError(f"No free {chain} invoice amount near {base_units}")
+            conn.execute(
+                "INSERT INTO invoices (user_id, chain, plan, days, amount_units, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (str(uid), chain, plan, days, base_units + tag, now, now + ttl),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return base_units + tag
+
+    def settle_invoice(self, chain, amount_units, tx_hash, amount, now=None):
+        """Mark the pending invoice for this exact amount paid and extend its user.
+
+        Returns (user_id, plan, expires_at), or None if nothing matched or
+        ``tx_hash`` was already used.
+        """
+        now = int(time.time()) if now is None else now
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, user_id, plan, days FROM invoices "
+                "WHERE status = 'pending' AND chain = ? AND amount_units = ?",
+                (chain, amount_units),
+            ).fetchone()
+            result = None
+            if row:
+                invoice_id, uid, plan, days = row
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO payments (tx_hash, user_id, chain, amount, plan, confirmed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (tx_hash, uid, chain, amount, plan, now),
+                )
+                if cur.rowcount:
+                    conn.execute(
+                        "UPDATE invoices SET status = 'paid', tx_hash = ? WHERE id = ?", (tx_hash, invoice_id)
+                    )
+                    result = (uid, plan, self._extend(conn, uid, days, plan, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    # ==========================
+    # Key/value state (cursors, checkpoints)
+    # ==========================
+    def get_state(self, key, default=None):
+        row = self.connection().execute("SELECT value FROM bot_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        self.connection().execute(
+            "INSERT INTO bot_state (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def import_json(self, path):
+        """One-off migration of a legacy users.json ({uid: expiry}) into the table."""
+        try:
+            with open(path, "r") as f:
+                users = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO subscriptions (user_id, plan, expires_at) VALUES (?, 'legacy', ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET "
+                "expires_at = MAX(subscriptions.expires_at, excluded.expires_at)",
+                ((str(k), int(v)) for k, v in users.items()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(users)
@@ -0,0 +1,95 @@
+# utils/token_scanner.py
+"""
+Token detection for OCR text: one cheap pass to find the runs that hold a
+token, full matching only inside those.
+
+A prefilter splits the text into runs of MIN_LENGTH+ non-space characters
+(no token contains whitespace), and all patterns compiled into one
+alternation decide with a single search whether a run holds any token.
+Ordinary OCR words fail that search and are never looked at again.
+
+Runs that do hold a token are matched with every pattern on its own, so
+tokens nested in each other are all reported, as with one finditer per
+pattern over the whole text: the Ethereum address inside an etherscan URL
+comes out as well as the URL. Results are ordered and labelled as that
+per-pattern scan would: by PATTERNS order, the first pattern to match a
+value naming it.
+"""
+
+import hashlib
+import re
+
+# report order; a value matched by several patterns gets the first label
+PATTERNS = {
+    "JWT": re.compile(r'\b[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\b'),
+    "Telegram Bot Token": re.compile(r'\b\d{6,18}:[A-Za-z0-9_\-]{35,}\b'),
+    "Ethereum (0x) Address": re.compile(r'\b0x[a-fA-F0-9]{40}\b'),
+    "Hex Key (40-128 hex chars)": re.compile(r'\b[a-fA-F0-9]{40,128}\b'),
+    "Base64-like": re.compile(r'\b[A-Za-z0-9+/]{20,}={0,2}\b'),
+    "URL": re.compile(r'https?://[^\s,]+'),
+}
+RANK = {label: i for i, label in enumerate(PATTERNS)}
+# matches wherever any pattern does; only used to skip runs with no token
+SCANNER = re.compile("|".join(f"(?:{p.pattern})" for p in PATTERNS.values()))
+# cached tokens found with different patterns are re-derived from the cached text
+SCANNER_ID = hashlib.sha1(repr([(k, p.pattern) for k, p in PATTERNS.items()]).encode()).hexdigest()[:12]
+
+MIN_LENGTH = 8
+CANDIDATES = re.compile(r"\S{%d,}" % MIN_LENGTH)
+
+
+def iter_tokens(text):
+    """Yield (label, value) for every pattern match, run by run, duplicates included."""
+    search = SCANNER.search
+    patterns = PATTERNS.items()
+    for run in CANDIDATES.finditer(text):
+        start, end = run.span()
+        # whitespace on both sides of the run, so \b behaves as in a full scan
+        if search(text, start, end) is None:
+            continue
+        for label, pattern in patterns:
+            for m in pattern.finditer(text, start, end):
+                value = m.group()
+                # small sanity filter
+                if len(value) >= MIN_LENGTH:
+                    yield label, value
+
+
+def iter_chunk_tokens(chunks):
+    """Like iter_tokens over the concatenation of ``chunks``, scanning as they arrive.
+
+    No token contains whitespace, so each chunk is scanned up to its last
+    whitespace character and the tail is carried into the next one; a
+    token split across chunks is matched whole, exactly as in one pass.
+    """
+    carry = ""
+    for chunk in chunks:
+        buf = carry + chunk
+        cut = max(buf.rfind(" "), buf.rfind("\n"), buf.rfind("\t"), buf.rfind("\r"))
+        if cut < 0:
+            carry = buf
+            continue
+        yield from iter_tokens(buf[:cut + 1])
+        carry = buf[cut + 1:]
+    if carry:
+        yield from iter_tokens(carry)
+
+
+def find_tokens(text):
+    """Unique (label, value) pairs, grouped by pattern in PATTERNS order."""
+    return dedup(iter_tokens(text))
+
+
+def find_tokens_chunked(chunks):
+    return dedup(iter_chunk_tokens(chunks))
+
+
+def dedup(tokens):
+    seen = set()
+    out = []
+    # stable: within a pattern, text order is kept
+    for typ, val in sorted(tokens, key=lambda t: RANK[t[0]]):
+        if val not in seen:
+            out.append((typ, val))
+            seen.add(val)
+    return out
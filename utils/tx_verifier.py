@@ -0,0 +1,182 @@
+# utils/tx_verifier.py
+
+import asyncio
+import os
+import re
+from collections import OrderedDict, namedtuple
+
+from utils.http_client import client, name_upstream, UPSTREAM_ERRORS
+from utils.solana_rpc import solana
+from utils.eth_rpc import eth_rpc
+
+ETHERSCAN_API = os.getenv("ETHERSCAN_API_URL", "https://api.etherscan.io/api")
+name_upstream(ETHERSCAN_API, "etherscan")
+
+# (name, days, usd) — most expensive first so a payment gets the best tier it covers
+PLANS = (
+    ("month", 30, 100.0),
+    ("week", 7, 10.0),
+)
+
+ETH_TX_RE = re.compile(r"^0x[0-9a-fA-F]{64}$")
+SOL_SIG_RE = re.compile(r"^[1-9A-HJ-NP-Za-km-z]{64,88}$")
+
+# status: "ok", "pending" (not mined yet) or "failed" (reverted on-chain)
+Transfer = namedtuple("Transfer", "chain tx recipient amount status")
+Result = namedtuple("Result", "ok plan days expires_at message")
+
+
+def classify(amount, price, plans=PLANS):
+    """Return the best (name, days, usd) plan ``amount`` coins pay for, or None."""
+    usd = amount * price
+    for plan in plans:
+        # tolerate float dust from the crypto -> usd round trip
+        if usd + 1e-9 >= plan[2]:
+            return plan
+    return None
+
+
+class TxVerifier:
+    """Fetch a payment transaction once and settle it against every plan tier.
+
+    Confirmed hashes are cached in memory and recorded in the ``payments``
+    table, so a hash can only ever buy one subscription.
+    """
+
+    def __init__(self, repo, wallet_eth, wallet_sol, etherscan_key, plans=PLANS, cache_size=10_000):
+        self.repo = repo
+        self.plans = plans
+        self.wallet_eth = (wallet_eth or "").lower()
+        self.wallet_sol = wallet_sol
+        self.etherscan_key = etherscan_key
+        self.cache_size = cache_size
+        self._confirmed = OrderedDict()
+        self._inflight = {}
+
+    # ==========================
+    # Fetch + decode (one RPC per tx)
+    # ==========================
+    async def fetch_eth(self, tx):
+        # the receipt carries the mined status; both lookups go out together
+        r, receipt = await asyncio.gather(self._eth_call("eth_getTransactionByHash", tx),
+                                          self._eth_call("eth_getTransactionReceipt", tx))
+        return _eth_transfer(tx, r, receipt)
+
+    async def _eth_call(self, method, tx):
+        """One lookup through Etherscan's proxy, or the node if Etherscan is unavailable."""
+        if not self.etherscan_key:
+            return await eth_rpc.call(method, [tx])
+        params = {
+            "module": "proxy",
+            "action": method,
+            "txhash": tx,
+            "apikey": self.etherscan_key,
+        }
+        try:
+            data = await client.get_json(ETHERSCAN_API, params=params)
+        except UPSTREAM_ERRORS:
+            if eth_rpc is None:
+                raise
+            return await eth_rpc.call(method, [tx])
+        if data.get("status") == "0" and not isinstance(data.get("result"), dict):
+            # Etherscan answers rate limits with a 200, status "0" and the reason as the result
+            if eth_rpc is not None:
+                return await eth_rpc.call(method, [tx])
+            raise RuntimeError(data.get("result") or data.get("message") or "Etherscan lookup failed.")
+        return data.get("result")
+
+    async def fetch_sol(self, tx):
+        r = await solana.get_transaction(tx)
+        if not r:
+            return None
+        return decode_sol_transfer(tx, r, self.wallet_sol)
+
+    # ==========================
+    # Verification
+    # ==========================
+    async def verify(self, uid, tx, prices):
+        """Settle ``tx`` for ``uid``; concurrent calls for one hash share the work."""
+        tx = tx.strip()
+        if ETH_TX_RE.match(tx):
+            tx = tx.lower()
+        elif not SOL_SIG_RE.match(tx):
+            return Result(False, None, 0, 0, "That doesn't look like an ETH or SOL transaction hash.")
+
+        owner, task = self._inflight.get(tx, (str(uid), None))
+        if task is None:
+            task = asyncio.ensure_future(self._verify(uid, tx, prices))
+            self._inflight[tx] = (owner, task)
+            task.add_done_callback(lambda _: self._inflight.pop(tx, None))
+        result = await asyncio.shield(task)
+        if result.ok and owner != str(uid):
+            return Result(False, None, 0, 0, "This transaction was already used.")
+        return result
+
+    async def _verify(self, uid, tx, prices):
+        used = self._confirmed.get(tx) or self.repo.get_payment(tx)
+        if used:
+            return Result(False, None, 0, 0, "This transaction was already used.")
+
+        eth_p, sol_p = prices
+        if tx.startswith("0x"):
+            if not self.wallet_eth:
+                return Result(False, None, 0, 0, "ETH confirm error: Add WALLET_ADDRESS_ETH to .env")
+            if not self.etherscan_key and eth_rpc is None:
+                return Result(False, None, 0, 0, "ETH confirm error: Add ETHERSCAN_API_KEY to .env")
+            transfer, wallet, price = await self.fetch_eth(tx), self.wallet_eth, eth_p
+        else:
+            if not self.wallet_sol:
+                return Result(False, None, 0, 0, "SOL confirm error: Add WALLET_ADDRESS_SOL to .env")
+            transfer, wallet, price = await self.fetch_sol(tx), self.wallet_sol, sol_p
+
+        label = "ETH" if tx.startswith("0x") else "SOL"
+        if transfer is None:
+            return Result(False, None, 0, 0, f"{label} confirm error: TX not found.")
+        if transfer.status == "pending":
+            return Result(False, None, 0, 0, f"{label} confirm error: TX is still pending, try again once it is mined.")
+        if transfer.status == "failed":
+            return Result(False, None, 0, 0, f"{label} confirm error: TX failed on-chain.")
+        if transfer.recipient != wallet or transfer.amount <= 0:
+            return Result(False, None, 0, 0, f"{label} confirm error: Invalid {label} transfer")
+        plan = classify(transfer.amount, price, self.plans)
+        if plan is None:
+            return Result(False, None, 0, 0, f"{label} confirm error: Value {transfer.amount} {label} is below the weekly price")
+
+        name, days, _ = plan
+        exp = self.repo.apply_payment(tx, uid, transfer.chain, transfer.amount, name, days)
+        if exp is None:
+            return Result(False, None, 0, 0, "This transaction was already used.")
+        self._remember(tx, uid)
+        return Result(True, name, days, exp, None)
+
+    def _remember(self, tx, uid):
+        self._confirmed[tx] = str(uid)
+        if len(self._confirmed) > self.cache_size:
+            self._confirmed.popitem(last=False)
+
+
+def _eth_transfer(tx, r, receipt):
+    # Etherscan's proxy and a node return the same transaction/receipt objects
+    if not isinstance(r, dict):
+        return None
+    if r.get("blockNumber") is None or not isinstance(receipt, dict):
+        status = "pending"
+    else:
+        status = "ok" if receipt.get("status") == "0x1" else "failed"
+    return Transfer("eth", tx, (r.get("to") or "").lower(), int(r.get("value", "0x0"), 16) / 1e18, status)
+
+
+def decode_sol_transfer(tx, result, wallet_sol):
+    """Sum every System Program transfer in a jsonParsed transaction that pays ``wallet_sol``."""
+    meta = result.get("meta")
+    # a failed tx keeps its parsed instructions even though nothing moved
+    status = "ok" if isinstance(meta, dict) and meta.get("err") is None else "failed"
+    lamports = 0
+    for instr in result.get("transaction", {}).get("message", {}).get("instructions", []):
+        p = instr.get("parsed")
+        # SPL token transfers are also parsed as type "transfer"
+        if instr.get("program") == "system" and isinstance(p, dict) and p.get("type") == "transfer":
+            info = p.get("info", {})
+            if info.get("destination") == wallet_sol:
+                lamports += int(info.get("lamports", 0))
+    return Transfer("sol", tx, wallet_sol if lamports else None, lamports / 1e9, status)
@@ -0,0 +1,134 @@
+# utils/update_dedup.py
+
+import time
+from collections import OrderedDict
+
+# Telegram drops undelivered updates after 24h, so nothing older can be redelivered
+MAX_AGE = 86400
+
+
+class UpdateDeduplicator:
+    """Drop Telegram redeliveries by ``update_id``.
+
+    Recent ids live in a bounded LRU. The highest id queued (reported
+    through ``queued``) is persisted through ``state`` (anything with
+    get_state/set_state) every ``persist_every`` updates, so after a restart ids at or below the last
+    saved mark are treated as already handled.
+
+    The mark only holds for ``max_age`` seconds after the last accepted
+    update: Telegram restarts update_id at a random value after a week
+    without updates, so past that an old id starts a new sequence instead
+    of being dropped.
+
+    With several worker processes a redelivery can land on a different
+    worker, so each new id is also claimed in ``shared`` (a StateBackend);
+    whoever loses the claim drops it as a duplicate.
+    """
+
+    def __init__(self, state=None, key="webhook:update_high_water", capacity=10_000, persist_every=100,
+                 shared=None, claim_ttl=MAX_AGE, max_age=MAX_AGE):
+        self.state = state
+        self.shared = shared
+        self.claim_ttl = claim_ttl
+        self.key = key
+        self.capacity = capacity
+        self.persist_every = persist_every
+        self.max_age = max_age
+        self._seen = OrderedDict()
+        self.floor, self.last_accepted_at = self._load()
+        self.high_water = self.floor
+        self.accepted = 0
+        self.duplicates = 0
+        self.stale = 0
+        self.resets = 0
+        self._since_persist = 0
+
+    def _load(self):
+        """(saved mark, when it was saved); no mark if it's missing or too old."""
+        now = time.time()
+        if self.state is None:
+            return 0, now
+        saved = self.state.get_state(self.key)
+        if not saved:
+            return 0, now
+        mark, saved_at = saved.split(":")
+        mark, saved_at = int(mark), float(saved_at)
+        if now - saved_at > self.max_age:
+            return 0, now
+        return mark, saved_at
+
+    def is_duplicate(self, update_id):
+        """Record ``update_id``; True if it was already seen (or is too old to tell)."""
+        if update_id is None:
+            return False
+        if update_id in self._seen:
+            self._seen.move_to_end(update_id)
+            self.duplicates += 1
+            return True
+        now = time.time()
+        if update_id <= self.floor or update_id <= self.high_water - self.capacity:
+            if now - self.last_accepted_at <= self.max_age:
+                # older than anything the LRU can still vouch for
+                self.stale += 1
+                return True
+            # quiet for longer than a redelivery can take: the ids were restarted
+            self.resets += 1
+            self._seen.clear()
+            self.floor = self.high_water = 0
+        self._seen[update_id] = None
+        if len(self._seen) > self.capacity:
+            self._seen.popitem(last=False)
+        if self.shared is not None and not self.shared.claim(f"update:{update_id}", self.claim_ttl):
+            # another worker already took it
+            self.duplicates += 1
+            return True
+        self.accepted += 1
+        self.last_accepted_at = now
+        return False
+
+    def queued(self, update_id):
+        """Raise the mark past ``update_id`` once it is safely queued.
+
+        Not done in ``is_duplicate``: an update rejected with a 503 must
+        stay above the saved mark, or its redelivery after a restart would
+        be dropped as stale.
+        """
+        if update_id is not None and update_id > self.high_water:
+            self.high_water = update_id
+            self._since_persist += 1
+            if self._since_persist >= self.persist_every:
+                self.persist()
+
+    def forget(self, update_id):
+        """Un-record an update that was rejected, so its redelivery is accepted."""
+        if self._seen.pop(update_id, False) is None:
+            self.accepted -= 1
+            if self.shared is not None:
+                self.shared.release(f"update:{update_id}")
+
+    def persist(self):
+        if self.state is not None and self._since_persist:
+            self.state.set_state(self.key, f"{self.high_water}:{self.last_accepted_at:.0f}")
+        self._since_persist = 0
+
+    def stats(self):
+        return {
+            "accepted": self.accepted,
+            "duplicates_dropped": self.duplicates,
+            "stale_dropped": self.stale,
+            "sequence_resets": self.resets,
+            "high_water": self.high_water,
+        }
+
+
+def chat_id_of(data):
+    for key in ("message", "edited_message", "channel_post", "edited_channel_post"):
+        if key in data:
+            return data[key].get("chat", {}).get("id")
+    cb = data.get("callback_query")
+    if cb:
+        return (cb.get("message") or {}).get("chat", {}).get("id") or cb.get("from", {}).get("id")
+    for key in ("inline_query", "chosen_inline_result", "pre_checkout_query", "shipping_query"):
+        if key in data:
+            return data[key].get("from", {}).get("id")
+    return None
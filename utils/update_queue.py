@@ -0,0 +1,122 @@
+# utils/update_queue.py
+
+import asyncio
+import time
+from collections import deque
+
+from utils import metrics
+from utils.latency import LatencyTracker
+
+UPDATE_SECONDS = metrics.histogram("webhook_update_seconds", "Webhook update latency: handler only, or from enqueue",
+                                   ("stage",))
+
+
+class UpdateQueue:
+    """Bounded in-process queue of webhook updates drained by N workers.
+
+    The webhook handler only enqueues and acks; ``handler`` runs on the
+    worker coroutines. When the queue is full ``put_nowait`` returns False
+    so the caller can push back on Telegram instead of buffering forever.
+
+    With a ``key`` function (e.g. the chat id), updates with the same key
+    run one at a time in arrival order: a worker that dequeues an update
+    whose key is already being handled appends it to that key's backlog
+    and moves on, and the worker holding the key runs it next. A burst
+    from one chat thus occupies one worker, not all of them. Backlogged
+    updates count towards ``maxsize``.
+    """
+
+    def __init__(self, handler, workers=8, maxsize=1000, key=None):
+        self.handler = handler
+        self.workers = workers
+        self.key = key
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.handle_latency = LatencyTracker()
+        self.total_latency = LatencyTracker()
+        self.rejected = 0
+        self.failed = 0
+        self.backlogged = 0
+        self._backlogs = {}     # key -> updates waiting behind the one in progress
+        self._tasks = []
+
+    def put_nowait(self, update):
+        maxsize = self.queue.maxsize
+        try:
+            if maxsize and self.queue.qsize() + self.backlogged >= maxsize:
+                raise asyncio.QueueFull
+            self.queue.put_nowait((time.perf_counter(), update))
+            return True
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout=10):
+        try:
+            await asyncio.wait_for(self.queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Dropping {self.queue.qsize()} queued updates on shutdown")
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self):
+        while True:
+            item = await self.queue.get()
+            key = self.key(item[1]) if self.key else None
+            if key is None:
+                await self._handle(item)
+                continue
+            backlog = self._backlogs.get(key)
+            if backlog is not None:
+                # another worker is on this key and will run it in order
+                backlog.append(item)
+                self.backlogged += 1
+                continue
+            backlog = self._backlogs[key] = deque()
+            try:
+                await self._handle(item)
+                while backlog:
+                    self.backlogged -= 1
+                    await self._handle(backlog.popleft())
+            finally:
+                # only non-empty when cancelled on shutdown
+                self.backlogged -= len(backlog)
+                del self._backlogs[key]
+
+    async def _handle(self, item):
+        enqueued, update = item
+        start = time.perf_counter()
+        try:
+            await self.handler(update)
+        except Exception as e:
+            self.failed += 1
+            metrics.ERRORS.inc(where="update_queue")
+            print("❌ Update handler error:", e)
+        finally:
+            done = time.perf_counter()
+            self.handle_latency.observe(done - start)
+            self.total_latency.observe(done - enqueued)
+            UPDATE_SECONDS.observe(done - start, stage="handle")
+            UPDATE_SECONDS.observe(done - enqueued, stage="end_to_end")
+            self.queue.task_done()
+
+    def active_keys(self):
+        """Keys (chats) with an update in progress."""
+        return len(self._backlogs)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue.qsize(),
+            "backlogged": self.backlogged,
+            "queue_capacity": self.queue.maxsize,
+            "workers": len(self._tasks),
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "handle": self.handle_latency.summary(),
+            "end_to_end": self.total_latency.summary(),
+        }